@@ -24,6 +24,27 @@ from app.models.register import (
     Register, RegisterEntry, RegisterAssistantCoach
 )
 
+from app.models.attendance_rollup import (
+    AttendanceRollup
+)
+
+from app.models.absence_streak import (
+    AbsenceStreak
+)
+
+from app.models.report_email_attempt import (
+    ReportEmailAttempt
+)
+
+from app.models.player_upload import (
+    PlayerUpload, PlayerUploadRow
+)
+
+# Statistics cache models
+from app.models.stats_cache import (
+    StatsCacheVersion, StatsCacheEntry
+)
+
 # Register models
 from app.models.invoice import (
     CoachingRate, Invoice, InvoiceLineItem, InvoiceStatus, RateType
@@ -40,9 +61,15 @@ from app.models.organisation import (
 
 # Communication models
 from app.models.communication import (
-    Document, DocumentPermission, DocumentDownloadLog, DocumentAcknowledgment
+    Document, DocumentPermission, DocumentDownloadLog, DocumentAcknowledgment, NotificationOutbox,
+    BulkEmailJob
 )
 
 from app.models.session_planning import(
     SessionPlan, SessionPlanEntry, TrialPlayer
-)
\ No newline at end of file
+)
+
+# Scheduling models
+from app.models.session_occurrence import (
+    SessionOccurrence
+)
@@ -0,0 +1,34 @@
+# app/models/absence_streak.py
+
+from sqlalchemy import text, Index
+from app.extensions import db
+
+class AbsenceStreak(db.Model):
+    """
+    Current run of consecutive absences for a programme player in a teaching period.
+
+    Counts ABSENT entries back from the player's most recent register; any
+    other status breaks the streak. Kept up to date on register writes so
+    absence thresholds can be checked without walking register history.
+    """
+    __tablename__ = 'absence_streak'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id', ondelete='CASCADE'), nullable=False)
+    programme_player_id = db.Column(db.Integer, db.ForeignKey('programme_players.id', ondelete='CASCADE'), nullable=False)
+
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_register_date = db.Column(db.Date, nullable=False)  # Date of the most recent register counted
+
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))
+
+    # Indexes for performance
+    __table_args__ = (
+        # One streak per player per period
+        Index('idx_absence_streak_unique', programme_player_id, teaching_period_id, unique=True),
+        Index('idx_absence_streak_club_period_streak', tennis_club_id, teaching_period_id, current_streak),
+    )
+
+    def __repr__(self):
+        return f'<AbsenceStreak player_id={self.programme_player_id} streak={self.current_streak}>'
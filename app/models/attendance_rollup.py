@@ -0,0 +1,41 @@
+# app/models/attendance_rollup.py
+
+from sqlalchemy import text, Index
+from app.extensions import db
+
+class AttendanceRollup(db.Model):
+    """
+    Precomputed attendance counts for one player across the registers of a
+    group time taken by one coach in a teaching period.
+
+    Maintained in the same transaction as register writes so attendance
+    statistics can be summed from these rows instead of scanning entries.
+    """
+    __tablename__ = 'attendance_rollup'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id', ondelete='CASCADE'), nullable=False)
+    group_time_id = db.Column(db.Integer, db.ForeignKey('tennis_group_times.id', ondelete='CASCADE'), nullable=False)
+    coach_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Coach who took the registers
+    programme_player_id = db.Column(db.Integer, db.ForeignKey('programme_players.id', ondelete='CASCADE'), nullable=False)
+
+    # Status counts
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    present_count = db.Column(db.Integer, nullable=False, default=0)
+    absent_count = db.Column(db.Integer, nullable=False, default=0)
+    sick_count = db.Column(db.Integer, nullable=False, default=0)
+    away_with_notice_count = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))
+
+    # Indexes for performance
+    __table_args__ = (
+        # One rollup row per player per group time, coach and period
+        Index('idx_attendance_rollup_unique', teaching_period_id, group_time_id, coach_id, programme_player_id, unique=True),
+        Index('idx_attendance_rollup_club_period', tennis_club_id, teaching_period_id),
+        Index('idx_attendance_rollup_player', programme_player_id),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceRollup player_id={self.programme_player_id} group_time_id={self.group_time_id} total={self.total_count}>'
@@ -1,4 +1,5 @@
 from sqlalchemy import text, Index, Boolean
+from sqlalchemy.dialects.postgresql import JSONB
 from app.extensions import db
 from datetime import datetime, timezone
 
@@ -178,4 +179,99 @@ class DocumentDownloadLog(db.Model):
         Index('idx_download_log_document', document_id),
         Index('idx_download_log_user', downloaded_by_id),
         Index('idx_download_log_date', downloaded_at),
-    )
\ No newline at end of file
+    )
+
+
+class NotificationOutbox(db.Model):
+    """Model for queued notification emails, delivered by the outbox worker"""
+    __tablename__ = 'notification_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=True)
+    notification_type = db.Column(db.String(50), nullable=False)  # e.g. absence_notification
+    dedupe_key = db.Column(db.String(255), nullable=False)  # Identifies the notification so it is only queued once
+    payload = db.Column(JSONB, nullable=False)  # IDs the handler needs to build the email
+    
+    # Delivery state
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent, skipped, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=text('CURRENT_TIMESTAMP'))
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime(timezone=True))
+    
+    created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    
+    # Indexes for the worker's polling query
+    __table_args__ = (
+        db.UniqueConstraint('dedupe_key', name='unique_notification_outbox_dedupe_key'),
+        Index('idx_notification_outbox_due', status, next_attempt_at),
+    )
+    
+    def __repr__(self):
+        return f'<NotificationOutbox {self.notification_type} {self.dedupe_key} ({self.status})>'
+
+
+class BulkEmailJob(db.Model):
+    """Model for a queued bulk report email send, run by the worker process"""
+    __tablename__ = 'bulk_email_job'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id', ondelete='CASCADE'), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('tennis_group.id', ondelete='CASCADE'), nullable=True)  # Optional group filter
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    
+    # Email content, with the same {placeholders} as single sends
+    subject = db.Column(db.String(255))
+    message = db.Column(db.Text)
+    
+    # Progress
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    skipped_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    error_details = db.Column(JSONB, default=[])  # [{report_id, student_name, status, error}]
+    last_error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))  # Heartbeat while running
+    
+    # Relationships
+    tennis_club = db.relationship('TennisClub')
+    teaching_period = db.relationship('TeachingPeriod')
+    tennis_group = db.relationship('TennisGroup')
+    created_by = db.relationship('User')
+    
+    __table_args__ = (
+        Index('idx_bulk_email_job_status', status, created_at),
+        Index('idx_bulk_email_job_club_period', tennis_club_id, teaching_period_id),
+    )
+    
+    @property
+    def processed_count(self):
+        return self.sent_count + self.skipped_count + self.failed_count
+    
+    def to_dict(self):
+        """Convert to dictionary for the progress endpoint"""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'teaching_period_id': self.teaching_period_id,
+            'group_id': self.group_id,
+            'total': self.total_count,
+            'processed': self.processed_count,
+            'sent': self.sent_count,
+            'skipped': self.skipped_count,
+            'failed': self.failed_count,
+            'error_details': self.error_details or [],
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<BulkEmailJob {self.id} period={self.teaching_period_id} ({self.status})>'
@@ -0,0 +1,123 @@
+# app/models/player_upload.py
+
+from datetime import datetime, timezone
+from sqlalchemy import text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from app.extensions import db
+
+# Warnings and errors sent with each progress poll while a job is running
+PROGRESS_MESSAGE_LIMIT = 50
+
+class PlayerUpload(db.Model):
+    """
+    A validated bulk player CSV, parsed once and staged row by row, and the
+    background job that imports it.
+
+    Created by the validation step ('validated'); starting it queues it for
+    the worker ('pending'), which imports the staged rows in batches and
+    records progress here for the polling endpoint.
+    """
+    __tablename__ = 'player_upload'
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(36), nullable=False, unique=True)  # Validation token handed to the client
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id', ondelete='CASCADE'), nullable=False)
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255))
+    file_size = db.Column(db.Integer)
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Progress
+    status = db.Column(db.String(20), nullable=False, default='validated', server_default='validated')  # validated, pending, running, completed, failed
+    processed_rows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    students_created = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    students_updated = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    players_created = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    players_updated = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    warnings = db.Column(JSONB, default=[])
+    errors = db.Column(JSONB, default=[])
+    last_error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))  # Heartbeat while running
+
+    # Relationships
+    tennis_club = db.relationship('TennisClub')
+    teaching_period = db.relationship('TeachingPeriod')
+    created_by = db.relationship('User')
+    rows = db.relationship('PlayerUploadRow', back_populates='upload', cascade='all, delete-orphan', passive_deletes=True, lazy='dynamic')
+
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_player_upload_created', created_at),
+        Index('idx_player_upload_status', status, created_at),
+    )
+
+    def to_dict(self):
+        """
+        Convert to dictionary for the progress endpoint.
+
+        While the job is running only the last PROGRESS_MESSAGE_LIMIT warnings
+        and errors are included, with the totals alongside; the full lists
+        are sent once it has completed or failed.
+        """
+        finished = self.status in ('completed', 'failed')
+        warnings = self.warnings or []
+        errors = self.errors or []
+        elapsed_time = None
+        if self.started_at:
+            end_time = self.finished_at or datetime.now(timezone.utc)
+            elapsed_time = round((end_time - self.started_at).total_seconds())
+
+        return {
+            'id': self.id,
+            'token': self.token,
+            'status': self.status,
+            'filename': self.filename,
+            'processed_rows': self.processed_rows,
+            'total_rows': self.total_rows,
+            'students_created': self.students_created,
+            'students_updated': self.students_updated,
+            'players_created': self.players_created,
+            'players_updated': self.players_updated,
+            'progress_percentage': 100 if finished else int(self.processed_rows * 100 / self.total_rows) if self.total_rows else 0,
+            'warnings': warnings if finished else warnings[-PROGRESS_MESSAGE_LIMIT:],
+            'errors': errors if finished else errors[-PROGRESS_MESSAGE_LIMIT:],
+            'total_warnings': len(warnings),
+            'total_errors': len(errors),
+            'last_error': self.last_error,
+            'has_more': not finished,
+            'elapsed_time': elapsed_time,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<PlayerUpload {self.token} rows={self.total_rows}>'
+
+
+class PlayerUploadRow(db.Model):
+    """
+    One cleaned CSV row of a staged upload, with its coach and group resolved.
+
+    `data` holds the stripped cell values by column name (None for blanks).
+    coach_id and group_id are None when the row's coach email or group name
+    did not match, leaving processing to report the error.
+    """
+    __tablename__ = 'player_upload_row'
+
+    upload_id = db.Column(db.Integer, db.ForeignKey('player_upload.id', ondelete='CASCADE'), primary_key=True)
+    row_index = db.Column(db.Integer, primary_key=True)  # 0-based position in the CSV, excluding the header
+    data = db.Column(JSONB, nullable=False)
+    coach_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    group_id = db.Column(db.Integer, db.ForeignKey('tennis_group.id', ondelete='SET NULL'))
+
+    # Relationships
+    upload = db.relationship('PlayerUpload', back_populates='rows')
+
+    def __repr__(self):
+        return f'<PlayerUploadRow upload_id={self.upload_id} row_index={self.row_index}>'
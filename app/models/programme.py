@@ -1,8 +1,9 @@
-from sqlalchemy import text, Index
+from sqlalchemy import text, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from app.extensions import db
 from datetime import datetime, timezone
 from app.models.base import DayOfWeek, FieldType
+from app.models.report_email_attempt import ReportEmailAttempt
 
 class TennisGroup(db.Model):
     __tablename__ = 'tennis_group'
@@ -103,7 +104,6 @@ class Report(db.Model):
     email_sent = db.Column(db.Boolean, default=False)
     email_sent_at = db.Column(db.DateTime(timezone=True))
     email_recipients = db.Column(JSONB)
-    email_history = db.Column(JSONB, default=[])
     last_email_status = db.Column(db.String(255))
     email_message_id = db.Column(db.String(100)) 
     email_attempts = db.Column(db.Integer, default=0)
@@ -117,6 +117,13 @@ class Report(db.Model):
     teaching_period = db.relationship('TeachingPeriod', back_populates='reports')
     programme_player = db.relationship('ProgrammePlayers', back_populates='reports')
     template = db.relationship('ReportTemplate', back_populates='reports')
+    email_attempt_log = db.relationship(
+        'ReportEmailAttempt',
+        back_populates='report',
+        lazy='dynamic',
+        passive_deletes=True,
+        order_by='ReportEmailAttempt.created_at'
+    )
 
     def can_send_email(self, is_bulk_send=False) -> tuple[bool, str]:
         """
@@ -142,29 +149,28 @@ class Report(db.Model):
             return 'submitted'
 
     def record_email_attempt(self, status: str, recipients: list, subject: str, 
-                           message_id: str = None, error: str = None):
-        """Record a detailed email attempt"""
-        if self.email_history is None:
-            self.email_history = []
-            
-        attempt = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'status': status,
-            'recipients': recipients,
-            'subject': subject,
-            'message_id': message_id,
-            'error': error
-        }
+                           message_id: str = None, error: str = None, commit: bool = True):
+        """
+        Record a detailed email attempt
         
-        # Initialize email_attempts if it's None
-        if self.email_attempts is None:
-            self.email_attempts = 0
-            
-        # Increment attempts counter for all cases
-        self.email_attempts += 1
+        The attempt is appended to the report_email_attempt log and the
+        email_* columns are updated as a summary of the latest outcome.
+        
+        Args:
+            commit (bool): If False, leave the attempt in the session so a
+                caller can insert a batch of attempts in one transaction
+        """
+        db.session.add(ReportEmailAttempt(
+            report_id=self.id,
+            status=status,
+            recipients=recipients,
+            subject=subject[:255] if subject else subject,
+            message_id=message_id,
+            error=error
+        ))
         
-        # Add to history
-        self.email_history.append(attempt)
+        # Increment attempts counter for all cases, in SQL so concurrent attempts aren't lost
+        self.email_attempts = func.coalesce(Report.email_attempts, 0) + 1
         
         # Update status based on result
         if status == 'success':
@@ -179,7 +185,8 @@ class Report(db.Model):
             self.last_email_status = f'Failed: {error}'
         
         db.session.add(self)
-        db.session.commit()
+        if commit:
+            db.session.commit()
 
     def is_student_under_18(self):
         """Check if the student is under 18"""
@@ -205,6 +212,7 @@ class ReportTemplate(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
     created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped when sections or fields change
     
     # Relationships
     organisation = db.relationship('Organisation', back_populates='report_templates')
@@ -29,6 +29,8 @@ class Register(db.Model):
         Index('idx_register_date_coach', date, coach_id),
         Index('idx_register_group_time', group_time_id, date),
         Index('idx_register_teaching_period', teaching_period_id),
+        # Keyset pagination of a club's register history
+        Index('idx_register_club_date_id', tennis_club_id, date, id),
     )
     
     @property
@@ -0,0 +1,44 @@
+# app/models/report_email_attempt.py
+
+from sqlalchemy import text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from app.extensions import db
+
+class ReportEmailAttempt(db.Model):
+    """
+    One attempt to email a report, successful or not.
+
+    Append-only log written by Report.record_email_attempt; the email_*
+    columns on the report summarise the latest outcome.
+    """
+    __tablename__ = 'report_email_attempt'
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('report.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # success, skipped, failed
+    recipients = db.Column(JSONB)
+    subject = db.Column(db.String(255))
+    message_id = db.Column(db.String(100))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=text('CURRENT_TIMESTAMP'))
+
+    # Relationships
+    report = db.relationship('Report', back_populates='email_attempt_log')
+
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_report_email_attempt_report_created', report_id, created_at),
+    )
+
+    def to_dict(self):
+        return {
+            'timestamp': self.created_at.isoformat() if self.created_at else None,
+            'status': self.status,
+            'recipients': self.recipients,
+            'subject': self.subject,
+            'message_id': self.message_id,
+            'error': self.error
+        }
+
+    def __repr__(self):
+        return f'<ReportEmailAttempt report_id={self.report_id} {self.status}>'
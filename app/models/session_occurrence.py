@@ -0,0 +1,43 @@
+# app/models/session_occurrence.py
+
+from sqlalchemy import text, Index
+from app.extensions import db
+
+class SessionOccurrence(db.Model):
+    """
+    One concrete session of a group time within a teaching period.
+
+    Rows are generated from TennisGroupTimes and the TeachingPeriod date range
+    and carry links to the session's register, session plan and cancellation
+    status so scheduling views can read a single indexed date range.
+    """
+    __tablename__ = 'session_occurrence'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id', ondelete='CASCADE'), nullable=False)
+    group_time_id = db.Column(db.Integer, db.ForeignKey('tennis_group_times.id', ondelete='CASCADE'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+
+    # Links to the session's register and plan (if created)
+    register_id = db.Column(db.Integer, db.ForeignKey('register.id', ondelete='SET NULL'), nullable=True)
+    session_plan_id = db.Column(db.Integer, db.ForeignKey('session_plan.id', ondelete='SET NULL'), nullable=True)
+
+    # Cancellation status
+    is_cancelled = db.Column(db.Boolean, nullable=False, default=False, server_default=text('false'))
+    cancellation_reason = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    updated_at = db.Column(db.DateTime(timezone=True), onupdate=text('CURRENT_TIMESTAMP'))
+
+    # Indexes for performance
+    __table_args__ = (
+        # Ensure one occurrence per group time per date per period
+        Index('idx_session_occurrence_unique', teaching_period_id, group_time_id, date, unique=True),
+        Index('idx_session_occurrence_period_date', teaching_period_id, date),
+        Index('idx_session_occurrence_club_date', tennis_club_id, date),
+        Index('idx_session_occurrence_register', register_id),
+    )
+
+    def __repr__(self):
+        return f'<SessionOccurrence id={self.id} group_time_id={self.group_time_id} date={self.date}>'
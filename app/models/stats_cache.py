@@ -0,0 +1,40 @@
+# app/models/stats_cache.py
+
+from sqlalchemy import text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from app.extensions import db
+
+class StatsCacheVersion(db.Model):
+    """
+    Per-club version counter for cached statistics.
+
+    Bumped in the same transaction as any write that affects a club's
+    statistics; cached entries computed against an older version are stale.
+    """
+    __tablename__ = 'stats_cache_version'
+
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'), onupdate=text('CURRENT_TIMESTAMP'))
+
+    def __repr__(self):
+        return f'<StatsCacheVersion club_id={self.tennis_club_id} version={self.version}>'
+
+
+class StatsCacheEntry(db.Model):
+    """Computed statistics payload, valid while its version matches the club's"""
+    __tablename__ = 'stats_cache_entry'
+
+    cache_key = db.Column(db.String(255), primary_key=True)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id', ondelete='CASCADE'), nullable=False)
+    version = db.Column(db.BigInteger, nullable=False)
+    payload = db.Column(JSONB, nullable=False)
+    computed_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_stats_cache_entry_club', tennis_club_id),
+    )
+
+    def __repr__(self):
+        return f'<StatsCacheEntry {self.cache_key} version={self.version}>'
@@ -1,16 +1,18 @@
 # Add this to app/routes/cancellations.py (new file)
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g, has_app_context
 from flask_login import login_required, current_user
 from app.models import (
     Cancellation, CancellationType, TennisGroupTimes, TeachingPeriod, 
-    TennisGroup, DayOfWeek, Register
+    TennisGroup, Register, SessionOccurrence
 )
 from app import db
 from app.clubs.middleware import verify_club_access
 from app.utils.auth import admin_required
+from app.services.session_occurrence_service import ensure_period_occurrences, refresh_occurrence_cancellations
 from datetime import datetime, date, timedelta
 import traceback
+from bisect import bisect_right
 from sqlalchemy import and_, or_
 
 # API routes for cancellations
@@ -166,7 +168,9 @@ def create_cancellation():
                 return jsonify({'error': 'week_end_date must be after week_start_date'}), 400
         
         db.session.add(cancellation)
+        refresh_occurrence_cancellations(current_user.tennis_club_id)
         db.session.commit()
+        invalidate_cancellation_index(current_user.tennis_club_id)
         
         return jsonify({
             'message': 'Cancellation created successfully',
@@ -216,7 +220,9 @@ def update_cancellation(cancellation_id):
         if 'recurring_end_date' in data:
             cancellation.recurring_end_date = datetime.strptime(data['recurring_end_date'], '%Y-%m-%d').date()
         
+        refresh_occurrence_cancellations(current_user.tennis_club_id)
         db.session.commit()
+        invalidate_cancellation_index(current_user.tennis_club_id)
         
         return jsonify({
             'message': 'Cancellation updated successfully',
@@ -243,7 +249,9 @@ def delete_cancellation(cancellation_id):
         
         # Instead of deleting, just deactivate
         cancellation.is_active = False
+        refresh_occurrence_cancellations(current_user.tennis_club_id)
         db.session.commit()
+        invalidate_cancellation_index(current_user.tennis_club_id)
         
         return jsonify({
             'message': 'Cancellation deactivated successfully',
@@ -258,6 +266,104 @@ def delete_cancellation(cancellation_id):
 
 # Business Logic Functions
 
+class CancellationIndex:
+    """
+    In-memory lookup of a club's active cancellations.
+    
+    Session cancellations are keyed by (group_time_id, date), day cancellations
+    by date, and week cancellations are flattened into sorted, non-overlapping
+    date intervals so each lookup is a dict hit or a binary search.
+    """
+    
+    def __init__(self, cancellations):
+        self._sessions = {}
+        self._days = {}
+        weeks = []
+        
+        # Earlier cancellations win when several cover the same session
+        for cancellation in sorted(cancellations, key=lambda c: c.id):
+            if not cancellation.is_active:
+                continue
+            
+            if cancellation.cancellation_type == CancellationType.SESSION:
+                if cancellation.group_time_id and cancellation.specific_date:
+                    self._sessions.setdefault(
+                        (cancellation.group_time_id, cancellation.specific_date),
+                        cancellation.reason
+                    )
+            elif cancellation.cancellation_type == CancellationType.DAY:
+                if cancellation.specific_date:
+                    self._days.setdefault(cancellation.specific_date, cancellation.reason)
+            elif cancellation.cancellation_type == CancellationType.WEEK:
+                if cancellation.week_start_date and cancellation.week_end_date:
+                    weeks.append((cancellation.week_start_date, cancellation.week_end_date, cancellation.reason))
+        
+        self._week_starts = []
+        self._week_ends = []
+        self._week_reasons = []
+        
+        # Keep only the uncovered tail of each range so intervals never overlap
+        for week_start, week_end, reason in sorted(weeks, key=lambda week: week[0]):
+            if self._week_ends and week_start <= self._week_ends[-1]:
+                week_start = self._week_ends[-1] + timedelta(days=1)
+            if week_start > week_end:
+                continue
+            self._week_starts.append(week_start)
+            self._week_ends.append(week_end)
+            self._week_reasons.append(reason)
+    
+    def lookup(self, group_time_id, session_date):
+        """
+        Check whether a session is cancelled.
+        
+        Args:
+            group_time_id: ID of the group time slot
+            session_date: Date of the session (date object)
+            
+        Returns:
+            tuple: (is_cancelled: bool, cancellation_reason: str or None)
+        """
+        reason = self._sessions.get((group_time_id, session_date))
+        if reason is not None:
+            return True, reason
+        
+        reason = self._days.get(session_date)
+        if reason is not None:
+            return True, reason
+        
+        position = bisect_right(self._week_starts, session_date) - 1
+        if position >= 0 and session_date <= self._week_ends[position]:
+            return True, self._week_reasons[position]
+        
+        return False, None
+
+def get_cancellation_index(tennis_club_id):
+    """
+    Get the cancellation index for a club, building it at most once per request.
+    
+    Args:
+        tennis_club_id: ID of the tennis club
+        
+    Returns:
+        CancellationIndex: Index of the club's active cancellations
+    """
+    cache = g.setdefault('cancellation_indexes', {}) if has_app_context() else {}
+    
+    index = cache.get(tennis_club_id)
+    if index is None:
+        index = CancellationIndex(Cancellation.query.filter_by(
+            tennis_club_id=tennis_club_id,
+            is_active=True
+        ).all())
+        cache[tennis_club_id] = index
+        
+    return index
+
+def invalidate_cancellation_index(tennis_club_id):
+    """Drop the cached cancellation index for a club after its cancellations change"""
+    if has_app_context():
+        g.setdefault('cancellation_indexes', {}).pop(tennis_club_id, None)
+
 def is_session_cancelled(group_time_id, session_date, tennis_club_id):
     """
     Check if a specific session is cancelled by any active cancellation.
@@ -271,18 +377,7 @@ def is_session_cancelled(group_time_id, session_date, tennis_club_id):
         tuple: (is_cancelled: bool, cancellation_reason: str or None)
     """
     try:
-        # Get all active cancellations for this club
-        cancellations = Cancellation.query.filter_by(
-            tennis_club_id=tennis_club_id,
-            is_active=True
-        ).all()
-        
-        # Check each cancellation to see if it affects this session
-        for cancellation in cancellations:
-            if cancellation.is_session_cancelled(group_time_id, session_date):
-                return True, cancellation.reason
-                
-        return False, None
+        return get_cancellation_index(tennis_club_id).lookup(group_time_id, session_date)
         
     except Exception as e:
         current_app.logger.error(f"Error checking session cancellation: {str(e)}")
@@ -302,55 +397,60 @@ def get_cancelled_sessions_in_range(start_date, end_date, tennis_club_id, teachi
         list: List of cancelled session info dicts
     """
     try:
-        cancelled_sessions = []
+        # Make sure every period overlapping the range has its sessions generated
+        periods_query = db.session.query(TeachingPeriod.id).filter(
+            TeachingPeriod.tennis_club_id == tennis_club_id,
+            TeachingPeriod.start_date <= end_date,
+            TeachingPeriod.end_date >= start_date
+        )
+        if teaching_period_id:
+            periods_query = periods_query.filter(TeachingPeriod.id == teaching_period_id)
+        
+        for (period_id,) in periods_query.all():
+            ensure_period_occurrences(tennis_club_id, period_id)
+        
+        query = db.session.query(
+            SessionOccurrence.date,
+            SessionOccurrence.group_time_id,
+            SessionOccurrence.cancellation_reason,
+            TennisGroupTimes.start_time,
+            TennisGroupTimes.end_time,
+            TennisGroup.name.label('group_name')
+        ).join(
+            TennisGroupTimes, SessionOccurrence.group_time_id == TennisGroupTimes.id
+        ).join(
+            TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
+        ).filter(
+            SessionOccurrence.tennis_club_id == tennis_club_id,
+            SessionOccurrence.is_cancelled == True,
+            SessionOccurrence.date >= start_date,
+            SessionOccurrence.date <= end_date
+        )
         
-        # Get all group times for the club
-        group_times_query = TennisGroupTimes.query.filter_by(tennis_club_id=tennis_club_id)
         if teaching_period_id:
-            # Join with programme players to ensure we only get active group times
+            # Only include group times with players in this period
             from app.models import ProgrammePlayers
-            group_times_query = group_times_query.join(
-                ProgrammePlayers, TennisGroupTimes.id == ProgrammePlayers.group_time_id
-            ).filter(ProgrammePlayers.teaching_period_id == teaching_period_id).distinct()
-        
-        group_times = group_times_query.all()
-        
-        # Map day names to Python weekday numbers
-        day_mapping = {
-            DayOfWeek.MONDAY: 0,
-            DayOfWeek.TUESDAY: 1,
-            DayOfWeek.WEDNESDAY: 2,
-            DayOfWeek.THURSDAY: 3,
-            DayOfWeek.FRIDAY: 4,
-            DayOfWeek.SATURDAY: 5,
-            DayOfWeek.SUNDAY: 6
-        }
-        
-        # Check each date in range
-        current_date = start_date
-        while current_date <= end_date:
-            current_weekday = current_date.weekday()
-            
-            # Check each group time that falls on this day
-            for group_time in group_times:
-                if day_mapping.get(group_time.day_of_week) == current_weekday:
-                    is_cancelled, reason = is_session_cancelled(
-                        group_time.id, 
-                        current_date, 
-                        tennis_club_id
-                    )
-                    
-                    if is_cancelled:
-                        cancelled_sessions.append({
-                            'date': current_date.isoformat(),
-                            'group_time_id': group_time.id,
-                            'group_name': group_time.tennis_group.name,
-                            'start_time': group_time.start_time.strftime('%H:%M'),
-                            'end_time': group_time.end_time.strftime('%H:%M'),
-                            'reason': reason
-                        })
-            
-            current_date += timedelta(days=1)
+            active_group_time_ids = db.session.query(ProgrammePlayers.group_time_id).filter(
+                ProgrammePlayers.teaching_period_id == teaching_period_id
+            )
+            query = query.filter(
+                SessionOccurrence.teaching_period_id == teaching_period_id,
+                SessionOccurrence.group_time_id.in_(active_group_time_ids)
+            )
+        
+        # Periods can overlap, so collapse to one entry per session
+        query = query.distinct(
+            SessionOccurrence.date, SessionOccurrence.group_time_id
+        ).order_by(SessionOccurrence.date, SessionOccurrence.group_time_id)
+        
+        cancelled_sessions = [{
+            'date': occurrence.date.isoformat(),
+            'group_time_id': occurrence.group_time_id,
+            'group_name': occurrence.group_name,
+            'start_time': occurrence.start_time.strftime('%H:%M'),
+            'end_time': occurrence.end_time.strftime('%H:%M'),
+            'reason': occurrence.cancellation_reason
+        } for occurrence in query.all()]
         
         return cancelled_sessions
         
@@ -526,7 +626,9 @@ def deactivate_cancellation():
             cancellation.is_active = False
             deactivated_count += 1
         
+        refresh_occurrence_cancellations(current_user.tennis_club_id)
         db.session.commit()
+        invalidate_cancellation_index(current_user.tennis_club_id)
         
         return jsonify({
             'message': f'Successfully reinstated {deactivated_count} cancellation(s)',
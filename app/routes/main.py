@@ -1,5 +1,4 @@
 from io import BytesIO
-import os
 from flask import Blueprint, render_template, request, redirect, send_file, url_for, flash, session, current_app, jsonify
 from flask_login import login_required, current_user
 import pandas as pd
@@ -10,8 +9,12 @@ from app.models import (
 from app import db
 from app.clubs.middleware import verify_club_access
 from sqlalchemy import func, and_, or_, distinct, case
+from sqlalchemy.orm import aliased
 from app.utils.auth import admin_required, club_access_required
 import traceback
+from app.services.stats_cache_service import get_cached_stats
+from app.services.report_pdf_cache_service import get_report_pdf, report_pdf_cache_key
+from app.utils.report_generator import serialize_report
 
 main = Blueprint('main', __name__)
 
@@ -108,99 +111,71 @@ def current_user_options():
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Cookie'
     return response
 
-@main.route('/api/dashboard/stats')
-@login_required
-@verify_club_access()
-def dashboard_stats():
-    try:
-        tennis_club_id = current_user.tennis_club_id
-        selected_period_id = request.args.get('period', type=int)
-        
-        # Get all teaching periods ordered by start date (newest first)
-        all_periods = TeachingPeriod.query.filter_by(
-            tennis_club_id=tennis_club_id
-        ).order_by(TeachingPeriod.start_date.desc()).all()
-        
-        # Get period IDs that have players
-        period_ids_with_players = (db.session.query(ProgrammePlayers.teaching_period_id)
-            .filter(ProgrammePlayers.tennis_club_id == tennis_club_id)
-            .distinct()
-            .all())
-        period_ids = [p[0] for p in period_ids_with_players]
-        
-        # Find the default period (latest with players)
-        default_period_id = None
-        if period_ids:
-            default_period = TeachingPeriod.query.filter(
-                TeachingPeriod.id.in_(period_ids),
-                TeachingPeriod.tennis_club_id == tennis_club_id
-            ).order_by(TeachingPeriod.start_date.desc()).first()
-            
-            if default_period:
-                default_period_id = default_period.id
-        
-        # If no period is selected, use the default
-        if not selected_period_id and default_period_id:
-            selected_period_id = default_period_id
-
-        # Base query for students
-        base_query = (ProgrammePlayers.query
-            .select_from(ProgrammePlayers)
-            .join(TennisGroup, ProgrammePlayers.group_id == TennisGroup.id)
-            .join(GroupTemplate, and_(
-                TennisGroup.id == GroupTemplate.group_id,
-                GroupTemplate.is_active == True
-            ))
-            .join(ReportTemplate, and_(
-                ReportTemplate.id == GroupTemplate.template_id,
-                ReportTemplate.is_active == True
-            ))
-            .filter(ProgrammePlayers.tennis_club_id == tennis_club_id))
+def build_dashboard_stats(tennis_club_id, selected_period_id):
+    """
+    Compute the dashboard payload for the current user.
+    
+    Args:
+        tennis_club_id: ID of the tennis club
+        selected_period_id: Selected teaching period (None for the latest period with players)
+        
+    Returns:
+        dict: Periods, totals, group stats, coach summaries and recommendations
+    """
+    # Get all teaching periods ordered by start date (newest first)
+    all_periods = TeachingPeriod.query.filter_by(
+        tennis_club_id=tennis_club_id
+    ).order_by(TeachingPeriod.start_date.desc()).all()
+    
+    # Get period IDs that have players
+    period_ids_with_players = (db.session.query(ProgrammePlayers.teaching_period_id)
+        .filter(ProgrammePlayers.tennis_club_id == tennis_club_id)
+        .distinct()
+        .all())
+    period_ids = [p[0] for p in period_ids_with_players]
+    
+    # Find the default period (latest with players)
+    default_period_id = None
+    if period_ids:
+        default_period = TeachingPeriod.query.filter(
+            TeachingPeriod.id.in_(period_ids),
+            TeachingPeriod.tennis_club_id == tennis_club_id
+        ).order_by(TeachingPeriod.start_date.desc()).first()
+        
+        if default_period:
+            default_period_id = default_period.id
+    
+    # If no period is selected, use the default
+    if not selected_period_id and default_period_id:
+        selected_period_id = default_period_id
 
-        if not (current_user.is_admin or current_user.is_super_admin):
-            base_query = base_query.filter(ProgrammePlayers.coach_id == current_user.id)
-            
-        if selected_period_id:
-            base_query = base_query.filter(ProgrammePlayers.teaching_period_id == selected_period_id)
-            
-        total_students = base_query.count()
-        
-        # Get reports query for all reports (both draft and final)
-        reports_query = (Report.query
-            .select_from(Report)
-            .join(ProgrammePlayers)
-            .join(TennisGroup, ProgrammePlayers.group_id == TennisGroup.id)
-            .join(GroupTemplate, and_(
-                TennisGroup.id == GroupTemplate.group_id,
-                GroupTemplate.is_active == True
-            ))
-            .join(ReportTemplate, and_(
-                ReportTemplate.id == GroupTemplate.template_id,
-                ReportTemplate.is_active == True
-            ))
-            .filter(ProgrammePlayers.tennis_club_id == tennis_club_id))
+    # Base query for students
+    base_query = (ProgrammePlayers.query
+        .select_from(ProgrammePlayers)
+        .join(TennisGroup, ProgrammePlayers.group_id == TennisGroup.id)
+        .join(GroupTemplate, and_(
+            TennisGroup.id == GroupTemplate.group_id,
+            GroupTemplate.is_active == True
+        ))
+        .join(ReportTemplate, and_(
+            ReportTemplate.id == GroupTemplate.template_id,
+            ReportTemplate.is_active == True
+        ))
+        .filter(ProgrammePlayers.tennis_club_id == tennis_club_id))
 
-        if not (current_user.is_admin or current_user.is_super_admin):
-            reports_query = reports_query.filter(ProgrammePlayers.coach_id == current_user.id)
-            
-        if selected_period_id:
-            reports_query = reports_query.filter(Report.teaching_period_id == selected_period_id)
-            
-        # Count both submitted and draft reports
-        total_reports = reports_query.count()
-        submitted_reports = reports_query.filter(Report.is_draft == False).count()
-        draft_reports = reports_query.filter(Report.is_draft == True).count()
-        
-        completion_rate = round((submitted_reports / total_students * 100) if total_students > 0 else 0, 1)
-        
-        # Get group stats including draft status
-        group_stats_query = (db.session.query(
-            TennisGroup.name,
-            func.count(distinct(ProgrammePlayers.id)).label('count'),
-            func.sum(case((Report.is_draft == False, 1), else_=0)).label('reports_completed'),
-            func.sum(case((Report.is_draft == True, 1), else_=0)).label('reports_draft')
-        )
-        .select_from(TennisGroup)
+    if not (current_user.is_admin or current_user.is_super_admin):
+        base_query = base_query.filter(ProgrammePlayers.coach_id == current_user.id)
+        
+    if selected_period_id:
+        base_query = base_query.filter(ProgrammePlayers.teaching_period_id == selected_period_id)
+        
+    total_students = base_query.count()
+    
+    # Get reports query for all reports (both draft and final)
+    reports_query = (Report.query
+        .select_from(Report)
+        .join(ProgrammePlayers)
+        .join(TennisGroup, ProgrammePlayers.group_id == TennisGroup.id)
         .join(GroupTemplate, and_(
             TennisGroup.id == GroupTemplate.group_id,
             GroupTemplate.is_active == True
@@ -209,79 +184,74 @@ def dashboard_stats():
             ReportTemplate.id == GroupTemplate.template_id,
             ReportTemplate.is_active == True
         ))
-        .join(ProgrammePlayers, TennisGroup.id == ProgrammePlayers.group_id)
-        .outerjoin(Report, ProgrammePlayers.id == Report.programme_player_id)
         .filter(ProgrammePlayers.tennis_club_id == tennis_club_id))
+
+    if not (current_user.is_admin or current_user.is_super_admin):
+        reports_query = reports_query.filter(ProgrammePlayers.coach_id == current_user.id)
         
-        if selected_period_id:
-            group_stats_query = group_stats_query.filter(
-                ProgrammePlayers.teaching_period_id == selected_period_id
-            )
-            
-        if not (current_user.is_admin or current_user.is_super_admin):
-            group_stats_query = group_stats_query.filter(
-                ProgrammePlayers.coach_id == current_user.id
-            )
-            
-        group_stats = group_stats_query.group_by(TennisGroup.name).all()
+    if selected_period_id:
+        reports_query = reports_query.filter(Report.teaching_period_id == selected_period_id)
         
-        # Get coach summaries only for admin users - UPDATED: Organization-wide coaches
-        coach_summaries = None
-        if current_user.is_admin or current_user.is_super_admin:
-            coach_summaries = []
-            
-            # CHANGED: Get coaches from entire organization (not just current club)
-            organisation_id = current_user.tennis_club.organisation_id
-            coaches = db.session.query(User).join(TennisClub).filter(
-                TennisClub.organisation_id == organisation_id,
-                User.is_active == True
-            ).all()
+    # Count both submitted and draft reports
+    total_reports = reports_query.count()
+    submitted_reports = reports_query.filter(Report.is_draft == False).count()
+    draft_reports = reports_query.filter(Report.is_draft == True).count()
+    
+    completion_rate = round((submitted_reports / total_students * 100) if total_students > 0 else 0, 1)
+    
+    # Get group stats including draft status
+    group_stats_query = (db.session.query(
+        TennisGroup.name,
+        func.count(distinct(ProgrammePlayers.id)).label('count'),
+        func.sum(case((Report.is_draft == False, 1), else_=0)).label('reports_completed'),
+        func.sum(case((Report.is_draft == True, 1), else_=0)).label('reports_draft')
+    )
+    .select_from(TennisGroup)
+    .join(GroupTemplate, and_(
+        TennisGroup.id == GroupTemplate.group_id,
+        GroupTemplate.is_active == True
+    ))
+    .join(ReportTemplate, and_(
+        ReportTemplate.id == GroupTemplate.template_id,
+        ReportTemplate.is_active == True
+    ))
+    .join(ProgrammePlayers, TennisGroup.id == ProgrammePlayers.group_id)
+    .outerjoin(Report, ProgrammePlayers.id == Report.programme_player_id)
+    .filter(ProgrammePlayers.tennis_club_id == tennis_club_id))
+    
+    if selected_period_id:
+        group_stats_query = group_stats_query.filter(
+            ProgrammePlayers.teaching_period_id == selected_period_id
+        )
+        
+    if not (current_user.is_admin or current_user.is_super_admin):
+        group_stats_query = group_stats_query.filter(
+            ProgrammePlayers.coach_id == current_user.id
+        )
+        
+    group_stats = group_stats_query.group_by(TennisGroup.name).all()
+    
+    # Get coach summaries only for admin users - UPDATED: Organization-wide coaches
+    coach_summaries = None
+    if current_user.is_admin or current_user.is_super_admin:
+        coach_summaries = []
+        
+        # CHANGED: Get coaches from entire organization (not just current club)
+        organisation_id = current_user.tennis_club.organisation_id
+        
+        # One grouped aggregate over this club's players and their reports
+        report_join = ProgrammePlayers.id == Report.programme_player_id
+        if selected_period_id:
+            report_join = and_(report_join, Report.teaching_period_id == selected_period_id)
             
-            for coach in coaches:
-                # Create fresh queries for each coach
-                coach_players = base_query.filter(ProgrammePlayers.coach_id == coach.id).count()
-                
-                # Skip coaches with no assigned players/reports IN THIS CLUB
-                if coach_players == 0:
-                    continue
-                    
-                coach_draft_reports = reports_query.filter(
-                    ProgrammePlayers.coach_id == coach.id,
-                    Report.is_draft == True
-                ).count()
-                
-                coach_submitted_reports = reports_query.filter(
-                    ProgrammePlayers.coach_id == coach.id,
-                    Report.is_draft == False
-                ).count()
-                
-                coach_summaries.append({
-                    'id': coach.id,
-                    'name': coach.name,
-                    'club_name': coach.tennis_club.name,  # ADDED: Show which club the coach belongs to
-                    'is_external': coach.tennis_club_id != tennis_club_id,  # ADDED: Flag for external coaches
-                    'total_assigned': coach_players,
-                    'reports_completed': coach_submitted_reports,
-                    'reports_draft': coach_draft_reports
-                })
-                
-            # Sort coaches by name
-            coach_summaries = sorted(coach_summaries, key=lambda x: x['name'])
-
-        # Get group recommendations WITH SESSION INFO (only consider finalised reports)
-        recommendations_query = (db.session.query(
-            TennisGroup.name.label('from_group'),
-            func.count().label('count'),
-            Report.recommended_group_id,
-            ProgrammePlayers.group_time_id,
-            TennisGroupTimes.day_of_week,
-            TennisGroupTimes.start_time,
-            TennisGroupTimes.end_time
+        coach_counts_query = (db.session.query(
+            ProgrammePlayers.coach_id.label('coach_id'),
+            func.count(distinct(ProgrammePlayers.id)).label('total_assigned'),
+            func.count(distinct(Report.id)).filter(Report.is_draft == False).label('reports_completed'),
+            func.count(distinct(Report.id)).filter(Report.is_draft == True).label('reports_draft')
         )
-        .select_from(Report)
-        .join(ProgrammePlayers, Report.programme_player_id == ProgrammePlayers.id)
+        .select_from(ProgrammePlayers)
         .join(TennisGroup, ProgrammePlayers.group_id == TennisGroup.id)
-        .outerjoin(TennisGroupTimes, ProgrammePlayers.group_time_id == TennisGroupTimes.id)
         .join(GroupTemplate, and_(
             TennisGroup.id == GroupTemplate.group_id,
             GroupTemplate.is_active == True
@@ -290,76 +260,163 @@ def dashboard_stats():
             ReportTemplate.id == GroupTemplate.template_id,
             ReportTemplate.is_active == True
         ))
-        .filter(
-            ProgrammePlayers.tennis_club_id == tennis_club_id,
-            Report.recommended_group_id.isnot(None),
-            Report.is_draft == False  # Only include finalised reports
-        ))
+        .outerjoin(Report, report_join)
+        .filter(ProgrammePlayers.tennis_club_id == tennis_club_id))
         
         if selected_period_id:
-            recommendations_query = recommendations_query.filter(
-                Report.teaching_period_id == selected_period_id
+            coach_counts_query = coach_counts_query.filter(
+                ProgrammePlayers.teaching_period_id == selected_period_id
             )
             
-        if not (current_user.is_admin or current_user.is_super_admin):
-            recommendations_query = recommendations_query.filter(
-                ProgrammePlayers.coach_id == current_user.id
-            )
+        coach_counts = coach_counts_query.group_by(ProgrammePlayers.coach_id).subquery()
+        
+        # Coaches with no assigned players IN THIS CLUB drop out of the inner join
+        coach_rows = (db.session.query(
+            User.id,
+            User.name,
+            User.tennis_club_id,
+            TennisClub.name.label('club_name'),
+            coach_counts.c.total_assigned,
+            coach_counts.c.reports_completed,
+            coach_counts.c.reports_draft
+        )
+        .join(TennisClub, User.tennis_club_id == TennisClub.id)
+        .join(coach_counts, coach_counts.c.coach_id == User.id)
+        .filter(
+            TennisClub.organisation_id == organisation_id,
+            User.is_active == True
+        )
+        .all())
+        
+        for coach in coach_rows:
+            coach_summaries.append({
+                'id': coach.id,
+                'name': coach.name,
+                'club_name': coach.club_name,  # ADDED: Show which club the coach belongs to
+                'is_external': coach.tennis_club_id != tennis_club_id,  # ADDED: Flag for external coaches
+                'total_assigned': coach.total_assigned,
+                'reports_completed': coach.reports_completed,
+                'reports_draft': coach.reports_draft
+            })
             
-        recommendations = recommendations_query.group_by(
-            TennisGroup.name,
-            Report.recommended_group_id,
-            ProgrammePlayers.group_time_id,
-            TennisGroupTimes.day_of_week,
-            TennisGroupTimes.start_time,
-            TennisGroupTimes.end_time
-        ).all()
-        
-        # Process recommendations with session information
-        group_recommendations = []
-        for from_group, count, recommended_group_id, group_time_id, day_of_week, start_time, end_time in recommendations:
-            to_group = TennisGroup.query.get(recommended_group_id)
-            if to_group:
-                # Format time slot information
-                session_info = None
-                if day_of_week and start_time and end_time:
-                    session_info = {
-                        'day_of_week': day_of_week.value,
-                        'start_time': start_time.strftime('%H:%M'),
-                        'end_time': end_time.strftime('%H:%M'),
-                        'time_slot_id': group_time_id
-                    }
-                
-                group_recommendations.append({
-                    'from_group': from_group,
-                    'to_group': to_group.name,
-                    'count': count,
-                    'session': session_info
-                })
+        # Sort coaches by name
+        coach_summaries = sorted(coach_summaries, key=lambda x: x['name'])
+
+    # Get group recommendations WITH SESSION INFO (only consider finalised reports)
+    RecommendedGroup = aliased(TennisGroup)
+    recommendations_query = (db.session.query(
+        TennisGroup.name.label('from_group'),
+        func.count().label('count'),
+        RecommendedGroup.name.label('to_group'),
+        ProgrammePlayers.group_time_id,
+        TennisGroupTimes.day_of_week,
+        TennisGroupTimes.start_time,
+        TennisGroupTimes.end_time
+    )
+    .select_from(Report)
+    .join(ProgrammePlayers, Report.programme_player_id == ProgrammePlayers.id)
+    .join(TennisGroup, ProgrammePlayers.group_id == TennisGroup.id)
+    .join(RecommendedGroup, Report.recommended_group_id == RecommendedGroup.id)
+    .outerjoin(TennisGroupTimes, ProgrammePlayers.group_time_id == TennisGroupTimes.id)
+    .join(GroupTemplate, and_(
+        TennisGroup.id == GroupTemplate.group_id,
+        GroupTemplate.is_active == True
+    ))
+    .join(ReportTemplate, and_(
+        ReportTemplate.id == GroupTemplate.template_id,
+        ReportTemplate.is_active == True
+    ))
+    .filter(
+        ProgrammePlayers.tennis_club_id == tennis_club_id,
+        Report.recommended_group_id.isnot(None),
+        Report.is_draft == False  # Only include finalised reports
+    ))
+    
+    if selected_period_id:
+        recommendations_query = recommendations_query.filter(
+            Report.teaching_period_id == selected_period_id
+        )
         
-        response_data = {
-            'periods': [{
-                'id': p.id,
-                'name': p.name,
-                'hasPlayers': p.id in period_ids
-            } for p in all_periods],
-            'defaultPeriodId': default_period_id,
-            'stats': {
-                'totalStudents': total_students,
-                'totalReports': total_reports,
-                'submittedReports': submitted_reports,
-                'draftReports': draft_reports,
-                'reportCompletion': completion_rate,
-                'currentGroups': [{
-                    'name': name,
-                    'count': count,
-                    'reports_completed': completed,
-                    'reports_draft': draft
-                } for name, count, completed, draft in group_stats],
-                'coachSummaries': coach_summaries,
-                'groupRecommendations': group_recommendations
+    if not (current_user.is_admin or current_user.is_super_admin):
+        recommendations_query = recommendations_query.filter(
+            ProgrammePlayers.coach_id == current_user.id
+        )
+        
+    recommendations = recommendations_query.group_by(
+        TennisGroup.name,
+        Report.recommended_group_id,
+        RecommendedGroup.name,
+        ProgrammePlayers.group_time_id,
+        TennisGroupTimes.day_of_week,
+        TennisGroupTimes.start_time,
+        TennisGroupTimes.end_time
+    ).all()
+    
+    # Process recommendations with session information
+    group_recommendations = []
+    for from_group, count, to_group, group_time_id, day_of_week, start_time, end_time in recommendations:
+        # Format time slot information
+        session_info = None
+        if day_of_week and start_time and end_time:
+            session_info = {
+                'day_of_week': day_of_week.value,
+                'start_time': start_time.strftime('%H:%M'),
+                'end_time': end_time.strftime('%H:%M'),
+                'time_slot_id': group_time_id
             }
+        
+        group_recommendations.append({
+            'from_group': from_group,
+            'to_group': to_group,
+            'count': count,
+            'session': session_info
+        })
+    
+    response_data = {
+        'periods': [{
+            'id': p.id,
+            'name': p.name,
+            'hasPlayers': p.id in period_ids
+        } for p in all_periods],
+        'defaultPeriodId': default_period_id,
+        'stats': {
+            'totalStudents': total_students,
+            'totalReports': total_reports,
+            'submittedReports': submitted_reports,
+            'draftReports': draft_reports,
+            'reportCompletion': completion_rate,
+            'currentGroups': [{
+                'name': name,
+                'count': count,
+                'reports_completed': completed,
+                'reports_draft': draft
+            } for name, count, completed, draft in group_stats],
+            'coachSummaries': coach_summaries,
+            'groupRecommendations': group_recommendations
         }
+    }
+    return response_data
+
+@main.route('/api/dashboard/stats')
+@login_required
+@verify_club_access()
+def dashboard_stats():
+    try:
+        tennis_club_id = current_user.tennis_club_id
+        selected_period_id = request.args.get('period', type=int)
+        
+        # Admins share one entry per club and period; coaches each get their own
+        if current_user.is_admin or current_user.is_super_admin:
+            audience = 'admin'
+        else:
+            audience = f'coach:{current_user.id}'
+        cache_key = f"dashboard_stats:{tennis_club_id}:{selected_period_id or 'default'}:{audience}"
+        
+        response_data = get_cached_stats(
+            cache_key,
+            tennis_club_id,
+            lambda: build_dashboard_stats(tennis_club_id, selected_period_id)
+        )
         return jsonify(response_data)
         
     except Exception as e:
@@ -625,109 +682,35 @@ def download_single_report(report_id):
             flash('You do not have permission to download this report')
             return redirect(url_for('main.dashboard'))
 
-        # Get the club name to determine which generator to use
-        club_name = current_user.tennis_club.name
-        
         # Generate filename
         filename = f"{report.student.name}_{report.teaching_period.name}_{report.tennis_group.name}.pdf".replace(' ', '_')
         
-        if 'wilton' in club_name.lower():
-            # Use the Wilton report generator for Wilton clubs
-            try:
-                # Import the Wilton report generator
-                from app.utils.wilton_report_generator import EnhancedWiltonReportGenerator
-                
-                # Get base directory and config path - FIXED PATH
-                base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                config_path = os.path.join(base_dir, 'utils', 'wilton_group_config.json')
-                
-                # Add logging to debug the path
-                current_app.logger.info(f"Using config path: {config_path}")
-                current_app.logger.info(f"Config file exists: {os.path.exists(config_path)}")
-                
-                # Check if config file exists before proceeding
-                if not os.path.exists(config_path):
-                    raise Exception(f"Config file not found at: {config_path}")
-                
-                # Create a temporary directory for the output
-                import tempfile
-                temp_dir = tempfile.mkdtemp()
-                
-                # Generate the report
-                result = EnhancedWiltonReportGenerator.generate_single_report(
-                    report_id=report.id,
-                    output_dir=temp_dir,
-                    config_path=config_path
-                )
-                
-                # Check if generation was successful
-                if not result.get('success'):
-                    error_msg = f"Failed to generate Wilton report: {result}"
-                    current_app.logger.error(error_msg)
-                    raise Exception(error_msg)
-                    
-                # Get the output path
-                output_path = result.get('output_path')
-                
-                # Verify the output file exists
-                if not output_path or not os.path.exists(output_path):
-                    raise Exception(f"Generated report file not found at: {output_path}")
-                
-                # Read the file into memory
-                with open(output_path, 'rb') as f:
-                    pdf_data = f.read()
-                    
-                # Clean up the temporary directory
-                import shutil
-                shutil.rmtree(temp_dir)
-                
-                # Create response
-                response = send_file(
-                    BytesIO(pdf_data),
-                    mimetype='application/pdf',
-                    as_attachment=True,
-                    download_name=filename
-                )
-                
-                current_app.logger.info(f"Successfully generated Wilton report for {report.student.name}")
-                
-            except Exception as e:
-                # If Wilton report generation fails, log the error and fall back to standard report
-                current_app.logger.error(f"Error generating Wilton report for report {report_id}: {str(e)}")
-                current_app.logger.error(traceback.format_exc())
-                
-                # Create PDF in memory buffer using standard generator
-                current_app.logger.info("Falling back to standard report generator")
-                pdf_buffer = BytesIO()
-                from app.utils.report_generator import create_single_report_pdf
-                create_single_report_pdf(report, pdf_buffer)
-                pdf_buffer.seek(0)
-                
-                response = send_file(
-                    pdf_buffer,
-                    mimetype='application/pdf',
-                    as_attachment=True,
-                    download_name=filename
-                )
+        # The cache key hashes everything that goes into the PDF, so it is a strong ETag
+        payload = serialize_report(report)
+        etag = report_pdf_cache_key(payload)
+        
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
         else:
-            # Use the standard report generator for other clubs
-            pdf_buffer = BytesIO()
-            from app.utils.report_generator import create_single_report_pdf
-            create_single_report_pdf(report, pdf_buffer)
-            pdf_buffer.seek(0)
+            pdf_data, etag, cached = get_report_pdf(report, payload)
             
+            # Only bytes served from or written to the cache are what the key names;
+            # a fallback or uncached render must not be pinned in the browser
             response = send_file(
-                pdf_buffer,
+                BytesIO(pdf_data),
                 mimetype='application/pdf',
                 as_attachment=True,
-                download_name=filename
+                download_name=filename,
+                etag=etag if cached else False,
+                conditional=cached
             )
+            if not cached:
+                response.headers["Cache-Control"] = "no-store"
+                return response
         
-        # Add cache control headers to avoid browser caching issues
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        response.headers["Content-Type"] = "application/pdf"
+        # Let browsers keep the PDF but revalidate it with the ETag on every download
+        response.headers["Cache-Control"] = "private, no-cache"
         
         return response
         
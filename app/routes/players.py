@@ -2,242 +2,19 @@ from flask import Blueprint, jsonify, make_response, request, render_template, f
 from flask_login import login_required, current_user
 from app.models import (
     ProgrammePlayers, Student, TennisGroup, TennisGroupTimes, TeachingPeriod, 
-    User, Report, DayOfWeek, GroupTemplate, TennisClub, UserRole
+    User, Report, GroupTemplate, TennisClub, UserRole
 )
 from app import db
 from app.utils.auth import admin_required
 from app.clubs.middleware import verify_club_access
 from sqlalchemy import and_, or_, func, text
-from datetime import datetime
 import traceback
-import pandas as pd
 import time
 import uuid
 import os
 
 player_routes = Blueprint('players', __name__, url_prefix='/api')
 
-def parse_date(date_str):
-    """Parse date from either YYYY-MM-DD or DD-MMM-YYYY format"""
-    
-    # Return None for empty strings or None values
-    if not date_str or date_str.strip() == '':
-        return None
-
-    try:
-        # First try YYYY-MM-DD format (HTML5 date input)
-        try:
-            parsed_date = datetime.strptime(date_str.strip(), '%Y-%m-%d').date()
-            print(f"Successfully parsed date (YYYY-MM-DD): {parsed_date}")
-            return parsed_date
-        except ValueError:
-            # If that fails, try DD-MMM-YYYY format
-            date_str = date_str.strip()
-            day, month, year = date_str.split('-')
-            
-            # Ensure month is properly capitalized
-            month = month.capitalize()
-            
-            # Reconstruct date string in proper format
-            formatted_date_str = f"{day}-{month}-{year}"
-            
-            # Parse using strptime
-            parsed_date = datetime.strptime(formatted_date_str, '%d-%b-%Y').date()
-            print(f"Successfully parsed date (DD-MMM-YYYY): {parsed_date}")
-            return parsed_date
-            
-    except ValueError as e:
-        print(f"Date parsing failed: {str(e)}")
-        raise ValueError(f"Invalid date format for '{date_str}'. Use either YYYY-MM-DD or DD-MMM-YYYY format (e.g., 2024-12-25 or 25-Dec-2024)")
-
-def process_batch(batch_df, club_id, teaching_period, coaches, groups):
-    """Process a batch of CSV rows with validation and database updates"""
-    
-    valid_rows = []
-    batch_errors = []
-    batch_warnings = []
-    
-    # Validate all rows first
-    for index, row in batch_df.iterrows():
-        try:
-            row_number = index + 2  # +2 for header row and 0-indexing
-            row_data = {}
-            
-            # Validate student name
-            if pd.isna(row['student_name']):
-                batch_errors.append(f"Row {row_number}: Missing student name")
-                continue
-            row_data['student_name'] = row['student_name']
-            
-            # Validate contact email
-            if pd.isna(row['contact_email']):
-                batch_errors.append(f"Row {row_number}: Missing contact email for {row['student_name']}")
-                continue
-            row_data['contact_email'] = row['contact_email']
-            
-            # Validate coach
-            if pd.isna(row['coach_email']):
-                batch_errors.append(f"Row {row_number}: Missing coach email for {row['student_name']}")
-                continue
-                
-            coach_email = str(row['coach_email']).lower()
-            if coach_email not in coaches:
-                batch_errors.append(f"Row {row_number}: Coach with email {row['coach_email']} not found")
-                continue
-            row_data['coach'] = coaches[coach_email]
-            
-            # Validate group
-            if pd.isna(row['group_name']):
-                batch_errors.append(f"Row {row_number}: Missing group name for {row['student_name']}")
-                continue
-                
-            group_name = str(row['group_name']).lower()
-            if group_name not in groups:
-                batch_errors.append(f"Row {row_number}: Group '{row['group_name']}' not found")
-                continue
-            row_data['group'] = groups[group_name]
-            
-            # Parse day of week
-            if pd.isna(row['day_of_week']):
-                batch_errors.append(f"Row {row_number}: Missing day of week for {row['student_name']}")
-                continue
-                
-            try:
-                day_of_week = DayOfWeek[str(row['day_of_week']).upper()]
-                row_data['day_of_week'] = day_of_week
-            except KeyError:
-                valid_days = ', '.join([d.name.title() for d in DayOfWeek])
-                batch_errors.append(f"Row {row_number}: Invalid day of week '{row['day_of_week']}'. Must be one of: {valid_days}")
-                continue
-            
-            # Parse time values
-            if pd.isna(row['start_time']) or pd.isna(row['end_time']):
-                batch_errors.append(f"Row {row_number}: Missing start or end time for {row['student_name']}")
-                continue
-                
-            try:
-                start_time = datetime.strptime(str(row['start_time']), '%H:%M').time()
-                end_time = datetime.strptime(str(row['end_time']), '%H:%M').time()
-                
-                if start_time >= end_time:
-                    batch_errors.append(f"Row {row_number}: End time must be after start time")
-                    continue
-                    
-                row_data['start_time'] = start_time
-                row_data['end_time'] = end_time
-            except ValueError as e:
-                batch_errors.append(f"Row {row_number}: Invalid time format. Use HH:MM. Error: {str(e)}")
-                continue
-            
-            # Find group time slot
-            group_time = TennisGroupTimes.query.filter_by(
-                group_id=row_data['group'].id,
-                day_of_week=row_data['day_of_week'],
-                start_time=row_data['start_time'],
-                end_time=row_data['end_time'],
-                tennis_club_id=club_id
-            ).first()
-
-            if not group_time:
-                # Get available times for more helpful error message
-                available_times = TennisGroupTimes.query.filter_by(
-                    group_id=row_data['group'].id,
-                    tennis_club_id=club_id
-                ).all()
-                
-                if not available_times:
-                    time_info = "No time slots configured for this group"
-                else:
-                    time_info = ', '.join([f"{t.day_of_week.value} {t.start_time}-{t.end_time}" for t in available_times])
-                    
-                batch_errors.append(f"Row {row_number}: Group time slot not found for {row['group_name']} " +
-                                  f"on {row['day_of_week']} at {row['start_time']}-{row['end_time']}. " +
-                                  f"Available times: {time_info}")
-                continue
-                
-            row_data['group_time'] = group_time
-            
-            # Parse date of birth (optional)
-            if not pd.isna(row['date_of_birth']):
-                try:
-                    row_data['date_of_birth'] = parse_date(str(row['date_of_birth']))
-                except ValueError as e:
-                    batch_warnings.append(f"Row {row_number}: Couldn't parse date of birth '{row['date_of_birth']}', will be ignored. Error: {str(e)}")
-            
-            # Add to valid rows
-            valid_rows.append(row_data)
-            
-        except Exception as e:
-            batch_errors.append(f"Row {index + 2}: Unexpected error: {str(e)}")
-    
-    # Process valid rows in a single transaction
-    batch_students_created = 0
-    batch_players_created = 0
-    
-    if valid_rows:
-        # Use a fresh transaction for this batch
-        try:
-            with db.session.begin_nested():
-                for row_data in valid_rows:
-                    # Get or create student
-                    student = Student.query.filter_by(
-                        name=row_data['student_name'],
-                        tennis_club_id=club_id
-                    ).first()
-
-                    if not student:
-                        student = Student(
-                            name=row_data['student_name'],
-                            date_of_birth=row_data.get('date_of_birth'),
-                            contact_email=row_data['contact_email'],
-                            tennis_club_id=club_id
-                        )
-                        db.session.add(student)
-                        db.session.flush()  # Get student.id
-                        batch_students_created += 1
-
-                    # Check if player assignment already exists
-                    existing_player = ProgrammePlayers.query.filter_by(
-                        student_id=student.id,
-                        group_id=row_data['group'].id,
-                        group_time_id=row_data['group_time'].id,
-                        teaching_period_id=teaching_period.id,
-                        tennis_club_id=club_id
-                    ).first()
-
-                    if existing_player:
-                        batch_warnings.append(f"Student {student.name} is already assigned to {row_data['group'].name} " +
-                                          f"at {row_data['day_of_week'].value} {row_data['start_time']}-{row_data['end_time']}")
-                        continue
-
-                    # Create new player assignment
-                    player = ProgrammePlayers(
-                        student_id=student.id,
-                        coach_id=row_data['coach'].id,
-                        group_id=row_data['group'].id,
-                        group_time_id=row_data['group_time'].id,
-                        teaching_period_id=teaching_period.id,
-                        tennis_club_id=club_id
-                    )
-                    db.session.add(player)
-                    batch_players_created += 1
-                    
-            # Commit the outer transaction
-            db.session.commit()
-            
-        except Exception as e:
-            # Make sure to rollback
-            db.session.rollback()
-            batch_errors.append(f"Database error: {str(e)}")
-    
-    # Return batch results
-    return {
-        'students_created': batch_students_created,
-        'players_created': batch_players_created,
-        'warnings': batch_warnings,
-        'errors': batch_errors
-    }
-
 @player_routes.route('/programme-players')
 @login_required
 @verify_club_access()
@@ -3,18 +3,24 @@ from flask_login import login_required, current_user
 from app.models import (
     Register, RegisterEntry, TeachingPeriod, TennisGroupTimes, 
     ProgrammePlayers, AttendanceStatus, TennisGroup, Student, User, RegisterAssistantCoach, DayOfWeek,
-    Cancellation, CancellationType, SessionPlan
+    Cancellation, CancellationType, SessionPlan, SessionOccurrence, AttendanceRollup, AbsenceStreak
 )
 from app import db
 from app.models.base import UserRole
 from app.utils.auth import admin_required
 from app.clubs.middleware import verify_club_access
-from sqlalchemy import and_, or_, func, case, distinct
+from sqlalchemy import and_, or_, func, case, distinct, tuple_
 from datetime import datetime, timedelta, date
 import traceback
-from app.services.email_service import EmailService
+from app.services.notification_service import enqueue_absence_notification
 from sqlalchemy import desc
-from app.routes.cancellations import get_cancelled_sessions_in_range, is_session_cancelled
+from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import insert
+from app.services.session_occurrence_service import ensure_period_occurrences, refresh_occurrence_links
+from app.services.attendance_rollup_service import (
+    refresh_attendance_rollups, refresh_register_rollups, refresh_rollups_for_registers
+)
+from app.services.absence_streak_service import update_absence_streaks, recompute_absence_streaks
 
 # API routes for JSON data
 register_routes = Blueprint('registers', __name__, url_prefix='/api')
@@ -23,6 +29,37 @@ register_routes = Blueprint('registers', __name__, url_prefix='/api')
 register_views = Blueprint('register_views', __name__, url_prefix='/registers')
 
 
+def get_assigned_coaches(group_time_ids, teaching_period_id):
+    """
+    Resolve the assigned coach for each group time in a single query.
+    
+    Args:
+        group_time_ids: IDs of the group times to resolve
+        teaching_period_id: Teaching period ID
+        
+    Returns:
+        dict: group_time_id -> {'id': coach_id, 'name': coach_name}
+    """
+    if not group_time_ids:
+        return {}
+    
+    coach_rows = db.session.query(
+        ProgrammePlayers.group_time_id,
+        User.id,
+        User.name
+    ).join(
+        User, User.id == ProgrammePlayers.coach_id
+    ).filter(
+        ProgrammePlayers.group_time_id.in_(group_time_ids),
+        ProgrammePlayers.teaching_period_id == teaching_period_id
+    ).order_by(ProgrammePlayers.group_time_id, ProgrammePlayers.id).all()
+    
+    assigned_coaches = {}
+    for group_time_id, coach_id, coach_name in coach_rows:
+        assigned_coaches.setdefault(group_time_id, {'id': coach_id, 'name': coach_name})
+        
+    return assigned_coaches
+
 def serialize_attendance_status(status):
     """
     Convert AttendanceStatus to consistent string format for API responses.
@@ -50,11 +87,152 @@ def serialize_attendance_status(status):
     
     # Last resort fallback
     return str(status).lower().replace(' ', '_')
+
+
+def upsert_register_entries(register_id, entries):
+    """
+    Write a batch of register entries in a single INSERT ... ON CONFLICT statement.
+    
+    Existing entries (matched on idx_register_entry_unique) have their status,
+    notes and predicted attendance replaced.
+    
+    Args:
+        register_id: ID of the register
+        entries: Iterable of dicts with programme_player_id, attendance_status,
+                 notes and predicted_attendance
+        
+    Returns:
+        int: Number of entries written
+    """
+    return upsert_register_entry_rows(
+        [dict(entry, register_id=register_id) for entry in entries]
+    )
+
+def upsert_register_entry_rows(rows):
+    """Upsert register entry rows that already carry their register_id (may span registers)"""
+    if not rows:
+        return 0
+    
+    statement = insert(RegisterEntry).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['register_id', 'programme_player_id'],
+        set_={
+            'attendance_status': statement.excluded.attendance_status,
+            'notes': statement.excluded.notes,
+            'predicted_attendance': statement.excluded.predicted_attendance,
+            'updated_at': func.current_timestamp()
+        }
+    ))
+    
+    return len(rows)
+
+def get_active_session_plan(group_time_id, register_date, teaching_period_id):
+    """Load the active session plan for a session with its entries, players and trial players"""
+    from app.models.session_planning import SessionPlanEntry
+    
+    return SessionPlan.query.options(
+        selectinload(SessionPlan.plan_entries)
+            .joinedload(SessionPlanEntry.programme_player)
+            .joinedload(ProgrammePlayers.student),
+        selectinload(SessionPlan.trial_players)
+    ).filter_by(
+        group_time_id=group_time_id,
+        date=register_date,
+        teaching_period_id=teaching_period_id,
+        tennis_club_id=current_user.tennis_club_id,
+        is_active=True
+    ).first()
+
+def serialize_trial_players(session_plan):
+    """Trial players can't be added as RegisterEntry since they're not ProgrammePlayers"""
+    return [{
+        'id': trial_player.id,
+        'name': trial_player.name,
+        'contact_email': trial_player.contact_email,
+        'contact_number': trial_player.contact_number,
+        'notes': trial_player.notes,
+        'date_of_birth': trial_player.date_of_birth.isoformat() if trial_player.date_of_birth else None
+    } for trial_player in session_plan.trial_players]
+
+def build_register_entries(group_time_id, regular_player_ids, session_plan=None):
+    """
+    Merge a session's regular players with its session plan in memory.
+    
+    Regular players default to present (predicted), with statuses and notes
+    taken from the session plan where the player is planned. Makeup players
+    planned in from other group times are added as present.
+    
+    Args:
+        group_time_id: Group time of the register
+        regular_player_ids: Programme player IDs assigned to the group time
+        session_plan: Optional active SessionPlan with plan_entries loaded
+        
+    Returns:
+        tuple: (entries keyed by programme player ID, regular_entries_added, makeup_entries_added)
+    """
+    from app.models.session_planning import PlannedAttendanceStatus, PlayerType
+    
+    # Create mapping of planned statuses if session plan exists
+    planned_statuses = {}
+    if session_plan:
+        for plan_entry in session_plan.plan_entries:
+            planned_statuses[plan_entry.programme_player_id] = plan_entry
+    
+    register_entries = {}
+    
+    # Create register entries for ALL regular players
+    regular_entries_added = 0
+    for player_id in regular_player_ids:
+        plan_entry = planned_statuses.get(player_id)
+        
+        # Determine attendance status based on session plan or default
+        if plan_entry:
+            if plan_entry.planned_status == PlannedAttendanceStatus.PLANNED_PRESENT:
+                attendance_status = AttendanceStatus.PRESENT
+            elif plan_entry.planned_status == PlannedAttendanceStatus.PLANNED_ABSENT:
+                attendance_status = AttendanceStatus.AWAY_WITH_NOTICE
+            else:
+                attendance_status = AttendanceStatus.PRESENT
+            notes = plan_entry.notes or ''
+        else:
+            # Player not in session plan - use default
+            attendance_status = AttendanceStatus.PRESENT
+            notes = ''
+        
+        register_entries[player_id] = {
+            'programme_player_id': player_id,
+            'attendance_status': attendance_status,
+            'notes': notes,
+            'predicted_attendance': True
+        }
+        regular_entries_added += 1
+    
+    # Add makeup players from session plan (if any)
+    makeup_entries_added = 0
+    if session_plan:
+        for plan_entry in session_plan.plan_entries:
+            if (plan_entry.player_type == PlayerType.MAKEUP and 
+                plan_entry.programme_player.group_time_id != group_time_id and
+                plan_entry.programme_player_id not in register_entries):
+                
+                register_entries[plan_entry.programme_player_id] = {
+                    'programme_player_id': plan_entry.programme_player_id,
+                    'attendance_status': AttendanceStatus.PRESENT,
+                    'notes': plan_entry.notes or '',
+                    'predicted_attendance': False
+                }
+                makeup_entries_added += 1
+    
+    return register_entries, regular_entries_added, makeup_entries_added
+
 def apply_session_plan_to_register(register, group_time_id, register_date, teaching_period_id):
     """
-    Apply session plan entries to a register if a plan exists.
+    Build register entries from a session plan if a plan exists.
     This is completely optional - if no session plan exists, the register will use default logic.
     
+    Entries are returned in memory, keyed by programme player, so the caller can
+    merge them with other players and write everything with upsert_register_entries.
+    
     Args:
         register: The Register object to populate
         group_time_id: Group time ID
@@ -62,22 +240,16 @@ def apply_session_plan_to_register(register, group_time_id, register_date, teach
         teaching_period_id: Teaching period ID
         
     Returns:
-        tuple: (plan_found, entries_added, trial_players_info)
+        tuple: (plan_found, planned_entries, trial_players_info)
     """
-    from app.models.session_planning import SessionPlan, SessionPlanEntry, TrialPlayer, PlannedAttendanceStatus, PlayerType
+    from app.models.session_planning import PlannedAttendanceStatus, PlayerType
     
     # Check if a session plan exists for this session (OPTIONAL)
-    session_plan = SessionPlan.query.filter_by(
-        group_time_id=group_time_id,
-        date=register_date,
-        teaching_period_id=teaching_period_id,
-        tennis_club_id=current_user.tennis_club_id,
-        is_active=True
-    ).first()
+    session_plan = get_active_session_plan(group_time_id, register_date, teaching_period_id)
     
     if not session_plan:
         current_app.logger.info(f"No session plan found for group_time_id={group_time_id}, date={register_date} - using default register creation")
-        return False, 0, []
+        return False, {}, []
     
     current_app.logger.info(f"Found session plan {session_plan.id} for register creation - applying planned attendance")
     
@@ -89,44 +261,24 @@ def apply_session_plan_to_register(register, group_time_id, register_date, teach
         PlannedAttendanceStatus.MAKEUP_PLAYER: AttendanceStatus.PRESENT
     }
     
-    entries_added = 0
+    planned_entries = {}
     
     # Process planned entries
     for plan_entry in session_plan.plan_entries:
         # Map planned status to attendance status
-        attendance_status = status_mapping.get(
-            plan_entry.planned_status, 
-            AttendanceStatus.ABSENT
-        )
-        
-        # Create register entry
-        register_entry = RegisterEntry(
-            register_id=register.id,
-            programme_player_id=plan_entry.programme_player_id,
-            attendance_status=attendance_status,
-            notes=plan_entry.notes or '',
-            predicted_attendance=False
-        )
-        
-        db.session.add(register_entry)
-        entries_added += 1
+        planned_entries[plan_entry.programme_player_id] = {
+            'programme_player_id': plan_entry.programme_player_id,
+            'attendance_status': status_mapping.get(plan_entry.planned_status, AttendanceStatus.ABSENT),
+            'notes': plan_entry.notes or '',
+            'predicted_attendance': False
+        }
         
         # Log makeup players
         if plan_entry.player_type == PlayerType.MAKEUP:
             student_name = plan_entry.programme_player.student.name if plan_entry.programme_player else "Unknown"
             current_app.logger.info(f"Added planned makeup player: {student_name}")
     
-    # Get trial players information (they can't be added as RegisterEntry since they're not ProgrammePlayers)
-    trial_players_info = []
-    for trial_player in session_plan.trial_players:
-        trial_players_info.append({
-            'id': trial_player.id,
-            'name': trial_player.name,
-            'contact_email': trial_player.contact_email,
-            'contact_number': trial_player.contact_number,
-            'notes': trial_player.notes,
-            'date_of_birth': trial_player.date_of_birth.isoformat() if trial_player.date_of_birth else None
-        })
+    trial_players_info = serialize_trial_players(session_plan)
     
     # Add session plan notes to register notes if they exist
     if session_plan.notes and not register.notes:
@@ -134,9 +286,9 @@ def apply_session_plan_to_register(register, group_time_id, register_date, teach
     elif session_plan.notes and register.notes:
         register.notes = f"{register.notes}\n\nFrom session plan: {session_plan.notes}"
     
-    current_app.logger.info(f"Applied session plan: {entries_added} entries, {len(trial_players_info)} trial players")
+    current_app.logger.info(f"Applied session plan: {len(planned_entries)} entries, {len(trial_players_info)} trial players")
     
-    return True, entries_added, trial_players_info
+    return True, planned_entries, trial_players_info
 
 # =========================================================
 # VIEW ROUTES - For rendering HTML templates
@@ -188,7 +340,13 @@ def edit_register(register_id):
 @login_required
 @verify_club_access()
 def get_registers():
-    """Get registers for the current user's tennis club with filtering options"""
+    """
+    Get registers for the current user's tennis club with filtering options.
+    
+    Attendance counts are aggregated in SQL. Pass `limit` (and the returned
+    `next_cursor` as `cursor`) to page through history newest first, or
+    `totals_only=true` to get only the combined counts for the filters.
+    """
     try:
         # Parse query parameters
         teaching_period_id = request.args.get('period_id', type=int)
@@ -197,98 +355,165 @@ def get_registers():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         coach_id = request.args.get('coach_id', type=int)
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        totals_only = request.args.get('totals_only', 'false').lower() == 'true'
         
-        # Start with base query - be explicit about the model being queried
-        query = Register.query.filter(Register.tennis_club_id == current_user.tennis_club_id)
+        # Filters are scoped to the register and its group time
+        filters = [Register.tennis_club_id == current_user.tennis_club_id]
         
-        # Apply filters - scope them correctly to the appropriate tables
         if teaching_period_id:
-            query = query.filter(Register.teaching_period_id == teaching_period_id)
+            filters.append(Register.teaching_period_id == teaching_period_id)
         
-        # Join with group_time for group and day filtering
-        if group_id or day_of_week:
-            query = query.join(TennisGroupTimes, Register.group_time_id == TennisGroupTimes.id)
+        if group_id:
+            filters.append(TennisGroupTimes.group_id == group_id)
             
-            if group_id:
-                query = query.filter(TennisGroupTimes.group_id == group_id)
-                
-            if day_of_week:
-                try:
-                    # Try to match by enum name (uppercase input expected)
-                    day_enum = DayOfWeek[day_of_week.upper()]
-                    query = query.filter(TennisGroupTimes.day_of_week == day_enum)
-                except KeyError:
-                    # Try to match by enum value (case insensitive)
-                    day_enum = next((day for day in DayOfWeek if day.value.upper() == day_of_week.upper()), None)
-                    if day_enum:
-                        query = query.filter(TennisGroupTimes.day_of_week == day_enum)
+        if day_of_week:
+            try:
+                # Try to match by enum name (uppercase input expected)
+                day_enum = DayOfWeek[day_of_week.upper()]
+                filters.append(TennisGroupTimes.day_of_week == day_enum)
+            except KeyError:
+                # Try to match by enum value (case insensitive)
+                day_enum = next((day for day in DayOfWeek if day.value.upper() == day_of_week.upper()), None)
+                if day_enum:
+                    filters.append(TennisGroupTimes.day_of_week == day_enum)
         
         if start_date:
             try:
                 start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                query = query.filter(Register.date >= start_date)
+                filters.append(Register.date >= start_date)
             except ValueError:
                 pass
                 
         if end_date:
             try:
                 end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-                query = query.filter(Register.date <= end_date)
+                filters.append(Register.date <= end_date)
             except ValueError:
                 pass
                 
         # Coach filter - admin/super_admin can see all, coach can only see their own
         if not (current_user.is_admin or current_user.is_super_admin):
-            # Apply filter to Register.coach_id, not TennisGroupTimes
-            query = query.filter(Register.coach_id == current_user.id)
+            filters.append(Register.coach_id == current_user.id)
         elif coach_id:  # Admin filtering by specific coach
-            query = query.filter(Register.coach_id == coach_id)
+            filters.append(Register.coach_id == coach_id)
+        
+        # Status counts computed in a single aggregate pass over the entries
+        status_counts = [
+            func.count(RegisterEntry.id).label('total'),
+            func.count(RegisterEntry.id).filter(
+                RegisterEntry.attendance_status == AttendanceStatus.PRESENT
+            ).label('present'),
+            func.count(RegisterEntry.id).filter(
+                RegisterEntry.attendance_status == AttendanceStatus.ABSENT
+            ).label('absent'),
+            func.count(RegisterEntry.id).filter(
+                RegisterEntry.attendance_status == AttendanceStatus.SICK
+            ).label('sick'),
+            func.count(RegisterEntry.id).filter(
+                RegisterEntry.attendance_status == AttendanceStatus.AWAY_WITH_NOTICE
+            ).label('away_with_notice')
+        ]
+        
+        if totals_only:
+            totals = db.session.query(
+                func.count(distinct(Register.id)).label('total_registers'),
+                *status_counts
+            ).select_from(Register).outerjoin(
+                TennisGroupTimes, Register.group_time_id == TennisGroupTimes.id
+            ).outerjoin(
+                RegisterEntry, RegisterEntry.register_id == Register.id
+            ).filter(*filters).one()
+            
+            return jsonify({
+                'total_registers': totals.total_registers,
+                'total': totals.total,
+                'present': totals.present,
+                'absent': totals.absent,
+                'sick': totals.sick,
+                'away_with_notice': totals.away_with_notice,
+                'attendance_rate': round((totals.present / totals.total * 100), 1) if totals.total > 0 else 0
+            })
+        
+        query = db.session.query(
+            Register.id,
+            Register.date,
+            Register.coach_id,
+            User.name.label('coach_name'),
+            TennisGroupTimes.group_id,
+            TennisGroupTimes.day_of_week,
+            TennisGroupTimes.start_time,
+            TennisGroupTimes.end_time,
+            TennisGroup.name.label('group_name'),
+            *status_counts
+        ).select_from(Register).join(
+            User, Register.coach_id == User.id
+        ).outerjoin(
+            TennisGroupTimes, Register.group_time_id == TennisGroupTimes.id
+        ).outerjoin(
+            TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
+        ).outerjoin(
+            RegisterEntry, RegisterEntry.register_id == Register.id
+        ).filter(*filters).group_by(
+            Register.id, User.id, TennisGroupTimes.id, TennisGroup.id
+        )
+        
+        # Keyset pagination on (date, id), most recent first
+        if cursor:
+            try:
+                cursor_date, cursor_id = cursor.split(':')
+                cursor_date = datetime.strptime(cursor_date, '%Y-%m-%d').date()
+                query = query.filter(tuple_(Register.date, Register.id) < (cursor_date, int(cursor_id)))
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
         
-        # Order by date (most recent first)
-        registers = query.order_by(Register.date.desc()).all()
+        query = query.order_by(Register.date.desc(), Register.id.desc())
+        
+        if limit:
+            limit = max(1, min(limit, 500))
+            rows = query.limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            rows = query.all()
+            has_more = False
         
-        # Calculate attendance stats for each register
         results = []
-        for register in registers:
-            # Count entries by status
-            present_count = sum(1 for entry in register.entries if entry.attendance_status == AttendanceStatus.PRESENT)
-            absent_count = sum(1 for entry in register.entries if entry.attendance_status == AttendanceStatus.ABSENT)
-            sick_count = sum(1 for entry in register.entries if entry.attendance_status == AttendanceStatus.SICK)
-            away_with_notice_count = sum(1 for entry in register.entries if entry.attendance_status == AttendanceStatus.AWAY_WITH_NOTICE)
-            
-            # Get group info from the group time
-            group_name = register.group_time.tennis_group.name if register.group_time else "Unknown Group"
-            
-            # Calculate attendance rate - UPDATED: Only count PRESENT as attendance
-            total_entries = len(register.entries)
-            # Changed calculation to only count present (not away_with_notice)
-            attendance_rate = round((present_count / total_entries * 100), 1) if total_entries > 0 else 0
-            
-            # Add day of week info
-            day_of_week = register.group_time.day_of_week.value if register.group_time and register.group_time.day_of_week else None
+        for row in rows:
+            # UPDATED: Only count PRESENT as attendance
+            attendance_rate = round((row.present / row.total * 100), 1) if row.total > 0 else 0
             
             results.append({
-                'id': register.id,
-                'date': register.date.isoformat(),
-                'group_name': group_name,
-                'group_id': register.group_time.group_id if register.group_time else None,
-                'coach_name': register.coach.name,
-                'coach_id': register.coach_id,
+                'id': row.id,
+                'date': row.date.isoformat(),
+                'group_name': row.group_name or "Unknown Group",
+                'group_id': row.group_id,
+                'coach_name': row.coach_name,
+                'coach_id': row.coach_id,
                 'time_slot': {
-                    'day': day_of_week,
-                    'start_time': register.group_time.start_time.strftime('%H:%M') if register.group_time and register.group_time.start_time else None,
-                    'end_time': register.group_time.end_time.strftime('%H:%M') if register.group_time and register.group_time.end_time else None
+                    'day': row.day_of_week.value if row.day_of_week else None,
+                    'start_time': row.start_time.strftime('%H:%M') if row.start_time else None,
+                    'end_time': row.end_time.strftime('%H:%M') if row.end_time else None
                 },
                 'stats': {
-                    'total': total_entries,
-                    'present': present_count,
-                    'absent': absent_count,
-                    'sick': sick_count,
-                    'away_with_notice': away_with_notice_count,
+                    'total': row.total,
+                    'present': row.present,
+                    'absent': row.absent,
+                    'sick': row.sick,
+                    'away_with_notice': row.away_with_notice,
                     'attendance_rate': attendance_rate
                 }
             })
         
+        if limit:
+            last = rows[-1] if rows else None
+            return jsonify({
+                'registers': results,
+                'has_more': has_more,
+                'next_cursor': f"{last.date.isoformat()}:{last.id}" if has_more else None
+            })
+        
         return jsonify(results)
         
     except Exception as e:
@@ -469,12 +694,14 @@ def create_register():
         db.session.add(register)
         db.session.flush()  # Get register.id without committing yet
 
-        # Add assistant coaches if provided
+        # Add assistant coaches if provided (verifying they belong to the same tennis club)
         assistant_coach_ids = data.get('assistant_coach_ids', [])
-        for coach_id in assistant_coach_ids:
-            # Verify coach exists and belongs to same tennis club
-            coach = User.query.filter_by(id=coach_id, tennis_club_id=current_user.tennis_club_id).first()
-            if coach:
+        if assistant_coach_ids:
+            valid_coach_ids = db.session.query(User.id).filter(
+                User.id.in_(assistant_coach_ids),
+                User.tennis_club_id == current_user.tennis_club_id
+            ).all()
+            for (coach_id,) in valid_coach_ids:
                 assistant = RegisterAssistantCoach(
                     register_id=register.id,
                     coach_id=coach_id
@@ -482,122 +709,50 @@ def create_register():
                 db.session.add(assistant)
 
         # Get ALL regular players for this group time and teaching period
-        all_regular_players = ProgrammePlayers.query.filter_by(
+        all_regular_players = db.session.query(ProgrammePlayers.id).filter_by(
             group_time_id=data['group_time_id'],
             teaching_period_id=data['teaching_period_id'],
             tennis_club_id=current_user.tennis_club_id
         ).all()
 
         # Check if there's a session plan for this session
-        from app.models.session_planning import SessionPlan, PlannedAttendanceStatus, PlayerType
-        session_plan = SessionPlan.query.filter_by(
-            group_time_id=data['group_time_id'],
-            date=register_date,
-            teaching_period_id=data['teaching_period_id'],
-            tennis_club_id=current_user.tennis_club_id,
-            is_active=True
-        ).first()
-
-        # Create mapping of planned statuses if session plan exists
-        planned_statuses = {}
-        if session_plan:
-            for plan_entry in session_plan.plan_entries:
-                planned_statuses[plan_entry.programme_player_id] = plan_entry
-
-        # Create register entries for ALL regular players
-        regular_entries_added = 0
-        for player in all_regular_players:
-            plan_entry = planned_statuses.get(player.id)
-            
-            # Determine attendance status based on session plan or default
-            if plan_entry:
-                if plan_entry.planned_status == PlannedAttendanceStatus.PLANNED_PRESENT:
-                    attendance_status = AttendanceStatus.PRESENT
-                elif plan_entry.planned_status == PlannedAttendanceStatus.PLANNED_ABSENT:
-                    attendance_status = AttendanceStatus.AWAY_WITH_NOTICE
-                else:
-                    attendance_status = AttendanceStatus.PRESENT
-                notes = plan_entry.notes or ''
-            else:
-                # Player not in session plan - use default
-                attendance_status = AttendanceStatus.PRESENT
-                notes = ''
-            
-            entry = RegisterEntry(
-                register_id=register.id,
-                programme_player_id=player.id,
-                attendance_status=attendance_status,
-                notes=notes,
-                predicted_attendance=True
-            )
-            db.session.add(entry)
-            regular_entries_added += 1
+        session_plan = get_active_session_plan(data['group_time_id'], register_date, data['teaching_period_id'])
 
-        # Add makeup players from session plan (if any)
-        makeup_entries_added = 0
-        if session_plan:
-            for plan_entry in session_plan.plan_entries:
-                if (plan_entry.player_type == PlayerType.MAKEUP and 
-                    plan_entry.programme_player.group_time_id != data['group_time_id']):
-                    
-                    # Check if this makeup player is already added
-                    existing_entry = RegisterEntry.query.filter_by(
-                        register_id=register.id,
-                        programme_player_id=plan_entry.programme_player_id
-                    ).first()
-                    
-                    if not existing_entry:
-                        entry = RegisterEntry(
-                            register_id=register.id,
-                            programme_player_id=plan_entry.programme_player_id,
-                            attendance_status=AttendanceStatus.PRESENT,
-                            notes=plan_entry.notes or '',
-                            predicted_attendance=False
-                        )
-                        db.session.add(entry)
-                        makeup_entries_added += 1
+        # Build all entries in memory, keyed by player so each is written once
+        register_entries, regular_entries_added, makeup_entries_added = build_register_entries(
+            data['group_time_id'],
+            [player.id for player in all_regular_players],
+            session_plan
+        )
 
         # Add any additional makeup players from the request
         additional_makeup_ids = data.get('makeup_player_ids', [])
         additional_makeup_added = 0
         if additional_makeup_ids:
-            # Get existing player IDs to avoid duplicates
-            existing_player_ids = {entry.programme_player_id for entry in 
-                                 RegisterEntry.query.filter_by(register_id=register.id).all()}
-            
             # Filter out players already added
-            new_makeup_ids = [pid for pid in additional_makeup_ids if pid not in existing_player_ids]
+            new_makeup_ids = [pid for pid in additional_makeup_ids if pid not in register_entries]
             
             if new_makeup_ids:
-                makeup_players = ProgrammePlayers.query.filter(
+                makeup_players = db.session.query(ProgrammePlayers.id).filter(
                     ProgrammePlayers.id.in_(new_makeup_ids),
                     ProgrammePlayers.teaching_period_id==data['teaching_period_id'],
                     ProgrammePlayers.tennis_club_id==current_user.tennis_club_id
                 ).all()
                 
                 for makeup_player in makeup_players:
-                    entry = RegisterEntry(
-                        register_id=register.id,
-                        programme_player_id=makeup_player.id,
-                        attendance_status=AttendanceStatus.PRESENT,
-                        notes='',
-                        predicted_attendance=False
-                    )
-                    db.session.add(entry)
+                    register_entries[makeup_player.id] = {
+                        'programme_player_id': makeup_player.id,
+                        'attendance_status': AttendanceStatus.PRESENT,
+                        'notes': '',
+                        'predicted_attendance': False
+                    }
                     additional_makeup_added += 1
 
+        # Write every entry in one statement
+        upsert_register_entries(register.id, register_entries.values())
+
         # Get trial players info if session plan exists
-        trial_players_info = []
-        if session_plan:
-            for trial_player in session_plan.trial_players:
-                trial_players_info.append({
-                    'id': trial_player.id,
-                    'name': trial_player.name,
-                    'contact_email': trial_player.contact_email,
-                    'contact_number': trial_player.contact_number,
-                    'notes': trial_player.notes,
-                    'date_of_birth': trial_player.date_of_birth.isoformat() if trial_player.date_of_birth else None
-                })
+        trial_players_info = serialize_trial_players(session_plan) if session_plan else []
 
         # Update register notes with session plan notes if they exist
         if session_plan and session_plan.notes:
@@ -606,6 +761,20 @@ def create_register():
             else:
                 register.notes = f"From session plan: {session_plan.notes}"
 
+        # Link the new register to its session occurrence
+        refresh_occurrence_links(
+            current_user.tennis_club_id,
+            data['teaching_period_id'],
+            data['group_time_id'],
+            register_date,
+            register_date
+        )
+
+        # Fold the new entries into the attendance rollups and absence streaks
+        db.session.flush()
+        refresh_register_rollups(register)
+        update_absence_streaks(register)
+
         # Commit all changes to database
         db.session.commit()
 
@@ -648,6 +817,8 @@ def update_register(register_id):
         if 'notes' in data:
             register.notes = data['notes']
                 
+        previous_coach_id = register.coach_id
+        previous_date = register.date
         if current_user.is_admin and 'coach_id' in data:
             register.coach_id = data['coach_id']
             
@@ -670,10 +841,29 @@ def update_register(register_id):
                         'register_id': existing_register.id
                     }), 409  # Conflict
                 
-                # Update the date
+                # Update the date and move the register to its new session occurrence
                 register.date = new_date
+                refresh_occurrence_links(
+                    register.tennis_club_id,
+                    register.teaching_period_id,
+                    register.group_time_id
+                )
             except ValueError:
                 return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        # Rollups are keyed by coach, so move this register's counts across
+        if register.coach_id != previous_coach_id:
+            db.session.flush()
+            refresh_attendance_rollups(register.teaching_period_id, register.group_time_id, previous_coach_id)
+            refresh_register_rollups(register)
+
+        # Moving a register reorders each player's history, so recount their streaks
+        if register.date != previous_date:
+            db.session.flush()
+            recompute_absence_streaks(
+                register.teaching_period_id,
+                [entry.programme_player_id for entry in register.entries]
+            )
             
         db.session.commit()
         
@@ -716,56 +906,85 @@ def update_register_entries(register_id):
         
         # Keep track of updates
         updated_count = 0
+        updated_player_ids = set()
         errors = []
         
         current_app.logger.info(f"Updating {len(entries)} register entries for register {register_id}")
         
-        # Use no_autoflush to prevent premature flushes
-        with db.session.no_autoflush:
-            for entry_data in entries:
-                player_id = entry_data.get('player_id')
-                
-                if not player_id:
-                    errors.append(f"Missing player_id in entry data: {entry_data}")
-                    continue
-                
-                # Find the register entry for this player
-                entry = RegisterEntry.query.filter_by(
-                    register_id=register_id,
-                    programme_player_id=player_id
-                ).first()
-                
-                if not entry:
-                    errors.append(f"Register entry not found for player_id: {player_id}")
+        # Load the current state of every entry on this register in one query
+        existing_entries = {
+            entry.programme_player_id: {
+                'programme_player_id': entry.programme_player_id,
+                'attendance_status': entry.attendance_status,
+                'notes': entry.notes,
+                'predicted_attendance': entry.predicted_attendance
+            }
+            for entry in db.session.query(
+                RegisterEntry.programme_player_id,
+                RegisterEntry.attendance_status,
+                RegisterEntry.notes,
+                RegisterEntry.predicted_attendance
+            ).filter(RegisterEntry.register_id == register_id).all()
+        }
+        
+        # Merge the changes in memory, then write them in a single upsert
+        merged_entries = {}
+        for entry_data in entries:
+            player_id = entry_data.get('player_id')
+            
+            if not player_id:
+                errors.append(f"Missing player_id in entry data: {entry_data}")
+                continue
+            
+            try:
+                player_id = int(player_id)
+            except (TypeError, ValueError):
+                errors.append(f"Register entry not found for player_id: {player_id}")
+                continue
+            
+            # Find the register entry for this player
+            if player_id not in existing_entries:
+                errors.append(f"Register entry not found for player_id: {player_id}")
+                continue
+            
+            entry = dict(merged_entries.get(player_id) or existing_entries[player_id])
+            
+            # Update attendance status
+            if 'attendance_status' in entry_data:
+                status_value = serialize_attendance_status(entry_data['attendance_status'])
+                if status_value in status_map:
+                    entry['attendance_status'] = status_map[status_value]
+                    current_app.logger.debug(f"Updated player {player_id} attendance to {status_value}")
+                else:
+                    errors.append(f"Invalid attendance status for player {player_id}: {status_value}")
                     continue
-                
-                # Update attendance status
-                if 'attendance_status' in entry_data:
-                    status_value = serialize_attendance_status(entry_data['attendance_status'])
-                    if status_value in status_map:
-                        entry.attendance_status = status_map[status_value]
-                        current_app.logger.debug(f"Updated player {player_id} attendance to {status_value}")
-                    else:
-                        errors.append(f"Invalid attendance status for player {player_id}: {status_value}")
-                        continue
-                
-                # Update notes
-                if 'notes' in entry_data:
-                    entry.notes = entry_data['notes']
-                    current_app.logger.debug(f"Updated player {player_id} notes")
-                
-                # Update predicted attendance
-                if 'predicted_attendance' in entry_data:
-                    entry.predicted_attendance = bool(entry_data['predicted_attendance'])
-                
-                updated_count += 1
+            
+            # Update notes
+            if 'notes' in entry_data:
+                entry['notes'] = entry_data['notes']
+                current_app.logger.debug(f"Updated player {player_id} notes")
+            
+            # Update predicted attendance
+            if 'predicted_attendance' in entry_data:
+                entry['predicted_attendance'] = bool(entry_data['predicted_attendance'])
+            
+            merged_entries[player_id] = entry
+            updated_count += 1
+            updated_player_ids.add(player_id)
         
-        # Commit the changes to the database
-        db.session.commit()
+        upsert_register_entries(register_id, merged_entries.values())
+        
+        # Recompute rollups and streaks for the changed players in the same transaction
+        db.session.flush()
+        refresh_register_rollups(register, updated_player_ids)
+        update_absence_streaks(register, updated_player_ids)
         
-        # Check for consecutive absences and send notification emails
+        # Check for consecutive absences and queue notification emails with the save
         process_absence_notifications(register_id)
         
+        # Commit the changes to the database
+        db.session.commit()
+        
         current_app.logger.info(f"Successfully updated {updated_count} register entries")
         
         return jsonify({
@@ -791,8 +1010,14 @@ def delete_register(register_id):
         if register.tennis_club_id != current_user.tennis_club_id:
             return jsonify({'error': 'Permission denied'}), 403
             
+        rollup_key = (register.teaching_period_id, register.group_time_id, register.coach_id)
+        player_ids = [entry.programme_player_id for entry in register.entries]
+        
         # Delete register (cascade will handle entries)
         db.session.delete(register)
+        db.session.flush()
+        refresh_attendance_rollups(*rollup_key)
+        recompute_absence_streaks(rollup_key[0], player_ids)
         db.session.commit()
         
         return jsonify({
@@ -832,83 +1057,70 @@ def get_upcoming_sessions():
             if not current_period:
                 return jsonify([])
         
-        # Get all group times for this club
-        group_times = TennisGroupTimes.query.filter_by(
-            tennis_club_id=current_user.tennis_club_id
-        ).all()
+        ensure_period_occurrences(current_user.tennis_club_id, teaching_period_id)
         
-        # Generate upcoming dates for the next 4 weeks
+        # Sessions in the next 4 weeks that don't have registers yet
         today = date.today()
-        upcoming_dates = []
-        for i in range(28):  # 4 weeks
-            upcoming_dates.append(today + timedelta(days=i))
-            
-        # For each group time, find sessions that don't have registers yet
-        upcoming_sessions = []
+        occurrences_query = db.session.query(
+            SessionOccurrence.date,
+            TennisGroupTimes,
+            TennisGroup.id.label('group_id'),
+            TennisGroup.name.label('group_name')
+        ).join(
+            TennisGroupTimes, SessionOccurrence.group_time_id == TennisGroupTimes.id
+        ).join(
+            TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
+        ).filter(
+            SessionOccurrence.tennis_club_id == current_user.tennis_club_id,
+            SessionOccurrence.teaching_period_id == teaching_period_id,
+            SessionOccurrence.date >= today,
+            SessionOccurrence.date < today + timedelta(days=28),
+            SessionOccurrence.register_id.is_(None)
+        )
         
-        for group_time in group_times:
-            # Check if coach is associated with this group time
-            if not current_user.is_admin:
-                players = ProgrammePlayers.query.filter_by(
-                    group_time_id=group_time.id,
-                    teaching_period_id=teaching_period_id,
-                    tennis_club_id=current_user.tennis_club_id
-                ).all()
-                
-                # Count players assigned to the current coach
-                coach_player_count = sum(1 for p in players if p.coach_id == current_user.id)
-                
-                # Skip if no players or none assigned to this coach
-                if len(players) == 0 or coach_player_count == 0:
-                    continue
+        # Coaches only see group times where they have players assigned
+        if not current_user.is_admin:
+            coach_group_time_ids = db.session.query(ProgrammePlayers.group_time_id).filter(
+                ProgrammePlayers.teaching_period_id == teaching_period_id,
+                ProgrammePlayers.tennis_club_id == current_user.tennis_club_id,
+                ProgrammePlayers.coach_id == current_user.id
+            )
+            occurrences_query = occurrences_query.filter(
+                SessionOccurrence.group_time_id.in_(coach_group_time_ids)
+            )
+        
+        occurrences = occurrences_query.order_by(SessionOccurrence.date).all()
+        
+        assigned_coaches = get_assigned_coaches(
+            {group_time.id for _, group_time, _, _ in occurrences},
+            teaching_period_id
+        )
+        
+        upcoming_sessions = []
+        for session_date, group_time, group_id, group_name in occurrences:
+            assigned_coach = assigned_coaches.get(group_time.id)
             
-            # Get the day of week for this group time
-            day_of_week = group_time.day_of_week.name  # e.g., "MONDAY"
-            
-            # Find dates with this day of week
-            for check_date in upcoming_dates:
-                if check_date.strftime('%A').upper() == day_of_week:
-                    # Check if register already exists for this date and group time
-                    existing_register = Register.query.filter_by(
-                        group_time_id=group_time.id,
-                        date=check_date,
-                        teaching_period_id=teaching_period_id
-                    ).first()
-                    
-                    if not existing_register:
-                        # Get group and coach info
-                        group = group_time.tennis_group
-                        
-                        # Get assigned coach for this group time in this period
-                        assigned_coach = db.session.query(User).join(
-                            ProgrammePlayers, User.id == ProgrammePlayers.coach_id
-                        ).filter(
-                            ProgrammePlayers.group_time_id == group_time.id,
-                            ProgrammePlayers.teaching_period_id == current_period.id
-                        ).first()
-                        
-                        # Add to upcoming sessions
-                        upcoming_sessions.append({
-                            'date': check_date.isoformat(),
-                            'group_time': {
-                                'id': group_time.id,
-                                'day': group_time.day_of_week.value,
-                                'start_time': group_time.start_time.strftime('%H:%M'),
-                                'end_time': group_time.end_time.strftime('%H:%M')
-                            },
-                            'group': {
-                                'id': group.id,
-                                'name': group.name
-                            },
-                            'teaching_period': {
-                                'id': current_period.id,
-                                'name': current_period.name
-                            },
-                            'coach': {
-                                'id': assigned_coach.id if assigned_coach else None,
-                                'name': assigned_coach.name if assigned_coach else 'Not assigned'
-                            }
-                        })
+            upcoming_sessions.append({
+                'date': session_date.isoformat(),
+                'group_time': {
+                    'id': group_time.id,
+                    'day': group_time.day_of_week.value,
+                    'start_time': group_time.start_time.strftime('%H:%M'),
+                    'end_time': group_time.end_time.strftime('%H:%M')
+                },
+                'group': {
+                    'id': group_id,
+                    'name': group_name
+                },
+                'teaching_period': {
+                    'id': current_period.id,
+                    'name': current_period.name
+                },
+                'coach': {
+                    'id': assigned_coach['id'] if assigned_coach else None,
+                    'name': assigned_coach['name'] if assigned_coach else 'Not assigned'
+                }
+            })
                         
         # Sort by date
         upcoming_sessions.sort(key=lambda x: x['date'])
@@ -936,57 +1148,64 @@ def get_attendance_stats():
         if not teaching_period_id:
             return jsonify({'error': 'Teaching period ID is required'}), 400
             
-        # Base query for register entries
-        query = db.session.query(
-            RegisterEntry, Register, TennisGroupTimes, TennisGroup, Student
-        ).join(
-            Register, RegisterEntry.register_id == Register.id
-        ).join(
-            TennisGroupTimes, Register.group_time_id == TennisGroupTimes.id
-        ).join(
-            TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
-        ).join(
-            ProgrammePlayers, RegisterEntry.programme_player_id == ProgrammePlayers.id
-        ).join(
-            Student, ProgrammePlayers.student_id == Student.id
-        ).filter(
-            Register.tennis_club_id == current_user.tennis_club_id,
-            Register.teaching_period_id == teaching_period_id
-        )
+        # Stats are summed from the attendance rollups rather than scanning entries
+        filters = [
+            AttendanceRollup.tennis_club_id == current_user.tennis_club_id,
+            AttendanceRollup.teaching_period_id == teaching_period_id
+        ]
         
         # Apply optional filters
         if group_id:
-            query = query.filter(TennisGroup.id == group_id)
+            filters.append(AttendanceRollup.group_time_id.in_(
+                db.session.query(TennisGroupTimes.id).filter(TennisGroupTimes.group_id == group_id)
+            ))
             
         if student_id:
-            query = query.filter(Student.id == student_id)
+            filters.append(AttendanceRollup.programme_player_id.in_(
+                db.session.query(ProgrammePlayers.id).filter(ProgrammePlayers.student_id == student_id)
+            ))
             
         # Handle coach filtering
         coach_filter = None
         if not (current_user.is_admin or current_user.is_super_admin):
             # Non-admin users can only see their assigned registers
             coach_filter = Register.coach_id == current_user.id
-            query = query.filter(coach_filter)
+            filters.append(AttendanceRollup.coach_id == current_user.id)
         elif coach_id:  # Admin filtering by specific coach
             # Allow admins to filter by a specific coach
             coach_filter = Register.coach_id == coach_id
-            query = query.filter(coach_filter)
-            
-        entries = query.all()
+            filters.append(AttendanceRollup.coach_id == coach_id)
+            
+        count_columns = [
+            func.coalesce(func.sum(AttendanceRollup.total_count), 0).label('total'),
+            func.coalesce(func.sum(AttendanceRollup.present_count), 0).label('present'),
+            func.coalesce(func.sum(AttendanceRollup.absent_count), 0).label('absent'),
+            func.coalesce(func.sum(AttendanceRollup.sick_count), 0).label('sick'),
+            func.coalesce(func.sum(AttendanceRollup.away_with_notice_count), 0).label('away_with_notice')
+        ]
+        
+        def build_stats(row):
+            # UPDATED: Only count PRESENT as attendance (not away_with_notice)
+            return {
+                'id': row.id,
+                'name': row.name,
+                'total': row.total,
+                'present': row.present,
+                'absent': row.absent,
+                'sick': row.sick,
+                'away_with_notice': row.away_with_notice,
+                'attendance_rate': round((row.present / row.total * 100), 1) if row.total > 0 else 0
+            }
         
         # Process results based on requested type
         stats_type = request.args.get('type', 'summary')
         
         if stats_type == 'summary':
             # Overall summary statistics
-            total_entries = len(entries)
-            present_count = sum(1 for entry, *_ in entries if entry.attendance_status == AttendanceStatus.PRESENT)
-            absent_count = sum(1 for entry, *_ in entries if entry.attendance_status == AttendanceStatus.ABSENT)
-            sick_count = sum(1 for entry, *_ in entries if entry.attendance_status == AttendanceStatus.SICK)
-            away_with_notice_count = sum(1 for entry, *_ in entries if entry.attendance_status == AttendanceStatus.AWAY_WITH_NOTICE)
+            totals = db.session.query(*count_columns).filter(*filters).one()
             
             # UPDATED: Only count PRESENT as attendance (not away_with_notice)
-            attendance_rate = round((present_count / total_entries * 100), 1) if total_entries > 0 else 0
+            attendance_rate = round((totals.present / totals.total * 100), 1) if totals.total > 0 else 0
             
             # Apply the same coach filter to the register count query
             register_query = db.session.query(func.count(distinct(Register.id))).filter(
@@ -995,96 +1214,52 @@ def get_attendance_stats():
             )
             
             # Apply the same coach filter to register count
-            if coach_filter:
+            if coach_filter is not None:
                 register_query = register_query.filter(coach_filter)
                 
             register_count = register_query.scalar()
 
             return jsonify({
                 'total_registers': register_count,  
-                'total_sessions': total_entries,   
-                'present': present_count,
-                'absent': absent_count,
-                'sick': sick_count,
-                'away_with_notice': away_with_notice_count,
+                'total_sessions': totals.total,   
+                'present': totals.present,
+                'absent': totals.absent,
+                'sick': totals.sick,
+                'away_with_notice': totals.away_with_notice,
                 'attendance_rate': attendance_rate
             })
             
         elif stats_type == 'by_group':
             # Stats grouped by tennis group
-            group_stats = {}
-            
-            for entry, register, time_slot, group, student in entries:
-                group_id = group.id
-                
-                if group_id not in group_stats:
-                    group_stats[group_id] = {
-                        'id': group_id,
-                        'name': group.name,
-                        'total': 0,
-                        'present': 0,
-                        'absent': 0,
-                        'sick': 0,
-                        'away_with_notice': 0
-                    }
-                    
-                group_stats[group_id]['total'] += 1
-                
-                # Use direct enum comparison for counting
-                if entry.attendance_status == AttendanceStatus.PRESENT:
-                    group_stats[group_id]['present'] += 1
-                elif entry.attendance_status == AttendanceStatus.ABSENT:
-                    group_stats[group_id]['absent'] += 1
-                elif entry.attendance_status == AttendanceStatus.SICK:
-                    group_stats[group_id]['sick'] += 1
-                elif entry.attendance_status == AttendanceStatus.AWAY_WITH_NOTICE:
-                    group_stats[group_id]['away_with_notice'] += 1
-            
-            # Calculate attendance rates - UPDATED: Only count PRESENT as attendance
-            for stats in group_stats.values():
-                stats['attendance_rate'] = round(
-                    (stats['present'] / stats['total'] * 100), 1
-                ) if stats['total'] > 0 else 0
+            rows = db.session.query(
+                TennisGroup.id, TennisGroup.name, *count_columns
+            ).select_from(
+                AttendanceRollup
+            ).join(
+                TennisGroupTimes, AttendanceRollup.group_time_id == TennisGroupTimes.id
+            ).join(
+                TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
+            ).filter(*filters).group_by(
+                TennisGroup.id, TennisGroup.name
+            ).all()
                 
-            return jsonify(list(group_stats.values()))
+            return jsonify([build_stats(row) for row in rows])
             
         elif stats_type == 'by_student':
             # Stats grouped by student
-            student_stats = {}
-            
-            for entry, register, time_slot, group, student in entries:
-                student_id = student.id
-                
-                if student_id not in student_stats:
-                    student_stats[student_id] = {
-                        'id': student_id,
-                        'name': student.name,
-                        'total': 0,
-                        'present': 0,
-                        'absent': 0,
-                        'sick': 0,
-                        'away_with_notice': 0
-                    }
-                    
-                student_stats[student_id]['total'] += 1
-                
-                # Use direct enum comparison for counting
-                if entry.attendance_status == AttendanceStatus.PRESENT:
-                    student_stats[student_id]['present'] += 1
-                elif entry.attendance_status == AttendanceStatus.ABSENT:
-                    student_stats[student_id]['absent'] += 1
-                elif entry.attendance_status == AttendanceStatus.SICK:
-                    student_stats[student_id]['sick'] += 1
-                elif entry.attendance_status == AttendanceStatus.AWAY_WITH_NOTICE:
-                    student_stats[student_id]['away_with_notice'] += 1
-            
-            # Calculate attendance rates - UPDATED: Only count PRESENT as attendance
-            for stats in student_stats.values():
-                stats['attendance_rate'] = round(
-                    (stats['present'] / stats['total'] * 100), 1
-                ) if stats['total'] > 0 else 0
+            rows = db.session.query(
+                Student.id, Student.name, *count_columns
+            ).select_from(
+                AttendanceRollup
+            ).join(
+                ProgrammePlayers, AttendanceRollup.programme_player_id == ProgrammePlayers.id
+            ).join(
+                Student, ProgrammePlayers.student_id == Student.id
+            ).filter(*filters).group_by(
+                Student.id, Student.name
+            ).all()
                 
-            return jsonify(list(student_stats.values()))
+            return jsonify([build_stats(row) for row in rows])
             
         else:
             return jsonify({'error': 'Invalid stats type'}), 400
@@ -1094,6 +1269,58 @@ def get_attendance_stats():
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@register_routes.route('/registers/absence-streaks')
+@login_required
+@verify_club_access()
+def get_players_at_risk():
+    """Get players whose current run of consecutive absences has reached a threshold"""
+    try:
+        teaching_period_id = request.args.get('period_id', type=int)
+        min_streak = request.args.get('min_streak', 2, type=int)
+        
+        if not teaching_period_id:
+            return jsonify({'error': 'Teaching period ID is required'}), 400
+            
+        query = db.session.query(
+            AbsenceStreak, ProgrammePlayers, Student, TennisGroup
+        ).join(
+            ProgrammePlayers, AbsenceStreak.programme_player_id == ProgrammePlayers.id
+        ).join(
+            Student, ProgrammePlayers.student_id == Student.id
+        ).join(
+            TennisGroup, ProgrammePlayers.group_id == TennisGroup.id
+        ).filter(
+            AbsenceStreak.tennis_club_id == current_user.tennis_club_id,
+            AbsenceStreak.teaching_period_id == teaching_period_id,
+            AbsenceStreak.current_streak >= max(min_streak, 1)
+        )
+        
+        # Coaches only see the players assigned to them
+        if not (current_user.is_admin or current_user.is_super_admin):
+            query = query.filter(ProgrammePlayers.coach_id == current_user.id)
+            
+        results = query.order_by(
+            AbsenceStreak.current_streak.desc(),
+            Student.name
+        ).all()
+        
+        return jsonify([{
+            'player_id': player.id,
+            'student_id': student.id,
+            'student_name': student.name,
+            'contact_email': student.contact_email,
+            'group_id': group.id,
+            'group_name': group.name,
+            'group_time_id': player.group_time_id,
+            'consecutive_absences': streak.current_streak,
+            'last_register_date': streak.last_register_date.isoformat()
+        } for streak, player, student, group in results])
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching players at risk: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @register_routes.route('/group-time-players')
 @login_required
 @verify_club_access()
@@ -1945,112 +2172,12 @@ def get_consecutive_absence_count(player_id, teaching_period_id, up_to_date=None
         current_app.logger.error(f"Error calculating consecutive absences: {str(e)}")
         return 0
 
-def send_absence_notification_email(programme_player, register, absence_count):
-    """
-    Send email notification to parent/guardian about consecutive absences.
-    
-    Args:
-        programme_player: ProgrammePlayers object
-        register: Register object where the absence was recorded
-        absence_count: Number of consecutive absences
-    """
-    try:
-        student = programme_player.student
-        club = programme_player.tennis_club
-        group = programme_player.tennis_group
-        
-        # Verify we have an email address to send to
-        if not student.contact_email:
-            current_app.logger.warning(f"Cannot send absence email - no contact email for student {student.name}")
-            return False
-        
-        # Get time information from the register's group_time
-        time_display = "session"  # Default fallback
-        day_display = ""
-        
-        if register.group_time:
-            group_time = register.group_time
-            if group_time.start_time and group_time.end_time:
-                time_display = f"{group_time.start_time.strftime('%H:%M')}-{group_time.end_time.strftime('%H:%M')}"
-            
-            if group_time.day_of_week:
-                day_display = f"{group_time.day_of_week.value} "
-        
-        # Combine day and time for a complete session description
-        session_description = f"{day_display}{time_display}"
-        full_session_name = f"{group.name} ({session_description})"
-        
-        # Prepare email subject and content
-        email_subject = f"Attendance Notice for {student.name} - {group.name}"
-        
-        # Check if this is a Wilton club (contains "Wilton" in the name) for customized email content
-        if "wilton" in club.name.lower():
-            # Wilton-specific email content
-            email_html = f"""
-            <html>
-                <body style="font-family: Arial, Helvetica, sans-serif; line-height: 1.6; color: #333;">
-                    <div style="max-width: 600px; margin: 0 auto;">
-                        <div style="margin-bottom: 30px;">
-                            <p>Dear {student.name} or Parent/Guardian,</p>
-                            <p>We've noticed that <strong>{student.name}</strong> has missed the <strong>{full_session_name}</strong> session 3 times in a row.</p>
-                            <p>We wanted to check in to see if there were any issues with the session and whether you are planning on being there in future weeks.</p>
-                            <p>If there's anything you want to discuss, please get in contact with Marc using the following email: headcoach@wiltontennisclub.co.uk.</p>
-                            <p>Thanks,<br>Marc Beckles, Head Coach</p>
-                        </div>
-                        <div style="font-size: 0.9em; color: #666; border-top: 1px solid #eee; padding-top: 15px;">
-                            <p>This is an automated attendance notification from {club.name}.</p>
-                            <p>Please do not reply to this email.</p>
-                        </div>
-                    </div>
-                </body>
-            </html>
-            """
-        else:
-            # Generic email content for all other clubs
-            email_html = f"""
-            <html>
-                <body style="font-family: Arial, Helvetica, sans-serif; line-height: 1.6; color: #333;">
-                    <div style="max-width: 600px; margin: 0 auto;">
-                        <div style="margin-bottom: 30px;">
-                            <p>Dear {student.name} or Parent/Guardian,</p>
-                            <p>We've noticed that <strong>{student.name}</strong> has missed the <strong>{full_session_name}</strong> session 3 times in a row.</p>
-                            <p>We wanted to check in to see if there were any issues with the session and whether you are planning on being there in future weeks.</p>
-                            <p>If there's anything you want to discuss, please get in contact with the {club.name} coaching team.</p>
-                            <p>Thanks,<br>{club.name}</p>
-                        </div>
-                        <div style="font-size: 0.9em; color: #666; border-top: 1px solid #eee; padding-top: 15px;">
-                            <p>This is an automated attendance notification from {club.name}.</p>
-                            <p>Please do not reply to this email.</p>
-                        </div>
-                    </div>
-                </body>
-            </html>
-            """
-        
-        # Send email using the existing email service
-        email_service = EmailService()
-        success, result = email_service.send_generic_email(
-            recipient_email=student.contact_email,
-            subject=email_subject,
-            html_content=email_html,
-            sender_name=club.name
-        )
-        
-        if success:
-            current_app.logger.info(f"Absence notification email sent successfully to {student.contact_email} for {student.name} - {full_session_name}")
-            return True
-        else:
-            current_app.logger.error(f"Failed to send absence notification email: {result}")
-            return False
-            
-    except Exception as e:
-        current_app.logger.error(f"Error sending absence notification email: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
-        return False
-
 def process_absence_notifications(register_id):
     """
-    Check all absent players in a register and send emails for those with exactly 3 consecutive absences.
+    Check all absent players in a register and queue emails for those with exactly 3 consecutive absences.
+    
+    Emails are queued on the notification outbox in the caller's transaction and
+    delivered by worker.py, so saving a register never waits on SES.
     
     Args:
         register_id: ID of the register that was just created/updated
@@ -2067,18 +2194,38 @@ def process_absence_notifications(register_id):
             attendance_status=AttendanceStatus.ABSENT
         ).all()
         
+        # Load the stored streaks for every absent player in one query
+        streaks = {
+            streak.programme_player_id: streak
+            for streak in AbsenceStreak.query.filter(
+                AbsenceStreak.teaching_period_id == register.teaching_period_id,
+                AbsenceStreak.programme_player_id.in_([entry.programme_player_id for entry in absent_entries])
+            ).all()
+        } if absent_entries else {}
+        
         # Process each absent player
         for entry in absent_entries:
-            # Count their consecutive absences up to this register's date
-            consecutive_absences = get_consecutive_absence_count(
-                entry.programme_player_id,
-                register.teaching_period_id,
-                register.date
-            )
-            # Send email only if this is exactly the 3rd consecutive absence
+            streak = streaks.get(entry.programme_player_id)
+            if streak and streak.last_register_date <= register.date:
+                # This is the player's latest register, so the stored streak applies
+                consecutive_absences = streak.current_streak
+            else:
+                # An older register was edited - count back from its date instead
+                consecutive_absences = get_consecutive_absence_count(
+                    entry.programme_player_id,
+                    register.teaching_period_id,
+                    register.date
+                )
+            # Queue email only if this is exactly the 3rd consecutive absence
             if consecutive_absences == 3:
                 programme_player = entry.programme_player
-                send_absence_notification_email(programme_player, register, consecutive_absences)
+                if not programme_player.student.contact_email:
+                    current_app.logger.warning(f"Cannot send absence email - no contact email for student {programme_player.student.name}")
+                    continue
+                
+                # Savepoint so a failed enqueue can't roll back the register save
+                with db.session.begin_nested():
+                    enqueue_absence_notification(programme_player, register, consecutive_absences)
                 
     except Exception as e:
         current_app.logger.error(f"Error processing absence notifications for register {register_id}: {str(e)}")
@@ -2162,85 +2309,73 @@ def get_register_calendar():
             TennisGroup.name
         ).all()
         
-        # Generate all potential session dates within the range
-        sessions = []
-        current_date = start_date_obj
-        
-        # Map day names to Python weekday numbers (Monday = 0)
-        day_mapping = {
-            DayOfWeek.MONDAY: 0,
-            DayOfWeek.TUESDAY: 1,
-            DayOfWeek.WEDNESDAY: 2,
-            DayOfWeek.THURSDAY: 3,
-            DayOfWeek.FRIDAY: 4,
-            DayOfWeek.SATURDAY: 5,
-            DayOfWeek.SUNDAY: 6
-        }
+        group_times_by_id = {group_time.id: group_time for group_time in coach_group_times}
+        if not group_times_by_id:
+            return jsonify([])
         
-        while current_date <= end_date_obj:
-            current_weekday = current_date.weekday()
-            
-            # Find group times that match this day
-            for group_time in coach_group_times:
-                if day_mapping.get(group_time.day_of_week) == current_weekday:
-                    # Check if a register exists for this session
-                    existing_register = Register.query.filter_by(
-                        group_time_id=group_time.id,
-                        date=current_date,
-                        teaching_period_id=teaching_period_id,
-                        tennis_club_id=current_user.tennis_club_id
-                    ).first()
-                    
-                    # Only include sessions for non-admin users that belong to them
-                    if not current_user.is_admin:
-                        if existing_register and existing_register.coach_id != current_user.id:
-                            continue
-                    
-                    # Check if session is cancelled (using 3 arguments)
-                    is_cancelled, cancellation_reason = is_session_cancelled(
-                        group_time.id,
-                        current_date,
-                        current_user.tennis_club_id
-                    )
-                    
-                    # Skip cancelled sessions unless include_cancelled is True
-                    if is_cancelled and not include_cancelled:
-                        continue
-                    
-                    # Get assigned coach for this group time in this period
-                    assigned_coach = db.session.query(User).join(
-                        ProgrammePlayers, User.id == ProgrammePlayers.coach_id
-                    ).filter(
-                        ProgrammePlayers.group_time_id == group_time.id,
-                        ProgrammePlayers.teaching_period_id == teaching_period_id
-                    ).first()
-                    
-                    session_data = {
-                        'id': f"{group_time.id}-{current_date.strftime('%Y%m%d')}",
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'day_of_week': group_time.day_of_week.value,
-                        'start_time': group_time.start_time.strftime('%H:%M'),
-                        'end_time': group_time.end_time.strftime('%H:%M'),
-                        'time_display': f"{group_time.start_time.strftime('%H:%M')}-{group_time.end_time.strftime('%H:%M')}",
-                        'group_id': group_time.group_id,
-                        'group_name': group_time.group_name,
-                        'group_time_id': group_time.id,
-                        'student_count': group_time.student_count,
-                        'has_register': existing_register is not None,
-                        'register_id': existing_register.id if existing_register else None,
-                        'teaching_period_id': teaching_period_id,
-                        'coach': {
-                            'id': assigned_coach.id if assigned_coach else None,
-                            'name': assigned_coach.name if assigned_coach else 'Not assigned'
-                        },
-                        'is_cancelled': is_cancelled,
-                        'cancellation_reason': cancellation_reason,
-                        'status': 'cancelled' if is_cancelled else ('completed' if existing_register else 'scheduled')
-                    }
-                    
-                    sessions.append(session_data)
+        ensure_period_occurrences(current_user.tennis_club_id, teaching_period_id)
+        
+        # Every session in the range with its register and cancellation status
+        occurrences = db.session.query(
+            SessionOccurrence.group_time_id,
+            SessionOccurrence.date,
+            SessionOccurrence.register_id,
+            SessionOccurrence.is_cancelled,
+            SessionOccurrence.cancellation_reason,
+            Register.coach_id.label('register_coach_id')
+        ).outerjoin(
+            Register, SessionOccurrence.register_id == Register.id
+        ).filter(
+            SessionOccurrence.tennis_club_id == current_user.tennis_club_id,
+            SessionOccurrence.teaching_period_id == teaching_period_id,
+            SessionOccurrence.group_time_id.in_(group_times_by_id.keys()),
+            SessionOccurrence.date >= start_date_obj,
+            SessionOccurrence.date <= end_date_obj
+        ).all()
+        
+        assigned_coaches = get_assigned_coaches(list(group_times_by_id.keys()), teaching_period_id)
+        
+        sessions = []
+        for occurrence in occurrences:
+            group_time = group_times_by_id[occurrence.group_time_id]
+            session_date = occurrence.date
+            has_register = occurrence.register_id is not None
+            
+            # Only include sessions for non-admin users that belong to them
+            if not current_user.is_admin:
+                if has_register and occurrence.register_coach_id != current_user.id:
+                    continue
+            
+            # Skip cancelled sessions unless include_cancelled is True
+            if occurrence.is_cancelled and not include_cancelled:
+                continue
+            
+            assigned_coach = assigned_coaches.get(group_time.id)
+            
+            session_data = {
+                'id': f"{group_time.id}-{session_date.strftime('%Y%m%d')}",
+                'date': session_date.strftime('%Y-%m-%d'),
+                'day_of_week': group_time.day_of_week.value,
+                'start_time': group_time.start_time.strftime('%H:%M'),
+                'end_time': group_time.end_time.strftime('%H:%M'),
+                'time_display': f"{group_time.start_time.strftime('%H:%M')}-{group_time.end_time.strftime('%H:%M')}",
+                'group_id': group_time.group_id,
+                'group_name': group_time.group_name,
+                'group_time_id': group_time.id,
+                'student_count': group_time.student_count,
+                'has_register': has_register,
+                'register_id': occurrence.register_id,
+                'teaching_period_id': teaching_period_id,
+                'coach': {
+                    'id': assigned_coach['id'] if assigned_coach else None,
+                    'name': assigned_coach['name'] if assigned_coach else 'Not assigned'
+                },
+                'is_cancelled': occurrence.is_cancelled,
+                'cancellation_reason': occurrence.cancellation_reason,
+                'status': 'cancelled' if occurrence.is_cancelled else ('completed' if has_register else 'scheduled')
+            }
             
-            current_date += timedelta(days=1)
+            sessions.append(session_data)
         
         # Sort sessions by date and time
         sessions.sort(key=lambda x: (x['date'], x['start_time']))
@@ -2324,45 +2459,27 @@ def get_register_calendar_summary():
         
         total_registers = registers_query.count()
         
+        ensure_period_occurrences(current_user.tennis_club_id, teaching_period_id)
+        
         # Count overdue registers (excluding cancelled sessions)
-        overdue_registers = 0
-        overdue_query = registers_query.filter(Register.date < today)
-        
-        for register in overdue_query.all():
-            # Check if this register's session was cancelled (using 3 arguments)
-            is_cancelled, _ = is_session_cancelled(
-                register.group_time_id,
-                register.date,
-                current_user.tennis_club_id
-            )
-            if not is_cancelled:
-                overdue_registers += 1
-        
-        # Calculate estimated total sessions (rough estimate) excluding cancelled ones
-        teaching_period = TeachingPeriod.query.get(teaching_period_id)
-        cancelled_sessions_count = 0
-        
-        if teaching_period:
-            term_weeks = ((teaching_period.end_date - teaching_period.start_date).days + 1) // 7
-            estimated_total_sessions = len(coach_sessions) * term_weeks
-            
-            # Count cancelled sessions in the period
-            cancelled_sessions = get_cancelled_sessions_in_range(
-                teaching_period.start_date,
-                teaching_period.end_date,
-                current_user.tennis_club_id,
-                teaching_period_id
-            )
-            cancelled_sessions_count = len(cancelled_sessions)
-            
-            # Filter cancelled sessions by coach if not admin
-            if not current_user.is_admin:
-                # This is a simplified approach - count all cancelled sessions for now
-                pass
-            
-            estimated_total_sessions = max(0, estimated_total_sessions - cancelled_sessions_count)
-        else:
-            estimated_total_sessions = 0
+        overdue_registers = registers_query.outerjoin(
+            SessionOccurrence, SessionOccurrence.register_id == Register.id
+        ).filter(
+            Register.date < today,
+            func.coalesce(SessionOccurrence.is_cancelled, False) == False
+        ).count()
+        
+        # Count scheduled and cancelled sessions for the coach's group times in one scan
+        session_counts = db.session.query(
+            func.count(SessionOccurrence.id).filter(SessionOccurrence.is_cancelled == False),
+            func.count(SessionOccurrence.id).filter(SessionOccurrence.is_cancelled == True)
+        ).filter(
+            SessionOccurrence.tennis_club_id == current_user.tennis_club_id,
+            SessionOccurrence.teaching_period_id == teaching_period_id,
+            SessionOccurrence.group_time_id.in_([session.id for session in coach_sessions])
+        ).one()
+        
+        estimated_total_sessions, cancelled_sessions_count = session_counts
         
         completion_rate = (total_registers / estimated_total_sessions * 100) if estimated_total_sessions > 0 else 0
         
@@ -2430,12 +2547,13 @@ def quick_create_register():
         
         # OPTIONAL: Try to apply session plan first (if admin has created one)
         # If no session plan exists, we'll use the original logic below
-        plan_found, plan_entries_added, trial_players_info = apply_session_plan_to_register(
+        plan_found, planned_entries, trial_players_info = apply_session_plan_to_register(
             register, 
             data['group_time_id'], 
             register_date, 
             data['teaching_period_id']
         )
+        plan_entries_added = len(planned_entries)
         
         response_data = {
             'message': 'Register created successfully',
@@ -2447,6 +2565,7 @@ def quick_create_register():
         
         if plan_found:
             # SESSION PLAN FOUND - Use planned attendance
+            upsert_register_entries(register.id, planned_entries.values())
             current_app.logger.info(f"Quick register {register.id} created using session plan with {plan_entries_added} planned entries")
             response_data['student_count'] = plan_entries_added
         else:
@@ -2454,23 +2573,35 @@ def quick_create_register():
             current_app.logger.info(f"No session plan found for quick register {register.id}, using standard player population")
             
             # Pre-populate with students from this group/time
-            players = ProgrammePlayers.query.filter_by(
+            players = db.session.query(ProgrammePlayers.id).filter_by(
                 group_time_id=data['group_time_id'],
                 teaching_period_id=data['teaching_period_id'],
                 tennis_club_id=current_user.tennis_club_id
             ).all()
             
-            for player in players:
-                entry = RegisterEntry(
-                    register_id=register.id,
-                    programme_player_id=player.id,
-                    attendance_status=AttendanceStatus.ABSENT,  # Default to absent
-                    predicted_attendance=False
-                )
-                db.session.add(entry)
+            upsert_register_entries(register.id, [{
+                'programme_player_id': player.id,
+                'attendance_status': AttendanceStatus.ABSENT,  # Default to absent
+                'notes': None,
+                'predicted_attendance': False
+            } for player in players])
             
             response_data['student_count'] = len(players)
         
+        # Link the new register to its session occurrence
+        refresh_occurrence_links(
+            current_user.tennis_club_id,
+            data['teaching_period_id'],
+            data['group_time_id'],
+            register_date,
+            register_date
+        )
+
+        # Fold the new entries into the attendance rollups and absence streaks
+        db.session.flush()
+        refresh_register_rollups(register)
+        update_absence_streaks(register)
+        
         db.session.commit()
         
         return jsonify(response_data), 201
@@ -2481,6 +2612,244 @@ def quick_create_register():
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
     
+@register_routes.route('/register-calendar/bulk-create', methods=['POST'])
+@login_required
+@admin_required
+@verify_club_access()
+def bulk_create_registers():
+    """Create every missing register for a date range in a single transaction"""
+    try:
+        data = request.get_json() or {}
+        
+        if 'start_date' not in data:
+            return jsonify({'error': 'Missing required field: start_date'}), 400
+        
+        # Parse dates (a single day if no end date is given)
+        try:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(data.get('end_date') or data['start_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        if end_date < start_date:
+            return jsonify({'error': 'end_date must be on or after start_date'}), 400
+            
+        if (end_date - start_date).days > 31:
+            return jsonify({'error': 'Date range cannot exceed 31 days'}), 400
+        
+        # Optional filters
+        try:
+            teaching_period_id, group_id, coach_id = (
+                int(data[key]) if data.get(key) else None
+                for key in ('period_id', 'group_id', 'coach_id')
+            )
+        except (TypeError, ValueError):
+            return jsonify({'error': 'period_id, group_id and coach_id must be integers'}), 400
+            
+        club_id = current_user.tennis_club_id
+        
+        # Make sure occurrences exist for every period overlapping the range
+        periods_query = db.session.query(TeachingPeriod.id).filter(
+            TeachingPeriod.tennis_club_id == club_id,
+            TeachingPeriod.start_date <= end_date,
+            TeachingPeriod.end_date >= start_date
+        )
+        if teaching_period_id:
+            periods_query = periods_query.filter(TeachingPeriod.id == teaching_period_id)
+            
+        period_ids = [period.id for period in periods_query.all()]
+        for period_id in period_ids:
+            ensure_period_occurrences(club_id, period_id)
+        
+        occurrences_query = db.session.query(
+            SessionOccurrence,
+            TennisGroup.id.label('group_id'),
+            TennisGroup.name.label('group_name')
+        ).join(
+            TennisGroupTimes, SessionOccurrence.group_time_id == TennisGroupTimes.id
+        ).join(
+            TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
+        ).filter(
+            SessionOccurrence.tennis_club_id == club_id,
+            SessionOccurrence.teaching_period_id.in_(period_ids),
+            SessionOccurrence.date >= start_date,
+            SessionOccurrence.date <= end_date,
+            # Only slots that actually have players in the period
+            db.session.query(ProgrammePlayers.id).filter(
+                ProgrammePlayers.group_time_id == SessionOccurrence.group_time_id,
+                ProgrammePlayers.teaching_period_id == SessionOccurrence.teaching_period_id,
+                ProgrammePlayers.tennis_club_id == club_id
+            ).exists()
+        )
+        if group_id:
+            occurrences_query = occurrences_query.filter(TennisGroup.id == group_id)
+            
+        occurrences = occurrences_query.order_by(
+            SessionOccurrence.date, SessionOccurrence.group_time_id
+        ).all()
+        
+        # Resolve the assigned coach of each group time, per period
+        group_time_ids_by_period = {}
+        for occurrence, _, _ in occurrences:
+            group_time_ids_by_period.setdefault(occurrence.teaching_period_id, set()).add(occurrence.group_time_id)
+        assigned_coaches = {
+            period_id: get_assigned_coaches(group_time_ids, period_id)
+            for period_id, group_time_ids in group_time_ids_by_period.items()
+        }
+        
+        # Guard against registers the occurrence links haven't caught up with
+        session_keys = [
+            (occurrence.group_time_id, occurrence.date, occurrence.teaching_period_id)
+            for occurrence, _, _ in occurrences
+        ]
+        existing_registers = {
+            (register.group_time_id, register.date, register.teaching_period_id): register.id
+            for register in db.session.query(
+                Register.id, Register.group_time_id, Register.date, Register.teaching_period_id
+            ).filter(
+                tuple_(Register.group_time_id, Register.date, Register.teaching_period_id).in_(session_keys)
+            ).all()
+        } if session_keys else {}
+        
+        to_create = []
+        skipped = []
+        for occurrence, occurrence_group_id, group_name in occurrences:
+            assigned_coach = assigned_coaches[occurrence.teaching_period_id].get(occurrence.group_time_id)
+            
+            if coach_id and (not assigned_coach or assigned_coach['id'] != coach_id):
+                continue
+            
+            session_info = {
+                'date': occurrence.date.isoformat(),
+                'group_time_id': occurrence.group_time_id,
+                'group_id': occurrence_group_id,
+                'group_name': group_name,
+                'teaching_period_id': occurrence.teaching_period_id
+            }
+            
+            register_id = occurrence.register_id or existing_registers.get(
+                (occurrence.group_time_id, occurrence.date, occurrence.teaching_period_id)
+            )
+            
+            if occurrence.is_cancelled:
+                skipped.append({**session_info, 'reason': 'cancelled', 'cancellation_reason': occurrence.cancellation_reason})
+            elif register_id:
+                skipped.append({**session_info, 'reason': 'register_exists', 'register_id': register_id})
+            else:
+                to_create.append((occurrence, session_info, assigned_coach))
+        
+        if not to_create:
+            return jsonify({
+                'message': 'No registers to create',
+                'created': [],
+                'skipped': skipped,
+                'created_count': 0,
+                'skipped_count': len(skipped)
+            })
+        
+        # Load regular players and active session plans for all sessions at once
+        players_by_session = {}
+        for player in db.session.query(
+            ProgrammePlayers.id, ProgrammePlayers.group_time_id, ProgrammePlayers.teaching_period_id
+        ).filter(
+            ProgrammePlayers.tennis_club_id == club_id,
+            ProgrammePlayers.teaching_period_id.in_(group_time_ids_by_period.keys()),
+            ProgrammePlayers.group_time_id.in_({occurrence.group_time_id for occurrence, _, _ in to_create})
+        ).order_by(ProgrammePlayers.id).all():
+            players_by_session.setdefault((player.group_time_id, player.teaching_period_id), []).append(player.id)
+        
+        from app.models.session_planning import SessionPlanEntry
+        session_plans = {
+            (plan.group_time_id, plan.date, plan.teaching_period_id): plan
+            for plan in SessionPlan.query.options(
+                selectinload(SessionPlan.plan_entries).joinedload(SessionPlanEntry.programme_player)
+            ).filter(
+                SessionPlan.tennis_club_id == club_id,
+                SessionPlan.is_active == True,
+                tuple_(SessionPlan.group_time_id, SessionPlan.date, SessionPlan.teaching_period_id).in_([
+                    (occurrence.group_time_id, occurrence.date, occurrence.teaching_period_id)
+                    for occurrence, _, _ in to_create
+                ])
+            ).all()
+        }
+        
+        # Insert all registers in one statement
+        register_rows = []
+        for occurrence, _, assigned_coach in to_create:
+            session_plan = session_plans.get((occurrence.group_time_id, occurrence.date, occurrence.teaching_period_id))
+            register_rows.append({
+                'group_time_id': occurrence.group_time_id,
+                'coach_id': assigned_coach['id'] if assigned_coach else current_user.id,
+                'date': occurrence.date,
+                'teaching_period_id': occurrence.teaching_period_id,
+                'notes': f"From session plan: {session_plan.notes}" if session_plan and session_plan.notes else '',
+                'tennis_club_id': club_id
+            })
+            
+        created_registers = db.session.execute(
+            insert(Register).values(register_rows).returning(
+                Register.id, Register.group_time_id, Register.date, Register.teaching_period_id, Register.coach_id
+            )
+        ).all()
+        created_by_session = {
+            (register.group_time_id, register.date, register.teaching_period_id): register
+            for register in created_registers
+        }
+        
+        # Build every register's entries in memory, then insert them in one statement
+        entry_rows = []
+        created = []
+        for occurrence, session_info, _ in to_create:
+            session_key = (occurrence.group_time_id, occurrence.date, occurrence.teaching_period_id)
+            register = created_by_session[session_key]
+            
+            register_entries, regular_entries_added, makeup_entries_added = build_register_entries(
+                occurrence.group_time_id,
+                players_by_session.get((occurrence.group_time_id, occurrence.teaching_period_id), []),
+                session_plans.get(session_key)
+            )
+            entry_rows.extend(dict(entry, register_id=register.id) for entry in register_entries.values())
+            
+            created.append({
+                **session_info,
+                'register_id': register.id,
+                'coach_id': register.coach_id,
+                'used_session_plan': session_key in session_plans,
+                'total_entries': regular_entries_added + makeup_entries_added
+            })
+            
+        upsert_register_entry_rows(entry_rows)
+        
+        # Link occurrences and fold the new entries into rollups and streaks
+        for period_id in group_time_ids_by_period:
+            refresh_occurrence_links(club_id, period_id, None, start_date, end_date)
+        refresh_rollups_for_registers(register.id for register in created_registers)
+        
+        period_by_register = {register.id: register.teaching_period_id for register in created_registers}
+        players_by_period = {}
+        for row in entry_rows:
+            players_by_period.setdefault(period_by_register[row['register_id']], set()).add(row['programme_player_id'])
+        for period_id, player_ids in players_by_period.items():
+            recompute_absence_streaks(period_id, player_ids)
+        
+        db.session.commit()
+        
+        current_app.logger.info(f"Bulk created {len(created)} registers for {start_date} to {end_date}, skipped {len(skipped)}")
+        
+        return jsonify({
+            'message': f'Created {len(created)} registers',
+            'created': created,
+            'skipped': skipped,
+            'created_count': len(created),
+            'skipped_count': len(skipped)
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error bulk creating registers: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @register_routes.route('/session-plans/overview')
 @login_required
 @verify_club_access()
@@ -2519,90 +2888,74 @@ def get_session_plans_overview():
         start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        # Get all group times for this club
-        group_times = TennisGroupTimes.query.filter_by(
-            tennis_club_id=current_user.tennis_club_id
-        ).all()
+        ensure_period_occurrences(current_user.tennis_club_id, teaching_period_id)
+        
+        # Player counts per group time for this period
+        player_counts = dict(db.session.query(
+            ProgrammePlayers.group_time_id,
+            func.count(ProgrammePlayers.id)
+        ).filter(
+            ProgrammePlayers.teaching_period_id == teaching_period_id,
+            ProgrammePlayers.tennis_club_id == current_user.tennis_club_id,
+            ProgrammePlayers.group_time_id.isnot(None)
+        ).group_by(ProgrammePlayers.group_time_id).all())
+        
+        # Sessions in the range with their register and plan links
+        occurrences = db.session.query(
+            SessionOccurrence, TennisGroupTimes, TennisGroup.name.label('group_name')
+        ).join(
+            TennisGroupTimes, SessionOccurrence.group_time_id == TennisGroupTimes.id
+        ).join(
+            TennisGroup, TennisGroupTimes.group_id == TennisGroup.id
+        ).filter(
+            SessionOccurrence.tennis_club_id == current_user.tennis_club_id,
+            SessionOccurrence.teaching_period_id == teaching_period_id,
+            SessionOccurrence.date >= start_date_obj,
+            SessionOccurrence.date <= end_date_obj,
+            SessionOccurrence.group_time_id.in_(player_counts.keys())
+        ).order_by(SessionOccurrence.date, TennisGroupTimes.start_time).all()
+        
+        # Load the linked session plans with their entries for the summaries
+        plan_ids = [occurrence.session_plan_id for occurrence, _, _ in occurrences if occurrence.session_plan_id]
+        session_plans = {
+            plan.id: plan
+            for plan in SessionPlan.query.options(
+                selectinload(SessionPlan.plan_entries),
+                selectinload(SessionPlan.trial_players)
+            ).filter(SessionPlan.id.in_(plan_ids)).all()
+        } if plan_ids else {}
         
         # Generate session overview
         sessions_overview = []
-        current_date = start_date_obj
-        
-        # Map day names to Python weekday numbers
-        day_mapping = {
-            DayOfWeek.MONDAY: 0,
-            DayOfWeek.TUESDAY: 1,
-            DayOfWeek.WEDNESDAY: 2,
-            DayOfWeek.THURSDAY: 3,
-            DayOfWeek.FRIDAY: 4,
-            DayOfWeek.SATURDAY: 5,
-            DayOfWeek.SUNDAY: 6
-        }
-        
-        while current_date <= end_date_obj:
-            current_weekday = current_date.weekday()
-            
-            # Find group times that match this day
-            for group_time in group_times:
-                if day_mapping.get(group_time.day_of_week) == current_weekday:
-                    # Check for session plan
-                    session_plan = SessionPlan.query.filter_by(
-                        group_time_id=group_time.id,
-                        date=current_date,
-                        teaching_period_id=teaching_period_id,
-                        tennis_club_id=current_user.tennis_club_id,
-                        is_active=True
-                    ).first()
-                    
-                    # Check for register
-                    register = Register.query.filter_by(
-                        group_time_id=group_time.id,
-                        date=current_date,
-                        teaching_period_id=teaching_period_id,
-                        tennis_club_id=current_user.tennis_club_id
-                    ).first()
-                    
-                    # Get group info
-                    group = group_time.tennis_group
-                    
-                    # Get player count
-                    player_count = ProgrammePlayers.query.filter_by(
-                        group_time_id=group_time.id,
-                        teaching_period_id=teaching_period_id,
-                        tennis_club_id=current_user.tennis_club_id
-                    ).count()
-                    
-                    # Skip if no players
-                    if player_count == 0:
-                        continue
-                    
-                    # Determine session status
-                    status = 'scheduled'
-                    if session_plan and register:
-                        status = 'planned_and_registered'
-                    elif session_plan:
-                        status = 'planned'
-                    elif register:
-                        status = 'registered'
-                    
-                    sessions_overview.append({
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'group_time_id': group_time.id,
-                        'group_name': group.name,
-                        'day_of_week': group_time.day_of_week.value,
-                        'start_time': group_time.start_time.strftime('%H:%M'),
-                        'end_time': group_time.end_time.strftime('%H:%M'),
-                        'player_count': player_count,
-                        'status': status,
-                        'has_plan': session_plan is not None,
-                        'has_register': register is not None,
-                        'plan_id': session_plan.id if session_plan else None,
-                        'register_id': register.id if register else None,
-                        'plan_summary': session_plan.get_plan_summary() if session_plan else None,
-                        'teaching_period_id': teaching_period_id
-                    })
-            
-            current_date += timedelta(days=1)
+        for occurrence, group_time, group_name in occurrences:
+            session_plan = session_plans.get(occurrence.session_plan_id)
+            has_register = occurrence.register_id is not None
+            
+            # Determine session status
+            status = 'scheduled'
+            if session_plan and has_register:
+                status = 'planned_and_registered'
+            elif session_plan:
+                status = 'planned'
+            elif has_register:
+                status = 'registered'
+            
+            sessions_overview.append({
+                'date': occurrence.date.strftime('%Y-%m-%d'),
+                'group_time_id': group_time.id,
+                'group_name': group_name,
+                'day_of_week': group_time.day_of_week.value,
+                'start_time': group_time.start_time.strftime('%H:%M'),
+                'end_time': group_time.end_time.strftime('%H:%M'),
+                'player_count': player_counts[group_time.id],
+                'status': status,
+                'has_plan': session_plan is not None,
+                'has_register': has_register,
+                'plan_id': session_plan.id if session_plan else None,
+                'register_id': occurrence.register_id,
+                'plan_summary': session_plan.get_plan_summary() if session_plan else None,
+                'teaching_period_id': teaching_period_id
+            })
         
         return jsonify(sessions_overview)
         
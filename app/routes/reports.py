@@ -1,8 +1,8 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, current_app, send_file
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, current_app, send_file, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models import (
     Report, TennisGroup, TeachingPeriod, Student, ProgrammePlayers, GroupTemplate, 
-    ReportTemplate, TemplateSection, TemplateField, FieldType, TennisGroupTimes, User
+    ReportTemplate, TemplateSection, TemplateField, FieldType, TennisGroupTimes, User, BulkEmailJob
 )
 from app import db
 from app.models.core import TennisClub
@@ -14,9 +14,14 @@ import os
 import shutil
 import traceback
 from datetime import datetime, timezone
-from app.utils.report_generator import create_single_report_pdf
+from app.utils.report_generator import create_single_report_pdf, serialize_report, get_report_output_path
 import zipfile
 from app.services.email_service import EmailService
+from app.services.report_pdf_cache_service import get_report_pdf
+from app.services.bulk_email_service import create_bulk_email_job
+from app.services.report_template_service import (
+    get_template_structure, get_template_structures, bump_template_version
+)
 
 report_routes = Blueprint('reports', __name__, url_prefix='/api')
 
@@ -44,25 +49,26 @@ def calculate_age(birth_date):
 @verify_club_access()
 def report_operations(report_id):
     from datetime import datetime
-    report = Report.query.get_or_404(report_id)
+    report = Report.query.options(
+        db.joinedload(Report.student),
+        db.joinedload(Report.tennis_group),
+        db.joinedload(Report.template),
+        db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.student),
+        db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.group_time)
+    ).filter(Report.id == report_id).first_or_404()
     
     # Check permissions
     if not current_user.is_admin and report.coach_id != current_user.id:
         return jsonify({'error': 'Permission denied'}), 403
 
     if request.method == 'GET':
-        # Get the template associated with this report
-        template = report.template
-        
         # Get programme player to access session info
-        programme_player = ProgrammePlayers.query.filter_by(
-            id=report.programme_player_id
-        ).first()
+        programme_player = report.programme_player
         
         # Get session information
         time_slot = None
         if programme_player and programme_player.group_time_id:
-            group_time = TennisGroupTimes.query.get(programme_player.group_time_id)
+            group_time = programme_player.group_time
             if group_time:
                 time_slot = {
                     'dayOfWeek': group_time.day_of_week.value if group_time.day_of_week else None,
@@ -114,30 +120,9 @@ def report_operations(report_id):
             'playerId': report.programme_player_id  # Ensure this is included
         }
 
-        # Serialize the template data
-        template_data = {
-            'id': template.id,
-            'name': template.name,
-            'description': template.description,
-            'sections': [{
-                'id': s.id,
-                'name': s.name,
-                'order': s.order,
-                'fields': [{
-                    'id': field.id,
-                    'name': field.name,
-                    'description': field.description,
-                    'fieldType': field.field_type.value,
-                    'isRequired': field.is_required,
-                    'order': field.order,
-                    'options': field.options
-                } for field in sorted(s.fields, key=lambda x: x.order)]
-            } for s in sorted(template.sections, key=lambda x: x.order)]
-        }
-
         return jsonify({
             'report': report_data,
-            'template': template_data
+            'template': get_template_structure(report.template)
         })
 
     elif request.method == 'PUT':
@@ -261,7 +246,11 @@ def submit_report(player_id):
 @report_routes.route('/reports/template/<int:player_id>', methods=['GET'])
 @login_required
 def get_report_template(player_id):
-    player = ProgrammePlayers.query.get_or_404(player_id)
+    player = ProgrammePlayers.query.options(
+        db.joinedload(ProgrammePlayers.student),
+        db.joinedload(ProgrammePlayers.tennis_group),
+        db.joinedload(ProgrammePlayers.group_time)
+    ).filter(ProgrammePlayers.id == player_id).first_or_404()
     
     # Permission check
     if not (current_user.is_admin or current_user.is_super_admin) and player.coach_id != current_user.id:
@@ -285,7 +274,7 @@ def get_report_template(player_id):
     # Get session information
     time_slot = None
     if player.group_time_id:
-        group_time = TennisGroupTimes.query.get(player.group_time_id)
+        group_time = player.group_time
         if group_time:
             time_slot = {
                 'dayOfWeek': group_time.day_of_week.value if group_time.day_of_week else None,
@@ -294,25 +283,7 @@ def get_report_template(player_id):
             }
 
     response_data = {
-        'template': {
-            'id': template.id,
-            'name': template.name,
-            'description': template.description,
-            'sections': [{
-                'id': s.id,
-                'name': s.name,
-                'order': s.order,
-                'fields': [{
-                    'id': f.id,
-                    'name': f.name,
-                    'description': f.description,
-                    'fieldType': f.field_type.value,
-                    'isRequired': f.is_required,
-                    'order': f.order,
-                    'options': f.options
-                } for f in s.fields]
-            } for s in template.sections]
-        },
+        'template': get_template_structure(template),
         'player': {
             'id': player.id,
             'studentName': player.student.name,
@@ -428,6 +399,198 @@ def send_report_email(report_id):
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@report_routes.route('/reports/bulk-email/<int:period_id>', methods=['POST'])
+@login_required
+@admin_required
+def start_bulk_report_email(period_id):
+    """
+    Queue a bulk send of all unsent, finalised reports in a period.
+
+    Optional JSON body: group_id, subject, message (with the same
+    placeholders as single sends). The worker process sends the emails;
+    poll the returned job for progress.
+    """
+    try:
+        TeachingPeriod.query.filter_by(
+            id=period_id,
+            tennis_club_id=current_user.tennis_club_id
+        ).first_or_404()
+
+        data = request.get_json(silent=True) or {}
+        group_id = data.get('group_id')
+
+        if group_id:
+            TennisGroup.query.filter_by(
+                id=group_id,
+                organisation_id=current_user.tennis_club.organisation_id
+            ).first_or_404()
+
+        job, created = create_bulk_email_job(
+            tennis_club_id=current_user.tennis_club_id,
+            teaching_period_id=period_id,
+            created_by_id=current_user.id,
+            group_id=group_id,
+            subject=data.get('subject'),
+            message=data.get('message')
+        )
+
+        if not created:
+            return jsonify({
+                'error': 'A bulk send for these reports is already in progress',
+                'job': job.to_dict()
+            }), 409
+
+        return jsonify({'job': job.to_dict()}), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Error queueing bulk email: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@report_routes.route('/reports/bulk-email/jobs/<int:job_id>')
+@login_required
+@admin_required
+def get_bulk_report_email_job(job_id):
+    """Get the progress of a bulk email job"""
+    try:
+        job = BulkEmailJob.query.filter_by(
+            id=job_id,
+            tennis_club_id=current_user.tennis_club_id
+        ).first_or_404()
+
+        return jsonify({'job': job.to_dict()})
+
+    except Exception as e:
+        current_app.logger.error(f"Error getting bulk email job: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+class _ZipStream:
+    """Write-only file object for zipfile whose bytes are drained as the archive is built"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+@report_routes.route('/reports/download-zip/<int:period_id>')
+@login_required
+@admin_required
+def download_reports_zip(period_id):
+    """
+    Stream a ZIP of all finalised reports for a teaching period.
+
+    Optional group_id and group_time_id query parameters narrow the archive.
+    Folders match the batch generators (reports-<period>/<group>_<day>_<time>_reports/).
+    Each PDF is rendered (or read from the PDF cache) and written to the
+    response as soon as it is ready, so memory stays flat and the download
+    starts immediately. Reports that fail to render are listed in errors.txt.
+    """
+    try:
+        period = TeachingPeriod.query.filter_by(
+            id=period_id,
+            tennis_club_id=current_user.tennis_club_id
+        ).first_or_404()
+
+        group_id = request.args.get('group_id', type=int)
+        group_time_id = request.args.get('group_time_id', type=int)
+
+        query = (Report.query
+            .join(ProgrammePlayers, Report.programme_player_id == ProgrammePlayers.id)
+            .filter(
+                Report.teaching_period_id == period_id,
+                Report.is_draft == False,
+                ProgrammePlayers.tennis_club_id == current_user.tennis_club_id
+            ))
+
+        if group_id:
+            query = query.filter(Report.group_id == group_id)
+        if group_time_id:
+            query = query.filter(ProgrammePlayers.group_time_id == group_time_id)
+
+        query = (query
+            .options(
+                db.joinedload(Report.student),
+                db.joinedload(Report.coach),
+                db.joinedload(Report.tennis_group),
+                db.joinedload(Report.recommended_group),
+                db.joinedload(Report.teaching_period),
+                db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.group_time),
+                db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.tennis_club),
+                db.selectinload(Report.template).selectinload(ReportTemplate.sections).selectinload(TemplateSection.fields)
+            )
+            .order_by(Report.group_id, ProgrammePlayers.group_time_id, Report.id)
+            .execution_options(yield_per=50))
+
+        period_dir = f"reports-{period.name.replace(' ', '_').lower()}"
+
+        def generate():
+            stream = _ZipStream()
+            errors = []
+            used_names = set()
+
+            # PDFs are already compressed, so store them as-is
+            with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+                for report in query:
+                    try:
+                        payload = serialize_report(report)
+                        arcname = get_report_output_path(period_dir, payload).replace(os.sep, '/')
+                        if arcname in used_names:
+                            arcname = arcname[:-len('.pdf')] + f'_{report.id}.pdf'
+                        used_names.add(arcname)
+
+                        pdf_data, _, _ = get_report_pdf(report, payload)
+                        archive.writestr(arcname, pdf_data)
+
+                    except Exception as e:
+                        error_msg = f"Error generating report for {report.student.name}: {str(e)}"
+                        errors.append(error_msg)
+                        current_app.logger.error(error_msg)
+
+                    chunk = stream.drain()
+                    if chunk:
+                        yield chunk
+
+                if errors:
+                    archive.writestr(f'{period_dir}/errors.txt', '\n'.join(errors))
+
+            yield stream.drain()
+
+        filename = period_dir
+        if group_id:
+            filename += f'-group-{group_id}'
+        if group_time_id:
+            filename += f'-time-{group_time_id}'
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}.zip"',
+                'Cache-Control': 'no-store'
+            }
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error streaming reports ZIP: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @report_routes.route('/report-templates', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -489,30 +652,17 @@ def manage_templates():
     templates = ReportTemplate.query.filter_by(
         organisation_id=current_user.tennis_club.organisation_id,  # CHANGED: use organisation_id
         is_active=True
+    ).options(
+        db.selectinload(ReportTemplate.group_associations).joinedload(GroupTemplate.group)
     ).all()
+    structures = get_template_structures(templates)
     
     return jsonify([{
-        'id': t.id,
-        'name': t.name,
-        'description': t.description,
+        **structures[t.id],
         'assignedGroups': [{
             'id': assoc.group.id,
             'name': assoc.group.name
-        } for assoc in t.group_associations if assoc.is_active],
-        'sections': [{
-            'id': s.id,
-            'name': s.name,
-            'order': s.order,
-            'fields': [{
-                'id': f.id,
-                'name': f.name,
-                'description': f.description,
-                'fieldType': f.field_type.value,
-                'isRequired': f.is_required,
-                'order': f.order,
-                'options': f.options
-            } for f in s.fields]
-        } for s in t.sections]
+        } for assoc in t.group_associations if assoc.is_active]
     } for t in templates])
 
 
@@ -530,6 +680,7 @@ def manage_template(template_id):
         try:
             template.name = data['name']
             template.description = data.get('description')
+            bump_template_version(template)
             
             # Update sections and fields
             template.sections = []  # Remove old sections
@@ -592,27 +743,11 @@ def manage_template(template_id):
     
     # GET - Return single template with group assignments
     return jsonify({
-        'id': template.id,
-        'name': template.name,
-        'description': template.description,
+        **get_template_structure(template),
         'assignedGroups': [{
             'id': assoc.group.id,
             'name': assoc.group.name
-        } for assoc in template.group_associations if assoc.is_active],
-        'sections': [{
-            'id': s.id,
-            'name': s.name,
-            'order': s.order,
-            'fields': [{
-                'id': f.id,
-                'name': f.name,
-                'description': f.description,
-                'fieldType': f.field_type.value,
-                'isRequired': f.is_required,
-                'order': f.order,
-                'options': f.options
-            } for f in s.fields]
-        } for s in template.sections]
+        } for assoc in template.group_associations if assoc.is_active]
     })
 
 
@@ -11,6 +11,7 @@ from app import db
 from app.models.base import UserRole
 from app.utils.auth import admin_required
 from app.clubs.middleware import verify_club_access
+from app.services.session_occurrence_service import refresh_occurrence_links
 from sqlalchemy import and_, or_, func, desc
 from datetime import datetime, timedelta, date
 import traceback
@@ -358,6 +359,15 @@ def create_session_plan():
             )
             db.session.add(trial_player)
         
+        # Link the new plan to its session occurrence
+        refresh_occurrence_links(
+            current_user.tennis_club_id,
+            session_plan.teaching_period_id,
+            session_plan.group_time_id,
+            plan_date,
+            plan_date
+        )
+        
         db.session.commit()
         
         return jsonify({
@@ -415,6 +425,14 @@ def update_session_plan(plan_id):
             except ValueError:
                 return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
+        # Re-link occurrences if the plan moved or was (de)activated
+        if 'date' in data or 'is_active' in data:
+            refresh_occurrence_links(
+                current_user.tennis_club_id,
+                plan.teaching_period_id,
+                plan.group_time_id
+            )
+        
         db.session.commit()
         
         return jsonify({
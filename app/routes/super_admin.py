@@ -16,6 +16,7 @@ from app.utils.subscription import get_organisation_access_info
 from datetime import timedelta, timezone
 from app.models import Organisation, User, TennisClub
 from sqlalchemy import func, case
+from app.services.session_occurrence_service import sync_occurrences
 
 super_admin_routes = Blueprint('super_admin', __name__, url_prefix='/clubs/api/super-admin')
 
@@ -220,6 +221,9 @@ def import_groups():
             
             # Commit all changes if there were no errors
             if len(errors) == 0 or (groups_created > 0 or time_slots_created > 0):
+                if time_slots_created > 0:
+                    db.session.flush()
+                    sync_occurrences(club_id)
                 db.session.commit()
                 
                 return jsonify({
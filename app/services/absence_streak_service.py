@@ -0,0 +1,191 @@
+# app/services/absence_streak_service.py
+
+from sqlalchemy import and_, or_, func, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models import AbsenceStreak, AttendanceStatus, Register, RegisterEntry
+
+
+def _streak_select(*filters):
+    """
+    Compute streaks in SQL: absences dated after the player's last non-absent entry.
+
+    A NULL status breaks the streak, matching get_consecutive_absence_count.
+    """
+    breaks = select(
+        RegisterEntry.programme_player_id,
+        Register.teaching_period_id,
+        func.max(Register.date).filter(
+            RegisterEntry.attendance_status.is_distinct_from(AttendanceStatus.ABSENT)
+        ).label('last_break_date')
+    ).join(
+        Register, RegisterEntry.register_id == Register.id
+    ).where(*filters).group_by(
+        RegisterEntry.programme_player_id,
+        Register.teaching_period_id
+    ).subquery()
+
+    return select(
+        Register.tennis_club_id,
+        Register.teaching_period_id,
+        RegisterEntry.programme_player_id,
+        func.count(RegisterEntry.id).filter(
+            RegisterEntry.attendance_status == AttendanceStatus.ABSENT,
+            or_(breaks.c.last_break_date.is_(None), Register.date > breaks.c.last_break_date)
+        ),
+        func.max(Register.date)
+    ).join(
+        Register, RegisterEntry.register_id == Register.id
+    ).join(
+        breaks, and_(
+            breaks.c.programme_player_id == RegisterEntry.programme_player_id,
+            breaks.c.teaching_period_id == Register.teaching_period_id
+        )
+    ).where(*filters).group_by(
+        Register.tennis_club_id,
+        Register.teaching_period_id,
+        RegisterEntry.programme_player_id
+    )
+
+
+def _upsert_streaks(statement):
+    """Insert streak rows, replacing the streak of any existing row"""
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['programme_player_id', 'teaching_period_id'],
+        set_={
+            'current_streak': statement.excluded.current_streak,
+            'last_register_date': statement.excluded.last_register_date,
+            'updated_at': func.current_timestamp()
+        }
+    ))
+
+
+def _insert_from_streak_select(streak_select):
+    return insert(AbsenceStreak).from_select([
+        'tennis_club_id', 'teaching_period_id', 'programme_player_id',
+        'current_streak', 'last_register_date'
+    ], streak_select)
+
+
+def recompute_absence_streaks(teaching_period_id, programme_player_ids):
+    """
+    Recompute streaks from register history for a batch of players.
+
+    Used when an older register is edited, a register is moved or deleted, or
+    an entry on the player's latest register changes. All players are
+    recomputed in a single statement.
+
+    Args:
+        teaching_period_id: Teaching period of the streaks
+        programme_player_ids: Players to recompute
+    """
+    programme_player_ids = list(programme_player_ids)
+    if not programme_player_ids:
+        return
+
+    entry_filters = [
+        Register.teaching_period_id == teaching_period_id,
+        RegisterEntry.programme_player_id.in_(programme_player_ids)
+    ]
+
+    # Drop streaks for players with no remaining entries, then upsert the rest
+    remaining_players = select(RegisterEntry.programme_player_id).join(
+        Register, RegisterEntry.register_id == Register.id
+    ).where(*entry_filters)
+
+    db.session.execute(
+        delete(AbsenceStreak)
+        .where(
+            AbsenceStreak.teaching_period_id == teaching_period_id,
+            AbsenceStreak.programme_player_id.in_(programme_player_ids),
+            AbsenceStreak.programme_player_id.not_in(remaining_players)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    _upsert_streaks(_insert_from_streak_select(_streak_select(*entry_filters)))
+
+
+def update_absence_streaks(register, programme_player_ids=None):
+    """
+    Apply a register's entries to its players' streaks.
+
+    When the register is newer than everything already counted for a player
+    the streak is extended or reset in place. Otherwise (an older register, or
+    a change to the latest one) the player is recomputed from history.
+    Runs inside the caller's transaction.
+
+    Args:
+        register: Register whose entries were written
+        programme_player_ids: Optional players to limit the update to (default: all on the register)
+    """
+    entries_query = db.session.query(
+        RegisterEntry.programme_player_id,
+        RegisterEntry.attendance_status
+    ).filter(RegisterEntry.register_id == register.id)
+
+    if programme_player_ids is not None:
+        programme_player_ids = list(programme_player_ids)
+        if not programme_player_ids:
+            return
+        entries_query = entries_query.filter(RegisterEntry.programme_player_id.in_(programme_player_ids))
+
+    entries = entries_query.all()
+    if not entries:
+        return
+
+    streaks = {
+        streak.programme_player_id: streak
+        for streak in db.session.query(
+            AbsenceStreak.programme_player_id,
+            AbsenceStreak.current_streak,
+            AbsenceStreak.last_register_date
+        ).filter(
+            AbsenceStreak.teaching_period_id == register.teaching_period_id,
+            AbsenceStreak.programme_player_id.in_([entry.programme_player_id for entry in entries])
+        ).all()
+    }
+
+    advanced = {}
+    recompute_ids = set()
+    for entry in entries:
+        streak = streaks.get(entry.programme_player_id)
+
+        if streak and streak.last_register_date >= register.date:
+            recompute_ids.add(entry.programme_player_id)
+            continue
+
+        previous_streak = streak.current_streak if streak else 0
+        advanced[entry.programme_player_id] = {
+            'tennis_club_id': register.tennis_club_id,
+            'teaching_period_id': register.teaching_period_id,
+            'programme_player_id': entry.programme_player_id,
+            'current_streak': previous_streak + 1 if entry.attendance_status == AttendanceStatus.ABSENT else 0,
+            'last_register_date': register.date
+        }
+
+    if advanced:
+        _upsert_streaks(insert(AbsenceStreak).values(list(advanced.values())))
+
+    recompute_absence_streaks(register.teaching_period_id, recompute_ids)
+
+
+def backfill_absence_streaks(tennis_club_id=None):
+    """
+    Rebuild streaks from existing register entries.
+
+    Args:
+        tennis_club_id: Optional club to limit the rebuild to (default: all clubs)
+    """
+    filters = []
+    if tennis_club_id:
+        filters.append(Register.tennis_club_id == tennis_club_id)
+        db.session.execute(
+            delete(AbsenceStreak)
+            .where(AbsenceStreak.tennis_club_id == tennis_club_id)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.session.execute(delete(AbsenceStreak).execution_options(synchronize_session=False))
+
+    _upsert_streaks(_insert_from_streak_select(_streak_select(*filters)))
+    db.session.commit()
@@ -0,0 +1,148 @@
+# app/services/attendance_rollup_service.py
+
+from sqlalchemy import func, select, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models import AttendanceRollup, AttendanceStatus, Register, RegisterEntry
+
+
+def _rollup_select(*filters):
+    """Aggregate register entries into rollup rows for the given filters"""
+    return select(
+        Register.tennis_club_id,
+        Register.teaching_period_id,
+        Register.group_time_id,
+        Register.coach_id,
+        RegisterEntry.programme_player_id,
+        func.count(RegisterEntry.id),
+        func.count(RegisterEntry.id).filter(RegisterEntry.attendance_status == AttendanceStatus.PRESENT),
+        func.count(RegisterEntry.id).filter(RegisterEntry.attendance_status == AttendanceStatus.ABSENT),
+        func.count(RegisterEntry.id).filter(RegisterEntry.attendance_status == AttendanceStatus.SICK),
+        func.count(RegisterEntry.id).filter(RegisterEntry.attendance_status == AttendanceStatus.AWAY_WITH_NOTICE)
+    ).join(
+        Register, RegisterEntry.register_id == Register.id
+    ).where(*filters).group_by(
+        Register.tennis_club_id,
+        Register.teaching_period_id,
+        Register.group_time_id,
+        Register.coach_id,
+        RegisterEntry.programme_player_id
+    )
+
+
+def _upsert_rollups(rollup_select):
+    """Insert aggregated rows, replacing the counts of any existing rollup"""
+    statement = insert(AttendanceRollup).from_select([
+        'tennis_club_id', 'teaching_period_id', 'group_time_id', 'coach_id', 'programme_player_id',
+        'total_count', 'present_count', 'absent_count', 'sick_count', 'away_with_notice_count'
+    ], rollup_select)
+
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['teaching_period_id', 'group_time_id', 'coach_id', 'programme_player_id'],
+        set_={
+            'total_count': statement.excluded.total_count,
+            'present_count': statement.excluded.present_count,
+            'absent_count': statement.excluded.absent_count,
+            'sick_count': statement.excluded.sick_count,
+            'away_with_notice_count': statement.excluded.away_with_notice_count,
+            'updated_at': func.current_timestamp()
+        }
+    ))
+
+
+def refresh_attendance_rollups(teaching_period_id, group_time_id, coach_id, programme_player_ids=None):
+    """
+    Recompute the rollup rows touched by a register write.
+
+    Runs inside the caller's transaction so the rollups commit (or roll back)
+    together with the register entries. Rows whose entries have all been
+    removed are deleted.
+
+    Args:
+        teaching_period_id: Teaching period of the register
+        group_time_id: Group time of the register
+        coach_id: Coach of the register
+        programme_player_ids: Optional players to limit the refresh to (default: all)
+    """
+    if programme_player_ids is not None:
+        programme_player_ids = list(programme_player_ids)
+        if not programme_player_ids:
+            return
+
+    key_filters = [
+        AttendanceRollup.teaching_period_id == teaching_period_id,
+        AttendanceRollup.group_time_id == group_time_id,
+        AttendanceRollup.coach_id == coach_id
+    ]
+    entry_filters = [
+        Register.teaching_period_id == teaching_period_id,
+        Register.group_time_id == group_time_id,
+        Register.coach_id == coach_id
+    ]
+    if programme_player_ids is not None:
+        key_filters.append(AttendanceRollup.programme_player_id.in_(programme_player_ids))
+        entry_filters.append(RegisterEntry.programme_player_id.in_(programme_player_ids))
+
+    # Drop rows for players with no remaining entries, then upsert the rest
+    remaining_players = select(RegisterEntry.programme_player_id).join(
+        Register, RegisterEntry.register_id == Register.id
+    ).where(*entry_filters)
+
+    db.session.execute(
+        delete(AttendanceRollup)
+        .where(*key_filters, AttendanceRollup.programme_player_id.not_in(remaining_players))
+        .execution_options(synchronize_session=False)
+    )
+    _upsert_rollups(_rollup_select(*entry_filters))
+
+
+def refresh_register_rollups(register, programme_player_ids=None):
+    """Recompute the rollup rows for the players on a register"""
+    refresh_attendance_rollups(
+        register.teaching_period_id,
+        register.group_time_id,
+        register.coach_id,
+        programme_player_ids
+    )
+
+
+def refresh_rollups_for_registers(register_ids):
+    """
+    Recompute every rollup key touched by a batch of new registers in one statement.
+
+    Args:
+        register_ids: IDs of the registers that were created
+    """
+    register_ids = list(register_ids)
+    if not register_ids:
+        return
+
+    touched_keys = select(
+        Register.teaching_period_id, Register.group_time_id, Register.coach_id
+    ).where(Register.id.in_(register_ids)).distinct()
+
+    _upsert_rollups(_rollup_select(
+        tuple_(Register.teaching_period_id, Register.group_time_id, Register.coach_id).in_(touched_keys)
+    ))
+
+
+def backfill_attendance_rollups(tennis_club_id=None):
+    """
+    Rebuild rollups from existing register entries.
+
+    Args:
+        tennis_club_id: Optional club to limit the rebuild to (default: all clubs)
+    """
+    filters = []
+    if tennis_club_id:
+        filters.append(Register.tennis_club_id == tennis_club_id)
+        db.session.execute(
+            delete(AttendanceRollup)
+            .where(AttendanceRollup.tennis_club_id == tennis_club_id)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.session.execute(delete(AttendanceRollup).execution_options(synchronize_session=False))
+
+    _upsert_rollups(_rollup_select(*filters))
+    db.session.commit()
@@ -0,0 +1,323 @@
+# app/services/bulk_email_service.py
+
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm.attributes import flag_modified
+from app.extensions import db
+from app.models import (
+    BulkEmailJob, Report, ReportTemplate, TemplateSection, ProgrammePlayers
+)
+from app.services.email_service import EmailService
+from app.services.report_pdf_cache_service import render_report_pdf_files
+from app.utils.report_generator import serialize_report
+
+ACTIVE_JOB_STATUSES = ('pending', 'running')
+
+# A running job whose heartbeat is older than this is assumed to have died with its worker
+STALE_JOB_TIMEOUT = timedelta(minutes=10)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second on average"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_seconds)
+
+
+def create_bulk_email_job(tennis_club_id, teaching_period_id, created_by_id, group_id=None, subject=None, message=None):
+    """
+    Queue a bulk report send for the worker.
+
+    Returns:
+        tuple: (job, created) - the existing active job for the same period and
+        group is returned instead of queueing a duplicate
+    """
+    existing = BulkEmailJob.query.filter(
+        BulkEmailJob.tennis_club_id == tennis_club_id,
+        BulkEmailJob.teaching_period_id == teaching_period_id,
+        BulkEmailJob.group_id.is_(None) if group_id is None else BulkEmailJob.group_id == group_id,
+        BulkEmailJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).first()
+    if existing:
+        return existing, False
+
+    job = BulkEmailJob(
+        tennis_club_id=tennis_club_id,
+        teaching_period_id=teaching_period_id,
+        group_id=group_id,
+        created_by_id=created_by_id,
+        subject=subject,
+        message=message,
+        status='pending'
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job, True
+
+
+def _get_max_send_rate(email_service):
+    """Emails per second allowed by config or, failing that, the SES account quota"""
+    configured_rate = current_app.config.get('BULK_EMAIL_MAX_SEND_RATE')
+    if configured_rate:
+        return float(configured_rate)
+
+    try:
+        return float(email_service.ses_client.get_send_quota()['MaxSendRate'])
+    except Exception as e:
+        current_app.logger.warning(f"Could not read SES send quota, assuming 1 email/second: {str(e)}")
+        return 1.0
+
+
+def _job_reports_query(job):
+    query = Report.query.join(
+        ProgrammePlayers, Report.programme_player_id == ProgrammePlayers.id
+    ).filter(
+        Report.teaching_period_id == job.teaching_period_id,
+        Report.is_draft == False,
+        ProgrammePlayers.tennis_club_id == job.tennis_club_id
+    )
+
+    if job.group_id:
+        query = query.filter(Report.group_id == job.group_id)
+
+    return query.options(
+        db.joinedload(Report.student),
+        db.joinedload(Report.coach),
+        db.joinedload(Report.tennis_group),
+        db.joinedload(Report.recommended_group),
+        db.joinedload(Report.teaching_period),
+        db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.group_time),
+        db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.tennis_club),
+        db.selectinload(Report.template).selectinload(ReportTemplate.sections).selectinload(TemplateSection.fields)
+    ).order_by(Report.id)
+
+
+def _record_outcome(job, email, status, error=None, commit=True):
+    """Update the job's counters (and error details) for one report"""
+    if status == 'success':
+        job.sent_count += 1
+    elif status == 'skipped':
+        job.skipped_count += 1
+    else:
+        job.failed_count += 1
+
+    if error and status != 'success':
+        job.error_details = (job.error_details or []) + [{
+            'report_id': email['report_id'],
+            'student_name': email['student_name'],
+            'status': status,
+            'error': error
+        }]
+        flag_modified(job, 'error_details')
+
+    if commit:
+        db.session.commit()
+
+
+def _prepare_emails(job, reports, email_service):
+    """
+    Build everything needed to send each report before anything is committed,
+    so progress commits don't expire and reload the eager-loaded reports.
+
+    Returns:
+        tuple: (emails to send, (email, reason) pairs to skip)
+    """
+    emails = []
+    skipped = []
+    senders = {}  # One verification lookup per club rather than per email
+
+    for report in reports:
+        email = {
+            'report': report,
+            'report_id': report.id,
+            'student_name': report.student.name
+        }
+
+        # Skip reports already sent or without a contact email
+        can_send, reason = report.can_send_email(is_bulk_send=True)
+        if not can_send:
+            skipped.append((email, reason))
+            continue
+
+        club = report.programme_player.tennis_club
+        if club.id not in senders:
+            senders[club.id] = email_service.get_report_sender_info(club)
+        sender_email, sender_name = senders[club.id]
+
+        subject, message = email_service.render_report_message(report, club, job.subject, job.message)
+
+        email.update({
+            'payload': serialize_report(report),
+            'recipient': report.student.contact_email,
+            'subject': subject,
+            'message': message,
+            'sender_email': sender_email,
+            'sender_name': sender_name
+        })
+        emails.append(email)
+
+    return emails, skipped
+
+
+def run_bulk_email_job(job, email_service=None):
+    """
+    Send every unsent, finalised report covered by a job.
+
+    PDFs are rendered up front across worker processes (reusing the PDF
+    cache). Emails are then delivered from a bounded thread pool sharing one
+    SES client, paced by a token bucket at the account's send rate. Results
+    are logged and the job's counters updated from this thread, committed
+    in batches as sends finish so the polling endpoint sees progress.
+
+    Args:
+        job: Claimed BulkEmailJob in 'running' status
+        email_service: Optional EmailService to reuse
+    """
+    email_service = email_service or EmailService()
+
+    reports = _job_reports_query(job).all()
+    emails, skipped = _prepare_emails(job, reports, email_service)
+
+    job.total_count = len(reports)
+    for email, reason in skipped:
+        _record_outcome(job, email, 'skipped', reason, commit=False)
+    db.session.commit()
+
+    if not emails:
+        return
+
+    def heartbeat(completed, total):
+        # Keep the job from looking abandoned while PDFs render
+        job.updated_at = func.now()
+        db.session.commit()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_paths, render_errors = render_report_pdf_files(
+            [email['payload'] for email in emails], temp_dir, progress_callback=heartbeat
+        )
+        for error in render_errors:
+            current_app.logger.error(f"Bulk email job {job.id}: {error}")
+
+        bucket = TokenBucket(_get_max_send_rate(email_service))
+        max_threads = current_app.config.get('BULK_EMAIL_SEND_THREADS', 8)
+
+        def deliver(email, pdf_data):
+            bucket.acquire()
+            return email_service.deliver_report_email(
+                recipient=email['recipient'],
+                subject=email['subject'],
+                message=email['message'],
+                pdf_data=pdf_data,
+                student_name=email['student_name'],
+                sender_email=email['sender_email'],
+                sender_name=email['sender_name']
+            )
+
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            in_flight = {}
+            pending = iter(emails)
+
+            while True:
+                # Keep a bounded number of attachments in memory
+                while len(in_flight) < max_threads * 2:
+                    email = next(pending, None)
+                    if email is None:
+                        break
+
+                    pdf_path = pdf_paths.get(email['report_id'])
+                    if not pdf_path:
+                        result = {'status': 'failed', 'message_id': None, 'error': 'PDF generation failed'}
+                        email_service.record_report_email_result(email['report'], email['subject'], result, commit=False)
+                        _record_outcome(job, email, result['status'], result['error'], commit=False)
+                        continue
+
+                    with open(pdf_path, 'rb') as f:
+                        in_flight[executor.submit(deliver, email, f.read())] = email
+
+                if not in_flight:
+                    db.session.commit()
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    email = in_flight.pop(future)
+                    result = future.result()
+                    email_service.record_report_email_result(email['report'], email['subject'], result, commit=False)
+                    _record_outcome(job, email, result['status'], result['error'], commit=False)
+
+                # One transaction per batch of finished sends: attempt log inserts plus progress
+                db.session.commit()
+
+
+def _claim_next_job():
+    """Lock the next pending (or abandoned) job, skipping jobs held by other workers"""
+    return BulkEmailJob.query.filter(
+        or_(
+            BulkEmailJob.status == 'pending',
+            and_(BulkEmailJob.status == 'running', BulkEmailJob.updated_at < func.now() - STALE_JOB_TIMEOUT)
+        )
+    ).order_by(
+        BulkEmailJob.created_at,
+        BulkEmailJob.id
+    ).with_for_update(skip_locked=True).first()
+
+
+def process_bulk_email_jobs(email_service=None):
+    """
+    Run the next queued bulk email job, if any.
+
+    A job interrupted by a worker restart is picked up again once its
+    heartbeat goes stale; reports it already sent are skipped.
+
+    Returns:
+        int: Number of jobs run (0 or 1)
+    """
+    job = _claim_next_job()
+    if not job:
+        db.session.rollback()
+        return 0
+
+    job.status = 'running'
+    job.started_at = func.now()
+    job.sent_count = job.skipped_count = job.failed_count = 0
+    job.error_details = []
+    db.session.commit()
+
+    try:
+        run_bulk_email_job(job, email_service)
+        job.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Bulk email job {job.id} failed: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        job.status = 'failed'
+        job.last_error = str(e)
+
+    job.finished_at = func.now()
+    db.session.commit()
+    return 1
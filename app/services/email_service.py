@@ -6,11 +6,13 @@ from datetime import datetime, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from app.utils.report_generator import create_single_report_pdf
+from app.services.report_pdf_cache_service import get_report_pdf
 from io import BytesIO
 import traceback
-import os
-import tempfile
+import time
+
+# Retries for SES Throttling errors, with 1s, 2s, 4s... backoff
+THROTTLE_RETRIES = 3
 
 class EmailService:
     def __init__(self):
@@ -97,88 +99,11 @@ class EmailService:
                 'error': str(e)
             }
 
-    def _generate_wilton_report(self, report, pdf_buffer):
-        """Generate a Wilton-specific report"""
-        try:
-            from app.utils.wilton_report_generator import EnhancedWiltonReportGenerator
-            
-            # Get config path
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            config_path = os.path.join(base_dir, 'utils', 'wilton_group_config.json')
-            
-            if not os.path.exists(config_path):
-                current_app.logger.warning(f"Wilton config not found at: {config_path}")
-                return False
-
-            # Initialize generator
-            generator = EnhancedWiltonReportGenerator(config_path)
-            
-            # Get template path
-            template_path = generator.get_template_path(report.tennis_group.name)
-            
-            # Prepare report data
-            data = {
-                'player_name': report.student.name,
-                'coach_name': report.coach.name,
-                'term': report.teaching_period.name,
-                'group': report.tennis_group.name,
-                'content': report.content,
-                'recommended_group': report.recommended_group.name if report.recommended_group else None,
-                'teaching_period': {
-                    'next_period_start_date': report.teaching_period.next_period_start_date.strftime('%Y-%m-%d') if report.teaching_period.next_period_start_date else None,
-                    'bookings_open_date': report.teaching_period.bookings_open_date.strftime('%Y-%m-%d') if report.teaching_period.bookings_open_date else None
-                }
-            }
-
-            # Check if we have both template and group config
-            group_config = generator.get_group_config(data['group'])
-            if not template_path or not os.path.exists(template_path) or not group_config:
-                return False
-
-            # Create temporary file for generation
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-                try:
-                    # Generate the report
-                    generator.generate_report(template_path, tmp_file.name, data)
-                    
-                    # Verify file was created
-                    if not os.path.exists(tmp_file.name) or os.path.getsize(tmp_file.name) == 0:
-                        raise ValueError("Generated Wilton report is empty")
-                    
-                    # Copy to buffer
-                    with open(tmp_file.name, 'rb') as f:
-                        pdf_buffer.write(f.read())
-                        pdf_buffer.seek(0)
-                    
-                    return True
-                    
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(tmp_file.name):
-                        os.unlink(tmp_file.name)
-                        
-        except Exception as e:
-            current_app.logger.warning(f"Error in Wilton report generation: {str(e)}")
-            current_app.logger.debug(traceback.format_exc())
-            return False
-
     def _generate_report_pdf(self, report, pdf_buffer):
-        """Generate appropriate PDF report based on tennis club"""
+        """Write the report's PDF to the buffer, reusing a cached render when available"""
         try:
-            # Check if this is a Wilton report
-            club_name = report.programme_player.tennis_club.name.lower()
-            
-            if 'wilton' in club_name:
-                # Try Wilton report first
-                success = self._generate_wilton_report(report, pdf_buffer)
-                if success:
-                    return
-                
-                pdf_buffer.seek(0)
-                pdf_buffer.truncate()
-
-            # Generate generic report
-            create_single_report_pdf(report, pdf_buffer)
+            pdf_data, _, _ = get_report_pdf(report)
+            pdf_buffer.write(pdf_data)
             
         except Exception as e:
             current_app.logger.error(f"Error in report generation: {str(e)}")
@@ -245,6 +170,130 @@ class EmailService:
 
         return msg.as_string()
 
+    def render_report_message(self, report, club, subject=None, message=None):
+        """
+        Fill the {placeholders} in a report email's subject and message
+        
+        Returns:
+            tuple: (subject, message)
+        """
+        # Create context for template replacements
+        context = {
+            'student_name': report.student.name,
+            'recommended_group': report.recommended_group.name if report.recommended_group else "Same group",
+            'booking_date': report.teaching_period.next_period_start_date.strftime('%A %d %B') if report.teaching_period.next_period_start_date else 'TBC',
+            'coach_name': report.coach.name,
+            'tennis_club': club.name,  # CHANGED: Use club directly
+            'group_name': report.tennis_group.name,
+            'term_name': report.teaching_period.name
+        }
+        
+        # Use provided subject and message or set defaults
+        if not subject:
+            subject = f"Tennis Report for {report.student.name} - {report.teaching_period.name}"
+        else:
+            for key, value in context.items():
+                subject = subject.replace(f"{{{key}}}", str(value))
+                
+        if not message:
+            message = f"Please find attached the tennis report for {report.student.name}."
+        else:
+            for key, value in context.items():
+                message = message.replace(f"{{{key}}}", str(value))
+
+        return subject, message
+
+    def deliver_report_email(self, recipient, subject, message, pdf_data, student_name, sender_email, sender_name):
+        """
+        Send a report email through SES without touching the database.
+        
+        Safe to call from worker threads sharing this service's SES client.
+        Falls back to the default sender if a custom sender is unverified and
+        retries SES throttling errors with backoff.
+        
+        Returns:
+            dict: status ('success', 'skipped' or 'failed'), message_id, error
+        """
+        def send(source_email):
+            # Create and send email with club-specific sender name
+            raw_email = self._create_raw_email_with_attachment(
+                recipient=recipient,
+                subject=subject,
+                message=message,
+                pdf_data=pdf_data,
+                student_name=student_name,
+                sender_email=source_email,
+                sender_name=sender_name  # This will now be the club name
+            )
+
+            for attempt in range(THROTTLE_RETRIES + 1):
+                try:
+                    response = self.ses_client.send_raw_email(
+                        Source=f'"{sender_name}" <{source_email}>',  # Club name in sender
+                        RawMessage={'Data': raw_email}
+                    )
+                    return response.get('MessageId', '')
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'Throttling' or attempt == THROTTLE_RETRIES:
+                        raise
+                    time.sleep(2 ** attempt)
+
+        try:
+            try:
+                message_id = send(sender_email)
+                return {'status': 'success', 'message_id': message_id, 'error': None}
+
+            except ClientError as e:
+                error_code = e.response['Error']['Code']
+                if not (error_code == 'MessageRejected' and 'not verified' in str(e)):
+                    raise
+
+                if sender_email == self.sender:
+                    return {'status': 'skipped', 'message_id': None, 'error': 'Email address not verified'}
+
+                # If custom sender fails verification, try with default sender
+                try:
+                    message_id = send(self.sender)
+                except Exception as fallback_error:
+                    return {'status': 'failed', 'message_id': None, 'error': f"Fallback also failed: {str(fallback_error)}"}
+
+                return {
+                    'status': 'success',
+                    'message_id': message_id,
+                    'error': 'Sent with default sender (custom sender failed verification)'
+                }
+
+        except Exception as e:
+            return {'status': 'failed', 'message_id': None, 'error': str(e)}
+
+    def record_report_email_result(self, report, subject, result, commit=True):
+        """
+        Record a delivery result on the report
+        
+        Args:
+            commit: If False, leave the attempt for the caller to commit with a batch
+        
+        Returns:
+            tuple: (success, message, message_id) as returned by send_report
+        """
+        recipient = report.student.contact_email
+        report.record_email_attempt(
+            status=result['status'],
+            recipients=[recipient] if recipient else [],
+            subject=subject or "Tennis Report",
+            message_id=result['message_id'],
+            error=result['error'],
+            commit=commit
+        )
+
+        if result['status'] == 'success':
+            if result['error']:
+                return True, "Email sent successfully (using default sender)", result['message_id']
+            return True, "Email sent successfully", result['message_id']
+        if result['status'] == 'skipped':
+            return False, f"Email skipped - address not verified: {recipient}", None
+        return False, f"Failed to send email: {result['error']}", None
+
     def send_report(self, report, subject=None, message=None):
         """Send a single report with PDF attachment using organisation-specific sender"""
         try:
@@ -258,146 +307,31 @@ class EmailService:
             # Generate PDF using appropriate generator
             pdf_buffer = BytesIO()
             self._generate_report_pdf(report, pdf_buffer)
-            pdf_buffer.seek(0)
             pdf_data = pdf_buffer.getvalue()
             
-            # Create context for template replacements
-            context = {
-                'student_name': report.student.name,
-                'recommended_group': report.recommended_group.name if report.recommended_group else "Same group",
-                'booking_date': report.teaching_period.next_period_start_date.strftime('%A %d %B') if report.teaching_period.next_period_start_date else 'TBC',
-                'coach_name': report.coach.name,
-                'tennis_club': club.name,  # CHANGED: Use club directly
-                'group_name': report.tennis_group.name,
-                'term_name': report.teaching_period.name
-            }
-            
-            # Use provided subject and message or set defaults
-            if not subject:
-                subject = f"Tennis Report for {report.student.name} - {report.teaching_period.name}"
-            else:
-                for key, value in context.items():
-                    subject = subject.replace(f"{{{key}}}", str(value))
-                    
-            if not message:
-                message = f"Please find attached the tennis report for {report.student.name}."
-            else:
-                for key, value in context.items():
-                    message = message.replace(f"{{{key}}}", str(value))
-
-            try:
-                # Create and send email with club-specific sender name
-                raw_email = self._create_raw_email_with_attachment(
-                    recipient=report.student.contact_email,
-                    subject=subject,
-                    message=message,
-                    pdf_data=pdf_data,
-                    student_name=report.student.name,
-                    sender_email=sender_email,
-                    sender_name=sender_name  # This will now be the club name
-                )
-
-                response = self.ses_client.send_raw_email(
-                    Source=f'"{sender_name}" <{sender_email}>',  # Club name in sender
-                    RawMessage={'Data': raw_email}
-                )
-
-                current_app.logger.info(f"SES Response: {response}")
-                current_app.logger.info(f"Message ID: {response.get('MessageId')}")
-                current_app.logger.info(f"Sent to: {report.student.contact_email}")
-                current_app.logger.info(f"From: {sender_email}")
-                current_app.logger.info(f"Sender Name: {sender_name}")  # Log the club name
-                current_app.logger.info(f"Subject: {subject}")
-                
-                message_id = response.get('MessageId', '')
-
-                # Record successful attempt
-                report.record_email_attempt(
-                    status='success',
-                    recipients=[report.student.contact_email],
-                    subject=subject,
-                    message_id=message_id
-                )
-
-                return True, "Email sent successfully", message_id
-
-            except ClientError as e:
-                error_code = e.response['Error']['Code']
-                if error_code == 'MessageRejected' and 'not verified' in str(e):
-                    # If custom sender fails verification, try with default sender
-                    if sender_email != self.sender:
-                        current_app.logger.warning(
-                            f"Custom sender {sender_email} failed, retrying with default sender"
-                        )
-                        return self._retry_report_with_default_sender(
-                            report, subject, message, pdf_data, club.name  # Pass club name
-                        )
-                    else:
-                        # Record skipped email
-                        report.record_email_attempt(
-                            status='skipped',
-                            recipients=[report.student.contact_email],
-                            subject=subject,
-                            error='Email address not verified'
-                        )
-                        return False, f"Email skipped - address not verified: {report.student.contact_email}", None
-                else:
-                    raise
+            subject, message = self.render_report_message(report, club, subject, message)
 
         except Exception as e:
-            error_msg = str(e)
-            # Record failed attempt
-            report.record_email_attempt(
-                status='failed',
-                recipients=[report.student.contact_email] if report.student.contact_email else [],
-                subject=subject or "Tennis Report",
-                error=error_msg
-            )
-            current_app.logger.error(f"Error sending email: {error_msg}")
-            current_app.logger.error(traceback.format_exc())
-            return False, f"Failed to send email: {error_msg}", None
-
-
-    def _retry_report_with_default_sender(self, report, subject, message, pdf_data, club_name):
-        """Retry sending report email with default sender as fallback"""
-        try:
-            raw_email = self._create_raw_email_with_attachment(
+            result = {'status': 'failed', 'message_id': None, 'error': str(e)}
+        else:
+            result = self.deliver_report_email(
                 recipient=report.student.contact_email,
                 subject=subject,
                 message=message,
                 pdf_data=pdf_data,
                 student_name=report.student.name,
-                sender_email=self.sender,
-                sender_name=club_name  # CHANGED: Use club name instead of "CourtFlow"
-            )
-
-            response = self.ses_client.send_raw_email(
-                Source=f'"{club_name}" <{self.sender}>',  # CHANGED: Use club name
-                RawMessage={'Data': raw_email}
+                sender_email=sender_email,
+                sender_name=sender_name
             )
-            
-            message_id = response.get('MessageId', '')
 
-            # Record successful attempt with fallback note
-            report.record_email_attempt(
-                status='success',
-                recipients=[report.student.contact_email],
-                subject=subject,
-                message_id=message_id,
-                error='Sent with default sender (custom sender failed verification)'
-            )
+        if result['status'] == 'success':
+            current_app.logger.info(f"Message ID: {result['message_id']}")
+            current_app.logger.info(f"Sent to: {report.student.contact_email}")
+            current_app.logger.info(f"Subject: {subject}")
+        elif result['status'] == 'failed':
+            current_app.logger.error(f"Error sending email: {result['error']}")
 
-            return True, "Email sent successfully (using default sender)", message_id
-            
-        except Exception as e:
-            error_msg = f"Fallback also failed: {str(e)}"
-            report.record_email_attempt(
-                status='failed',
-                recipients=[report.student.contact_email],
-                subject=subject,
-                error=error_msg
-            )
-            return False, error_msg, None
+        return self.record_report_email_result(report, subject, result)
 
     # ALL OTHER EMAIL METHODS USE DEFAULT COURTFLOW SENDER UNCHANGED
 
@@ -0,0 +1,251 @@
+# app/services/notification_service.py
+
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+import traceback
+from app.extensions import db
+from app.models import NotificationOutbox, ProgrammePlayers, Register
+from app.services.email_service import EmailService
+
+ABSENCE_NOTIFICATION = 'absence_notification'
+
+# Delivery retry policy: exponential backoff from RETRY_BASE_DELAY, then give up
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = timedelta(minutes=1)
+
+
+class NotificationSkipped(Exception):
+    """Raised by a handler when a queued notification no longer needs sending"""
+
+
+def enqueue_notification(notification_type, dedupe_key, payload, tennis_club_id=None):
+    """
+    Queue a notification for the outbox worker.
+
+    Runs inside the caller's transaction so the notification is only queued if
+    the triggering write commits. A notification whose dedupe_key is already
+    queued (or sent) is ignored.
+
+    Args:
+        notification_type: Handler key, e.g. ABSENCE_NOTIFICATION
+        dedupe_key: Unique key for this notification
+        payload: JSON-serialisable data for the handler
+        tennis_club_id: Optional club the notification belongs to
+    """
+    db.session.execute(
+        insert(NotificationOutbox).values(
+            tennis_club_id=tennis_club_id,
+            notification_type=notification_type,
+            dedupe_key=dedupe_key,
+            payload=payload,
+            status='pending',
+            attempts=0
+        ).on_conflict_do_nothing(index_elements=['dedupe_key'])
+    )
+
+
+def enqueue_absence_notification(programme_player, register, absence_count):
+    """Queue the consecutive-absence email for a player on a register"""
+    enqueue_notification(
+        ABSENCE_NOTIFICATION,
+        f"{ABSENCE_NOTIFICATION}:{programme_player.id}:{register.id}",
+        {
+            'programme_player_id': programme_player.id,
+            'register_id': register.id,
+            'absence_count': absence_count
+        },
+        tennis_club_id=register.tennis_club_id
+    )
+
+
+def build_absence_notification_email(programme_player, register):
+    """
+    Build the consecutive-absence email for a player.
+
+    Returns:
+        tuple: (subject, html) for the email
+    """
+    student = programme_player.student
+    club = programme_player.tennis_club
+    group = programme_player.tennis_group
+
+    # Get time information from the register's group_time
+    time_display = "session"  # Default fallback
+    day_display = ""
+
+    if register.group_time:
+        group_time = register.group_time
+        if group_time.start_time and group_time.end_time:
+            time_display = f"{group_time.start_time.strftime('%H:%M')}-{group_time.end_time.strftime('%H:%M')}"
+
+        if group_time.day_of_week:
+            day_display = f"{group_time.day_of_week.value} "
+
+    # Combine day and time for a complete session description
+    session_description = f"{day_display}{time_display}"
+    full_session_name = f"{group.name} ({session_description})"
+
+    # Prepare email subject and content
+    email_subject = f"Attendance Notice for {student.name} - {group.name}"
+
+    # Check if this is a Wilton club (contains "Wilton" in the name) for customized email content
+    if "wilton" in club.name.lower():
+        # Wilton-specific email content
+        email_html = f"""
+        <html>
+            <body style="font-family: Arial, Helvetica, sans-serif; line-height: 1.6; color: #333;">
+                <div style="max-width: 600px; margin: 0 auto;">
+                    <div style="margin-bottom: 30px;">
+                        <p>Dear {student.name} or Parent/Guardian,</p>
+                        <p>We've noticed that <strong>{student.name}</strong> has missed the <strong>{full_session_name}</strong> session 3 times in a row.</p>
+                        <p>We wanted to check in to see if there were any issues with the session and whether you are planning on being there in future weeks.</p>
+                        <p>If there's anything you want to discuss, please get in contact with Marc using the following email: headcoach@wiltontennisclub.co.uk.</p>
+                        <p>Thanks,<br>Marc Beckles, Head Coach</p>
+                    </div>
+                    <div style="font-size: 0.9em; color: #666; border-top: 1px solid #eee; padding-top: 15px;">
+                        <p>This is an automated attendance notification from {club.name}.</p>
+                        <p>Please do not reply to this email.</p>
+                    </div>
+                </div>
+            </body>
+        </html>
+        """
+    else:
+        # Generic email content for all other clubs
+        email_html = f"""
+        <html>
+            <body style="font-family: Arial, Helvetica, sans-serif; line-height: 1.6; color: #333;">
+                <div style="max-width: 600px; margin: 0 auto;">
+                    <div style="margin-bottom: 30px;">
+                        <p>Dear {student.name} or Parent/Guardian,</p>
+                        <p>We've noticed that <strong>{student.name}</strong> has missed the <strong>{full_session_name}</strong> session 3 times in a row.</p>
+                        <p>We wanted to check in to see if there were any issues with the session and whether you are planning on being there in future weeks.</p>
+                        <p>If there's anything you want to discuss, please get in contact with the {club.name} coaching team.</p>
+                        <p>Thanks,<br>{club.name}</p>
+                    </div>
+                    <div style="font-size: 0.9em; color: #666; border-top: 1px solid #eee; padding-top: 15px;">
+                        <p>This is an automated attendance notification from {club.name}.</p>
+                        <p>Please do not reply to this email.</p>
+                    </div>
+                </div>
+            </body>
+        </html>
+        """
+    
+    return email_subject, email_html
+
+
+def send_absence_notification(payload, email_service):
+    """Outbox handler for ABSENCE_NOTIFICATION"""
+    programme_player = db.session.get(ProgrammePlayers, payload['programme_player_id'])
+    register = db.session.get(Register, payload['register_id'])
+
+    if not programme_player or not register:
+        raise NotificationSkipped('Player or register no longer exists')
+
+    student = programme_player.student
+    club = programme_player.tennis_club
+
+    # Verify we have an email address to send to
+    if not student.contact_email:
+        raise NotificationSkipped(f"No contact email for student {student.name}")
+
+    email_subject, email_html = build_absence_notification_email(programme_player, register)
+
+    success, result = email_service.send_generic_email(
+        recipient_email=student.contact_email,
+        subject=email_subject,
+        html_content=email_html,
+        sender_name=club.name
+    )
+
+    if success:
+        current_app.logger.info(f"Absence notification email sent successfully to {student.contact_email} for {student.name}")
+    return success, result
+
+
+NOTIFICATION_HANDLERS = {
+    ABSENCE_NOTIFICATION: send_absence_notification
+}
+
+
+def _claim_next_notification():
+    """Lock the next due notification, skipping rows held by other workers"""
+    return NotificationOutbox.query.filter(
+        NotificationOutbox.status == 'pending',
+        NotificationOutbox.next_attempt_at <= func.now()
+    ).order_by(
+        NotificationOutbox.next_attempt_at,
+        NotificationOutbox.id
+    ).with_for_update(skip_locked=True).first()
+
+
+def _deliver_notification(notification, email_service):
+    """Run the handler for a claimed notification and record the outcome"""
+    notification.attempts += 1
+    handler = NOTIFICATION_HANDLERS.get(notification.notification_type)
+
+    try:
+        if not handler:
+            raise NotificationSkipped(f"Unknown notification type {notification.notification_type}")
+
+        # Savepoint so a failed handler query doesn't abort the claim
+        with db.session.begin_nested():
+            success, result = handler(notification.payload, email_service)
+
+    except NotificationSkipped as e:
+        notification.status = 'skipped'
+        notification.last_error = str(e)
+        current_app.logger.warning(f"Skipped notification {notification.id}: {str(e)}")
+        return
+
+    except Exception as e:
+        current_app.logger.error(f"Error delivering notification {notification.id}: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        success, result = False, str(e)
+
+    if success:
+        notification.status = 'sent'
+        notification.sent_at = func.now()
+        notification.last_error = None
+    elif notification.attempts >= MAX_ATTEMPTS:
+        notification.status = 'failed'
+        notification.last_error = result
+        current_app.logger.error(f"Giving up on notification {notification.id} after {notification.attempts} attempts: {result}")
+    else:
+        notification.last_error = result
+        notification.next_attempt_at = func.now() + RETRY_BASE_DELAY * (2 ** (notification.attempts - 1))
+
+
+def process_outbox(batch_size=50, email_service=None):
+    """
+    Deliver due notifications, committing after each one.
+
+    Several workers can drain the outbox at once; each claims rows with
+    SELECT ... FOR UPDATE SKIP LOCKED.
+
+    Args:
+        batch_size: Maximum notifications to deliver in this call
+        email_service: Optional EmailService to reuse across calls
+
+    Returns:
+        int: Number of notifications processed
+    """
+    processed = 0
+
+    while processed < batch_size:
+        notification = _claim_next_notification()
+        if not notification:
+            db.session.rollback()
+            break
+
+        if email_service is None:
+            email_service = EmailService()
+
+        _deliver_notification(notification, email_service)
+        db.session.commit()
+        processed += 1
+
+    return processed
@@ -0,0 +1,955 @@
+# app/services/player_upload_service.py
+
+import uuid
+import traceback
+from datetime import datetime, timedelta
+from io import BytesIO
+import pandas as pd
+from flask import current_app
+from sqlalchemy import and_, or_, delete, func, insert, update
+from app.extensions import db
+from app.models import (
+    PlayerUpload, PlayerUploadRow, TennisClub, TennisGroup, TennisGroupTimes, TeachingPeriod,
+    User, Student, ProgrammePlayers, DayOfWeek
+)
+from app.services.stats_cache_service import invalidate_stats_cache
+
+ACTIVE_UPLOAD_STATUSES = ('pending', 'running')
+
+# Uploads are purged this long after being staged, unless still queued or running
+UPLOAD_RETENTION = timedelta(days=1)
+
+# A running upload whose heartbeat is older than this is assumed to have died with its worker
+STALE_JOB_TIMEOUT = timedelta(minutes=10)
+
+STAGE_INSERT_BATCH_SIZE = 1000
+
+# Rows imported per transaction by the worker
+UPLOAD_BATCH_SIZE = 500
+
+
+def clean_phone_number(phone_str):
+    """Clean phone number while preserving leading zeros."""
+    if phone_str is None or pd.isna(phone_str):
+        return None
+        
+    # Convert to string if it's not already
+    phone_str = str(phone_str).strip()
+    
+    # Remove leading apostrophe if present
+    if phone_str.startswith("'"):
+        phone_str = phone_str[1:]
+    
+    # If it's a number that got converted to float, handle it properly
+    if '.' in phone_str and phone_str.replace('.', '').isdigit():
+        # Convert back to int to remove decimal, then to string to preserve leading zeros
+        phone_str = str(int(float(phone_str))).zfill(len(phone_str.split('.')[0]))
+    
+    # Ensure UK mobile numbers have proper formatting
+    if phone_str.isdigit() and len(phone_str) == 10 and not phone_str.startswith('0'):
+        phone_str = '0' + phone_str
+    
+    return phone_str if phone_str else None
+
+def parse_walk_home(value):
+    """Parse walk_home value from Y/N/Blank to True/False/None."""
+    if value is None or pd.isna(value):
+        return None
+        
+    value_str = str(value).strip().upper()
+    
+    if value_str in ('Y', 'YES', 'TRUE', '1'):
+        return True
+    elif value_str in ('N', 'NO', 'FALSE', '0'):
+        return False
+    elif value_str in ('', 'BLANK', 'NULL', 'NONE'):
+        return None
+    else:
+        return None  # Default to None for invalid values
+
+def validate_time_format(time_str):
+    """Validate time format and return parsed time or raise error."""
+    if pd.isna(time_str):
+        raise ValueError("Time value is missing")
+    
+    try:
+        # Try parsing as HH:MM
+        return datetime.strptime(str(time_str).strip(), '%H:%M').time()
+    except ValueError:
+        try:
+            # Try parsing as H:MM (single digit hour)
+            return datetime.strptime(str(time_str).strip(), '%H:%M').time()
+        except ValueError:
+            raise ValueError(f"Invalid time format '{time_str}'. Use HH:MM format (e.g., 09:30, 15:45)")
+
+def validate_phone_number(phone_str):
+    """Validate phone number format."""
+    if phone_str is None or pd.isna(phone_str) or str(phone_str).strip() == '':
+        return True  # Optional field
+    
+    cleaned = clean_phone_number(phone_str)
+    if not cleaned:
+        return False
+    
+    # UK phone number validation (basic)
+    if not cleaned.isdigit():
+        return False
+    
+    # UK numbers should be 11 digits starting with 0, or 10 digits for mobile
+    if len(cleaned) not in [10, 11]:
+        return False
+    
+    return True
+
+# Column-wise equivalents of the per-value validators above
+TIME_PATTERN = r'(?:2[0-3]|[01]\d|\d):(?:[0-5]\d|\d)'  # What strptime's %H:%M accepts
+VALID_WALK_HOME_VALUES = ['Y', 'N', 'YES', 'NO', 'TRUE', 'FALSE', '1', '0', '', 'BLANK', 'NULL', 'NONE']
+
+# Rows naming the same student in the same session are flagged as duplicates
+DUPLICATE_ROW_COLUMNS = ['student_name', 'group_name', 'day_of_week', 'start_time', 'end_time']
+
+
+def _invalid_time_mask(column):
+    """Values validate_time_format would reject (missing values excluded)"""
+    return column.notna() & ~column.astype(str).str.strip().str.fullmatch(TIME_PATTERN)
+
+
+def _invalid_phone_mask(column):
+    """Values validate_phone_number would reject"""
+    present = column.notna() & (column.astype(str).str.strip() != '')
+    cleaned = column[present].astype(str).str.strip()
+    cleaned = cleaned.where(~cleaned.str.startswith("'"), cleaned.str[1:])
+
+    # A leading 0 added to 10-digit numbers doesn't change validity, so digits and length decide
+    valid = cleaned.str.isdigit() & cleaned.str.len().isin([10, 11])
+
+    # Numbers mangled into floats (e.g. 7700900123.0) are rare; check them one by one
+    decimal = cleaned.str.contains('.', regex=False)
+    if decimal.any():
+        valid[decimal] = column[present][decimal].map(validate_phone_number)
+
+    invalid = pd.Series(False, index=column.index)
+    invalid[present] = ~valid.astype(bool)
+    return invalid
+
+
+def pre_validate_csv(df):
+    """
+    Pre-validate the entire CSV file before processing.
+
+    Each check runs over whole columns; messages are only built for the
+    failing rows, ordered by row as a row-by-row pass would report them.
+    Returns (is_valid, errors, warnings)
+    """
+    errors = []
+    warnings = []
+    
+    # Check required columns
+    required_columns = [
+        'student_name', 'date_of_birth', 'contact_email', 
+        'coach_email', 'group_name', 'day_of_week',
+        'start_time', 'end_time'
+    ]
+    
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        errors.append(f"Missing required columns: {', '.join(missing_columns)}")
+        return False, errors, warnings
+    
+    row_numbers = pd.Series(range(2, len(df) + 2), index=df.index)  # +2 for header row and 0-indexing
+    failures = []  # (row number, check order, message)
+
+    def add_failures(check_order, mask, message):
+        for row_number, row in zip(row_numbers[mask], df.loc[mask].to_dict('records')):
+            failures.append((row_number, check_order, message(row)))
+
+    # Check required fields
+    add_failures(0, df['student_name'].isna(), lambda row: "Missing student name")
+    add_failures(1, df['contact_email'].isna(), lambda row: "Missing contact email")
+    add_failures(2, df['coach_email'].isna(), lambda row: "Missing coach email")
+    add_failures(3, df['group_name'].isna(), lambda row: "Missing group name")
+
+    # Validate day of week
+    valid_days = ', '.join([d.name.title() for d in DayOfWeek])
+    day_present = df['day_of_week'].notna()
+    invalid_day = day_present & ~df['day_of_week'].astype(str).str.upper().isin([d.name for d in DayOfWeek])
+    add_failures(4, invalid_day,
+                 lambda row: f"Invalid day of week '{row['day_of_week']}'. Must be one of: {valid_days}")
+    add_failures(4, ~day_present, lambda row: "Missing day of week")
+
+    # Validate time formats
+    time_format_error = "Invalid time format '{}'. Use HH:MM format (e.g., 09:30, 15:45)"
+    add_failures(5, df['start_time'].isna(), lambda row: "Start time error - Time value is missing")
+    add_failures(5, _invalid_time_mask(df['start_time']),
+                 lambda row: f"Start time error - {time_format_error.format(row['start_time'])}")
+    add_failures(6, df['end_time'].isna(), lambda row: "End time error - Time value is missing")
+    add_failures(6, _invalid_time_mask(df['end_time']),
+                 lambda row: f"End time error - {time_format_error.format(row['end_time'])}")
+
+    # Validate walk_home values if present
+    if 'walk_home' in df.columns:
+        walk_home = df['walk_home']
+        invalid_walk_home = walk_home.notna() & ~walk_home.astype(str).str.strip().str.upper().isin(VALID_WALK_HOME_VALUES)
+        add_failures(7, invalid_walk_home,
+                     lambda row: f"Invalid walk_home value '{row['walk_home']}'. Use Y, N, or leave blank")
+
+    # Validate phone numbers
+    if 'contact_number' in df.columns:
+        add_failures(8, _invalid_phone_mask(df['contact_number']),
+                     lambda row: f"Invalid contact number format '{row['contact_number']}'")
+
+    if 'emergency_contact_number' in df.columns:
+        add_failures(9, _invalid_phone_mask(df['emergency_contact_number']),
+                     lambda row: f"Invalid emergency contact number format '{row['emergency_contact_number']}'")
+
+    # Validate email format (basic)
+    emails = df['contact_email'].astype(str).str.strip()
+    invalid_email = df['contact_email'].notna() & ~(
+        emails.str.contains('@', regex=False) & emails.str.contains('.', regex=False)
+    )
+    add_failures(10, invalid_email,
+                 lambda row: f"Invalid email format '{str(row['contact_email']).strip()}'")
+
+    failures.sort(key=lambda failure: (failure[0], failure[1]))
+    errors = [f"Row {row_number}: {message}" for row_number, _, message in failures]
+
+    # Flag repeated rows for the same student and session (later rows update the first)
+    keys = df[DUPLICATE_ROW_COLUMNS].apply(lambda column: column.astype(str).str.strip().str.lower())
+    duplicate = keys.duplicated(keep='first') & df['student_name'].notna()
+    if duplicate.any():
+        first_rows = row_numbers.groupby([keys[column] for column in DUPLICATE_ROW_COLUMNS]).transform('first')
+        for row_number, first_row_number, student_name in zip(
+            row_numbers[duplicate], first_rows[duplicate], df.loc[duplicate, 'student_name']
+        ):
+            warnings.append(f"Row {row_number}: Duplicate of row {first_row_number} for {student_name} in the same session")
+    
+    # Stop processing if there are critical errors
+    if errors:
+        return False, errors, warnings
+    
+    return True, [], warnings
+
+STUDENT_UPDATE_FIELDS = ['date_of_birth', 'contact_number', 'emergency_contact_number', 'medical_information']
+PLAYER_UPDATE_FIELDS = ['coach_id', 'walk_home', 'notes']
+
+
+def _match_student(candidates, row_data):
+    """Pick the existing student a row refers to among those sharing its name, preferring a DOB then an email match"""
+    if row_data.get('date_of_birth'):
+        for student in candidates:
+            if student['date_of_birth'] == row_data['date_of_birth']:
+                return student
+
+    contact_email = row_data['contact_email'].lower()
+    for student in candidates:
+        if (student['contact_email'] or '').lower() == contact_email:
+            return student
+
+    return candidates[0]
+
+
+def _write_batch(valid_rows, club_id, teaching_period, allow_updates, batch_warnings):
+    """
+    Write a batch's validated rows with set-based statements.
+
+    Students and existing assignments are looked up with one IN-list query
+    each and the rows are then applied in order in memory, so repeated rows
+    behave as if written one at a time. New students and players are added
+    with one multi-row INSERT each, and changed ones with one executemany
+    UPDATE each.
+
+    Returns:
+        tuple: (students created, students updated, players created, players updated)
+    """
+    students_created = students_updated = players_created = players_updated = 0
+
+    # Existing students sharing a name with any row, oldest first
+    students_by_name = {}
+    for student in db.session.query(
+        Student.id, Student.name, Student.date_of_birth, Student.contact_email, Student.contact_number,
+        Student.emergency_contact_number, Student.medical_information
+    ).filter(
+        Student.tennis_club_id == club_id,
+        Student.name.in_({row_data['student_name'] for row_data in valid_rows})
+    ).order_by(Student.id):
+        students_by_name.setdefault(student.name, []).append(dict(student._asdict(), new=False, changed=False))
+
+    # Existing assignments of those students in the period
+    existing_ids = [student['id'] for students in students_by_name.values() for student in students]
+    players = {}
+    if existing_ids:
+        for player in db.session.query(
+            ProgrammePlayers.id, ProgrammePlayers.student_id, ProgrammePlayers.group_id,
+            ProgrammePlayers.group_time_id, ProgrammePlayers.coach_id, ProgrammePlayers.walk_home,
+            ProgrammePlayers.notes
+        ).filter(
+            ProgrammePlayers.teaching_period_id == teaching_period.id,
+            ProgrammePlayers.tennis_club_id == club_id,
+            ProgrammePlayers.student_id.in_(existing_ids)
+        ).order_by(ProgrammePlayers.id):
+            players.setdefault((player.student_id, player.group_id, player.group_time_id), dict(player._asdict(), changed=False))
+
+    new_students = []
+    new_players = []
+
+    for row_data in valid_rows:
+        candidates = students_by_name.get(row_data['student_name'])
+
+        if not candidates:
+            student = {
+                'id': None,
+                'name': row_data['student_name'],
+                'date_of_birth': row_data.get('date_of_birth'),
+                'contact_email': row_data['contact_email'],
+                'contact_number': row_data.get('contact_number'),
+                'emergency_contact_number': row_data.get('emergency_contact_number'),
+                'medical_information': row_data.get('medical_information'),
+                'new': True,
+                'changed': False
+            }
+            students_by_name[student['name']] = [student]
+            new_students.append(student)
+            students_created += 1
+        else:
+            student = _match_student(candidates, row_data)
+
+            # Update existing student information
+            updated = False
+            if student['contact_email'] != row_data['contact_email']:
+                student['contact_email'] = row_data['contact_email']
+                updated = True
+            for field in STUDENT_UPDATE_FIELDS:
+                if field in row_data and student[field] != row_data[field]:
+                    student[field] = row_data[field]
+                    updated = True
+
+            if updated:
+                student['changed'] = True
+                students_updated += 1
+
+        # Students created in this batch are keyed by identity until they have an id
+        student_key = student['id'] or id(student)
+        player_key = (student_key, row_data['group'].id, row_data['group_time'].id)
+        existing_player = players.get(player_key)
+
+        if existing_player:
+            if allow_updates:
+                # Update existing player assignment
+                values = {
+                    'coach_id': row_data['coach'].id,
+                    'walk_home': row_data.get('walk_home'),
+                    'notes': row_data.get('notes')
+                }
+                updated = False
+                for field in PLAYER_UPDATE_FIELDS:
+                    if existing_player[field] != values[field]:
+                        existing_player[field] = values[field]
+                        updated = True
+
+                if updated:
+                    existing_player['changed'] = True
+                    players_updated += 1
+                    batch_warnings.append(f"Updated existing player assignment for {student['name']} in {row_data['group'].name}")
+            else:
+                batch_warnings.append(f"Student {student['name']} is already assigned to {row_data['group'].name} " +
+                                  f"at {row_data['day_of_week'].value} {row_data['start_time']}-{row_data['end_time']}")
+            continue
+
+        # Create new player assignment
+        player = {
+            'id': None,
+            'student': student,
+            'group_id': row_data['group'].id,
+            'group_time_id': row_data['group_time'].id,
+            'coach_id': row_data['coach'].id,
+            'walk_home': row_data.get('walk_home'),
+            'notes': row_data.get('notes'),
+            'changed': False
+        }
+        players[player_key] = player
+        new_players.append(player)
+        players_created += 1
+
+    if new_students:
+        student_ids = db.session.scalars(
+            insert(Student).returning(Student.id, sort_by_parameter_order=True),
+            [{
+                'name': student['name'],
+                'date_of_birth': student['date_of_birth'],
+                'contact_email': student['contact_email'],
+                'contact_number': student['contact_number'],
+                'emergency_contact_number': student['emergency_contact_number'],
+                'medical_information': student['medical_information'],
+                'tennis_club_id': club_id
+            } for student in new_students]
+        ).all()
+        for student, student_id in zip(new_students, student_ids):
+            student['id'] = student_id
+
+    changed_students = [
+        {'id': student['id'], 'contact_email': student['contact_email'],
+         **{field: student[field] for field in STUDENT_UPDATE_FIELDS}}
+        for students in students_by_name.values() for student in students
+        if student['changed'] and not student['new']
+    ]
+    if changed_students:
+        db.session.execute(update(Student), changed_students)
+
+    if new_players:
+        db.session.execute(insert(ProgrammePlayers), [{
+            'student_id': player['student']['id'],
+            'coach_id': player['coach_id'],
+            'group_id': player['group_id'],
+            'group_time_id': player['group_time_id'],
+            'teaching_period_id': teaching_period.id,
+            'tennis_club_id': club_id,
+            'walk_home': player['walk_home'],
+            'notes': player['notes']
+        } for player in new_players])
+
+    changed_players = [
+        {'id': player['id'], **{field: player[field] for field in PLAYER_UPDATE_FIELDS}}
+        for player in players.values() if player['changed'] and player['id']
+    ]
+    if changed_players:
+        db.session.execute(update(ProgrammePlayers), changed_players)
+
+    # Bulk statements bypass the flush that normally marks cached statistics stale
+    if new_students or changed_students or new_players or changed_players:
+        invalidate_stats_cache(tennis_club_id=club_id)
+
+    return students_created, students_updated, players_created, players_updated
+
+
+def process_batch(batch_df, club_id, teaching_period, coaches, groups, allow_updates=True, commit=True):
+    """
+    Process a batch of CSV rows with validation, database updates, and update capability.
+    
+    Args:
+        batch_df: DataFrame containing the batch of rows to process
+        club_id: Tennis club ID
+        teaching_period: TeachingPeriod object
+        coaches: Dictionary of coach email -> coach object
+        groups: Dictionary of group name -> group object
+        allow_updates: Boolean to allow updating existing player assignments
+        commit: Commit the batch; when False the caller commits it (a failed batch is
+            still rolled back to its savepoint and reported in the errors)
+    """
+    
+    valid_rows = []
+    batch_errors = []
+    batch_warnings = []
+    
+    # Load every time slot of the batch's groups in one query
+    group_times = {}
+    if groups:
+        for group_time in TennisGroupTimes.query.filter(
+            TennisGroupTimes.tennis_club_id == club_id,
+            TennisGroupTimes.group_id.in_({group.id for group in groups.values()})
+        ).order_by(TennisGroupTimes.id).all():
+            group_times.setdefault(group_time.group_id, []).append(group_time)
+    
+    # Validate all rows first
+    for index, row in batch_df.iterrows():
+        try:
+            row_number = index + 2  # +2 for header row and 0-indexing
+            row_data = {}
+            
+            # Validate student name
+            if pd.isna(row['student_name']):
+                batch_errors.append(f"Row {row_number}: Missing student name")
+                continue
+            row_data['student_name'] = str(row['student_name']).strip()
+            
+            # Validate contact email
+            if pd.isna(row['contact_email']):
+                batch_errors.append(f"Row {row_number}: Missing contact email for {row['student_name']}")
+                continue
+            row_data['contact_email'] = str(row['contact_email']).strip()
+            
+            # Validate coach
+            if pd.isna(row['coach_email']):
+                batch_errors.append(f"Row {row_number}: Missing coach email for {row['student_name']}")
+                continue
+                
+            coach_email = str(row['coach_email']).lower().strip()
+            if coach_email not in coaches:
+                batch_errors.append(f"Row {row_number}: Coach with email {row['coach_email']} not found")
+                continue
+            row_data['coach'] = coaches[coach_email]
+            
+            # Validate group
+            if pd.isna(row['group_name']):
+                batch_errors.append(f"Row {row_number}: Missing group name for {row['student_name']}")
+                continue
+                
+            group_name = str(row['group_name']).lower().strip()
+            if group_name not in groups:
+                batch_errors.append(f"Row {row_number}: Group '{row['group_name']}' not found")
+                continue
+            row_data['group'] = groups[group_name]
+            
+            # Parse day of week
+            if pd.isna(row['day_of_week']):
+                batch_errors.append(f"Row {row_number}: Missing day of week for {row['student_name']}")
+                continue
+                
+            try:
+                day_of_week = DayOfWeek[str(row['day_of_week']).upper()]
+                row_data['day_of_week'] = day_of_week
+            except KeyError:
+                valid_days = ', '.join([d.name.title() for d in DayOfWeek])
+                batch_errors.append(f"Row {row_number}: Invalid day of week '{row['day_of_week']}'. Must be one of: {valid_days}")
+                continue
+            
+            # Parse time values with improved validation
+            if pd.isna(row['start_time']) or pd.isna(row['end_time']):
+                batch_errors.append(f"Row {row_number}: Missing start or end time for {row['student_name']}")
+                continue
+                
+            try:
+                start_time = validate_time_format(row['start_time'])
+                end_time = validate_time_format(row['end_time'])
+                
+                if start_time >= end_time:
+                    batch_errors.append(f"Row {row_number}: End time must be after start time")
+                    continue
+                    
+                row_data['start_time'] = start_time
+                row_data['end_time'] = end_time
+            except ValueError as e:
+                batch_errors.append(f"Row {row_number}: {str(e)}")
+                continue
+            
+            # Find group time slot
+            available_times = group_times.get(row_data['group'].id, [])
+            group_time = next((
+                t for t in available_times
+                if t.day_of_week == row_data['day_of_week']
+                and t.start_time == row_data['start_time']
+                and t.end_time == row_data['end_time']
+            ), None)
+
+            if not group_time:
+                # List available times for a more helpful error message
+
+                if not available_times:
+                    time_info = "No time slots configured for this group"
+                else:
+                    time_info = ', '.join([f"{t.day_of_week.value} {t.start_time}-{t.end_time}" for t in available_times])
+                    
+                batch_errors.append(f"Row {row_number}: Group time slot not found for {row['group_name']} " +
+                                  f"on {row['day_of_week']} at {row['start_time']}-{row['end_time']}. " +
+                                  f"Available times: {time_info}")
+                continue
+                
+            row_data['group_time'] = group_time
+            
+            # Parse date of birth (optional)
+            if not pd.isna(row['date_of_birth']):
+                try:
+                    row_data['date_of_birth'] = parse_date(str(row['date_of_birth']))
+                except ValueError as e:
+                    batch_warnings.append(f"Row {row_number}: Couldn't parse date of birth '{row['date_of_birth']}', will be ignored. Error: {str(e)}")
+            
+            # Extract contact information with improved phone number handling
+            if 'contact_number' in row and not pd.isna(row['contact_number']):
+                cleaned_number = clean_phone_number(row['contact_number'])
+                if cleaned_number and validate_phone_number(row['contact_number']):
+                    row_data['contact_number'] = cleaned_number
+                else:
+                    batch_warnings.append(f"Row {row_number}: Invalid contact number '{row['contact_number']}', will be ignored")
+            
+            if 'emergency_contact_number' in row and not pd.isna(row['emergency_contact_number']):
+                cleaned_emergency = clean_phone_number(row['emergency_contact_number'])
+                if cleaned_emergency and validate_phone_number(row['emergency_contact_number']):
+                    row_data['emergency_contact_number'] = cleaned_emergency
+                else:
+                    batch_warnings.append(f"Row {row_number}: Invalid emergency contact number '{row['emergency_contact_number']}', will be ignored")
+            
+            if 'medical_information' in row and not pd.isna(row['medical_information']):
+                row_data['medical_information'] = str(row['medical_information']).strip()
+            
+            # Handle walk_home field with Y/N/Blank support
+            if 'walk_home' in row and not pd.isna(row['walk_home']):
+                walk_home_value = parse_walk_home(row['walk_home'])
+                row_data['walk_home'] = walk_home_value
+                
+                # Log if we couldn't parse it
+                if walk_home_value is None and str(row['walk_home']).strip():
+                    batch_warnings.append(f"Row {row_number}: Couldn't parse walk_home value '{row['walk_home']}', defaulting to blank")
+
+            # Extract notes (optional)
+            if 'notes' in row and not pd.isna(row['notes']):
+                row_data['notes'] = str(row['notes']).strip()
+            
+            # Add to valid rows
+            valid_rows.append(row_data)
+            
+        except Exception as e:
+            batch_errors.append(f"Row {index + 2}: Unexpected error: {str(e)}")
+    
+    # Process valid rows in a single transaction
+    batch_students_created = 0
+    batch_students_updated = 0
+    batch_players_created = 0
+    batch_players_updated = 0
+    
+    if valid_rows:
+        # Use a fresh transaction for this batch
+        try:
+            with db.session.begin_nested():
+                (batch_students_created, batch_students_updated,
+                 batch_players_created, batch_players_updated) = _write_batch(
+                    valid_rows, club_id, teaching_period, allow_updates, batch_warnings
+                )
+                    
+            # Commit the outer transaction
+            if commit:
+                db.session.commit()
+            
+        except Exception as e:
+            # Make sure to rollback (the savepoint has already been rolled back)
+            if commit:
+                db.session.rollback()
+            batch_errors.append(f"Database error: {str(e)}")
+            current_app.logger.error(f"Database error in process_batch: {str(e)}")
+            current_app.logger.error(traceback.format_exc())
+    
+    # Return batch results
+    return {
+        'students_created': batch_students_created,
+        'students_updated': batch_students_updated,
+        'players_created': batch_players_created,
+        'players_updated': batch_players_updated,
+        'warnings': batch_warnings,
+        'errors': batch_errors
+    }
+
+def parse_date(date_str):
+    """Parse date from various formats including YYYY-MM-DD, DD-MMM-YYYY, or DD-MMM-YY"""
+    
+    # Return None for empty strings or None values
+    if not date_str or str(date_str).strip() == '':
+        return None
+
+    try:
+        # First try YYYY-MM-DD format (HTML5 date input)
+        try:
+            parsed_date = datetime.strptime(date_str.strip(), '%Y-%m-%d').date()
+            return parsed_date
+        except ValueError:
+            # If that fails, try DD-MMM-YYYY or DD-MMM-YY format
+            date_str = date_str.strip()
+            
+            # Handle different dash/separator types
+            if '-' in date_str:
+                parts = date_str.split('-')
+            elif '/' in date_str:
+                parts = date_str.split('/')
+            else:
+                raise ValueError(f"Cannot parse date format: {date_str}")
+                
+            if len(parts) != 3:
+                raise ValueError(f"Date should have 3 parts (day, month, year): {date_str}")
+                
+            day, month, year = parts
+            
+            # Ensure month is properly capitalized if it's a text month
+            if not month.isdigit():
+                month = month.capitalize()
+            
+            # Handle 2-digit years by converting to 4-digit (assuming 20xx for recent years)
+            if len(year) == 2:
+                # Convert 2-digit year to 4-digit
+                # Years 00-69 are treated as 2000-2069, years 70-99 as 1970-1999
+                year_int = int(year)
+                if year_int < 70:
+                    year = f"20{year}"
+                else:
+                    year = f"19{year}"
+            
+            # Try different date formats based on the type of month (text vs numeric)
+            if month.isdigit():
+                try:
+                    # Try MM/DD/YYYY format (common in US)
+                    parsed_date = datetime.strptime(f"{month}/{day}/{year}", '%m/%d/%Y').date()
+                except ValueError:
+                    # Try DD/MM/YYYY format (common outside US)
+                    parsed_date = datetime.strptime(f"{day}/{month}/{year}", '%d/%m/%Y').date()
+            else:
+                # Month is text like "Jun" - use DD-MMM-YYYY format
+                formatted_date_str = f"{day}-{month}-{year}"
+                parsed_date = datetime.strptime(formatted_date_str, '%d-%b-%Y').date()
+                
+            return parsed_date
+            
+    except Exception as e:
+        # Log the error but return None instead of raising to prevent crashes
+        current_app.logger.error(f"Date parsing failed for '{date_str}': {str(e)}")
+        raise ValueError(f"Invalid date format: '{date_str}'. Please use YYYY-MM-DD or DD-MMM-YYYY format.")
+
+
+
+def read_upload_csv(raw_data):
+    """
+    Parse an uploaded CSV into a cleaned DataFrame.
+
+    Every column is read as a string (preserving leading zeros), values are
+    stripped and blanks become missing values.
+
+    Args:
+        raw_data: File contents as bytes
+
+    Returns:
+        DataFrame indexed from 0 in file order
+    """
+    try:
+        df = pd.read_csv(BytesIO(raw_data), encoding='utf-8', dtype=str)  # Force all columns to string
+    except UnicodeDecodeError:
+        df = pd.read_csv(BytesIO(raw_data), encoding='latin-1', dtype=str)
+
+    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    return df.replace('', pd.NA)
+
+
+def get_upload_lookups(organisation_id):
+    """
+    Active coaches and groups available to an organisation's uploads.
+
+    Returns:
+        tuple: ({lowercase coach email: coach}, {lowercase group name: group})
+    """
+    coaches = {coach.email.lower(): coach for coach in
+        db.session.query(User).join(TennisClub).filter(
+            TennisClub.organisation_id == organisation_id,
+            User.is_active == True
+        ).all()}
+
+    groups = {group.name.lower(): group for group in
+        TennisGroup.query.filter_by(
+            organisation_id=organisation_id
+        ).order_by(TennisGroup.name).all()}
+
+    return coaches, groups
+
+
+def _resolve_column(df, column, lookup):
+    """Map a column's values (case and whitespace-insensitive) to ids, None where unmatched"""
+    if column not in df.columns:
+        return [None] * len(df)
+
+    ids = {key: obj.id for key, obj in lookup.items()}
+    return [ids.get(value.lower().strip()) if isinstance(value, str) else None for value in df[column]]
+
+
+def stage_player_upload(df, tennis_club, teaching_period_id, created_by_id, filename, file_size):
+    """
+    Store a parsed upload's rows so processing can read any slice directly.
+
+    Coach emails and group names are resolved to ids here, once for the
+    whole file.
+
+    Args:
+        df: Cleaned DataFrame (see read_upload_csv)
+        tennis_club: Club the players are uploaded to
+        teaching_period_id: Teaching period the players are assigned to
+        created_by_id: Uploading user
+        filename: Original file name
+        file_size: Size of the uploaded file in bytes
+
+    Returns:
+        PlayerUpload: The staged upload (flushed, not committed)
+    """
+    upload = PlayerUpload(
+        token=str(uuid.uuid4()),
+        tennis_club_id=tennis_club.id,
+        teaching_period_id=teaching_period_id,
+        created_by_id=created_by_id,
+        filename=filename,
+        file_size=file_size,
+        total_rows=len(df)
+    )
+    db.session.add(upload)
+    db.session.flush()
+
+    coaches, groups = get_upload_lookups(tennis_club.organisation_id)
+    coach_ids = _resolve_column(df, 'coach_email', coaches)
+    group_ids = _resolve_column(df, 'group_name', groups)
+
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    rows = [{
+        'upload_id': upload.id,
+        'row_index': int(index),
+        'data': data,
+        'coach_id': coach_id,
+        'group_id': group_id
+    } for index, data, coach_id, group_id in zip(df.index, records, coach_ids, group_ids)]
+
+    for start in range(0, len(rows), STAGE_INSERT_BATCH_SIZE):
+        db.session.execute(insert(PlayerUploadRow), rows[start:start + STAGE_INSERT_BATCH_SIZE])
+
+    return upload
+
+
+def load_upload_slice(upload, start_idx, end_idx):
+    """
+    Read a slice of a staged upload, with the coaches and groups its rows resolved to.
+
+    Args:
+        upload: Staged PlayerUpload
+        start_idx: First row index (inclusive)
+        end_idx: Last row index (exclusive)
+
+    Returns:
+        tuple: (DataFrame indexed by row index, {coach email: coach}, {group name: group})
+        in the shape process_batch expects
+    """
+    rows = PlayerUploadRow.query.filter(
+        PlayerUploadRow.upload_id == upload.id,
+        PlayerUploadRow.row_index >= start_idx,
+        PlayerUploadRow.row_index < end_idx
+    ).order_by(PlayerUploadRow.row_index).all()
+
+    batch_df = pd.DataFrame(
+        [row.data for row in rows],
+        index=[row.row_index for row in rows]
+    )
+
+    coach_ids = {row.coach_id for row in rows if row.coach_id}
+    group_ids = {row.group_id for row in rows if row.group_id}
+
+    coaches = {coach.email.lower(): coach for coach in
+        User.query.filter(User.id.in_(coach_ids)).all()} if coach_ids else {}
+    groups = {group.name.lower(): group for group in
+        TennisGroup.query.filter(TennisGroup.id.in_(group_ids)).all()} if group_ids else {}
+
+    return batch_df, coaches, groups
+
+
+def get_player_upload(token, tennis_club_id):
+    """Staged upload for a token, restricted to the given club"""
+    return PlayerUpload.query.filter_by(token=token, tennis_club_id=tennis_club_id).first()
+
+
+def delete_player_upload(upload):
+    """Remove a staged upload and its rows"""
+    db.session.execute(delete(PlayerUploadRow).where(PlayerUploadRow.upload_id == upload.id))
+    db.session.delete(upload)
+
+
+def purge_expired_player_uploads():
+    """Remove uploads older than UPLOAD_RETENTION that are not queued or running (rows cascade in the database)"""
+    db.session.execute(
+        delete(PlayerUpload)
+        .where(
+            PlayerUpload.created_at < func.now() - UPLOAD_RETENTION,
+            PlayerUpload.status.not_in(ACTIVE_UPLOAD_STATUSES)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def start_player_upload(upload):
+    """
+    Queue a validated upload for the worker.
+
+    Returns:
+        bool: False if the upload had already been started
+    """
+    if upload.status != 'validated':
+        return False
+
+    upload.status = 'pending'
+    db.session.commit()
+    return True
+
+
+def run_player_upload(upload):
+    """
+    Import every remaining staged row of an upload.
+
+    Rows are processed UPLOAD_BATCH_SIZE at a time. Each batch's students
+    and players commit in the same transaction as the upload's progress,
+    so a job resumed after a worker restart carries on from the last
+    committed batch. The staged rows are deleted once all are imported.
+
+    Args:
+        upload: Claimed PlayerUpload in 'running' status
+    """
+    teaching_period = TeachingPeriod.query.get(upload.teaching_period_id)
+
+    while upload.processed_rows < upload.total_rows:
+        start_idx = upload.processed_rows
+        end_idx = min(start_idx + UPLOAD_BATCH_SIZE, upload.total_rows)
+
+        batch_df, coaches, groups = load_upload_slice(upload, start_idx, end_idx)
+        batch_results = process_batch(
+            batch_df,
+            upload.tennis_club_id,
+            teaching_period,
+            coaches,
+            groups,
+            allow_updates=True,
+            commit=False
+        )
+
+        upload.processed_rows = end_idx
+        upload.students_created += batch_results['students_created']
+        upload.students_updated += batch_results['students_updated']
+        upload.players_created += batch_results['players_created']
+        upload.players_updated += batch_results['players_updated']
+        upload.warnings = (upload.warnings or []) + batch_results['warnings']
+        upload.errors = (upload.errors or []) + batch_results['errors']
+        db.session.commit()
+
+    db.session.execute(delete(PlayerUploadRow).where(PlayerUploadRow.upload_id == upload.id))
+    db.session.commit()
+
+
+def _claim_next_upload():
+    """Lock the next pending (or abandoned) upload, skipping uploads held by other workers"""
+    return PlayerUpload.query.filter(
+        or_(
+            PlayerUpload.status == 'pending',
+            and_(PlayerUpload.status == 'running', PlayerUpload.updated_at < func.now() - STALE_JOB_TIMEOUT)
+        )
+    ).order_by(
+        PlayerUpload.created_at,
+        PlayerUpload.id
+    ).with_for_update(skip_locked=True).first()
+
+
+def process_player_upload_jobs():
+    """
+    Run the next queued bulk player upload, if any.
+
+    An upload interrupted by a worker restart is picked up again once its
+    heartbeat goes stale and resumes after its last committed batch.
+
+    Returns:
+        int: Number of uploads run (0 or 1)
+    """
+    upload = _claim_next_upload()
+    if not upload:
+        db.session.rollback()
+        return 0
+
+    upload.status = 'running'
+    if not upload.started_at:
+        upload.started_at = func.now()
+    db.session.commit()
+
+    try:
+        run_player_upload(upload)
+        upload.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Player upload {upload.id} failed: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        upload.status = 'failed'
+        upload.last_error = str(e)
+
+    upload.finished_at = func.now()
+    db.session.commit()
+    return 1
@@ -0,0 +1,431 @@
+# app/services/report_pdf_cache_service.py
+
+import os
+import json
+import hashlib
+import time
+import tempfile
+import threading
+import traceback
+from io import BytesIO
+from functools import lru_cache
+import boto3
+from botocore.exceptions import ClientError
+from flask import current_app
+from app.utils.report_generator import (
+    CompactTennisReportGenerator, create_single_report_pdf, serialize_report,
+    report_from_payload, run_report_jobs
+)
+
+GENERIC_GENERATOR = 'generic'
+WILTON_GENERATOR = 'wilton'
+
+# Store location -> time of this process's last eviction pass
+_last_eviction = {}
+_eviction_lock = threading.Lock()
+
+
+def get_wilton_config_path():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, 'utils', 'wilton_group_config.json')
+
+
+@lru_cache(maxsize=64)
+def _file_digest(path, mtime):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_report_generator(payload):
+    """Pick the generator a serialised report is rendered with"""
+    return WILTON_GENERATOR if 'wilton' in payload['club_name'].lower() else GENERIC_GENERATOR
+
+
+def report_pdf_cache_key(payload, generator=None):
+    """
+    Content hash of everything that goes into a report's PDF.
+
+    Covers the report content, template structure, names, recommended group
+    and period dates (via the serialised payload) plus the generator and its
+    version and, for Wilton, the group config and the template PDF the report
+    is drawn on, so any change produces a new key and stale entries are never
+    served. The key doubles as the download's strong ETag.
+
+    Args:
+        payload: Serialised report (see serialize_report)
+        generator: GENERIC_GENERATOR or WILTON_GENERATOR (default: chosen from the club)
+
+    Returns:
+        str: Hex digest identifying the rendered PDF
+    """
+    from app.utils.wilton_report_generator import EnhancedWiltonReportGenerator, resolve_template_path
+
+    generator = generator or get_report_generator(payload)
+    fingerprint = {
+        'generator': generator,
+        'report': {key: value for key, value in payload.items() if key != 'id'}
+    }
+
+    if generator == WILTON_GENERATOR:
+        config_path = get_wilton_config_path()
+        fingerprint['version'] = EnhancedWiltonReportGenerator.GENERATOR_VERSION
+        fingerprint['config'] = _file_digest(config_path, os.path.getmtime(config_path)) if os.path.exists(config_path) else None
+
+        template_path = resolve_template_path(payload['group_name'])
+        fingerprint['template'] = (
+            [os.path.basename(template_path), _file_digest(template_path, os.path.getmtime(template_path))]
+            if template_path and os.path.exists(template_path) else None
+        )
+    else:
+        fingerprint['version'] = CompactTennisReportGenerator.GENERATOR_VERSION
+
+    encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LocalPdfCacheStore:
+    """Rendered PDFs on local disk, evicting least recently used files past max_bytes"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.location = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.pdf')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf_data = f.read()
+            os.utime(path)  # Mark as recently used
+            return pdf_data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, pdf_data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write then rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        entries = []
+        total_bytes = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            if total_bytes <= self.max_bytes:
+                break
+
+
+class S3PdfCacheStore:
+    """Rendered PDFs in S3 under a prefix, evicting the oldest objects past max_bytes"""
+
+    def __init__(self, bucket_name, prefix, max_bytes):
+        self.s3_client = boto3.client(
+            's3',
+            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+            region_name=os.environ.get('AWS_S3_REGION')
+        )
+        self.bucket_name = bucket_name
+        self.prefix = prefix.rstrip('/')
+        self.max_bytes = max_bytes
+        self.location = f's3://{bucket_name}/{self.prefix}'
+
+    def _key(self, key):
+        return f'{self.prefix}/{key}.pdf'
+
+    def get(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self._key(key))
+            return response['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    def put(self, key, pdf_data):
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=self._key(key),
+            Body=pdf_data,
+            ContentType='application/pdf'
+        )
+
+    def evict(self):
+        """Delete the oldest objects under the prefix until the cache fits in max_bytes"""
+        objects = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=f'{self.prefix}/'):
+            objects.extend(page.get('Contents', []))
+
+        total_bytes = sum(obj['Size'] for obj in objects)
+        if total_bytes <= self.max_bytes:
+            return
+
+        expired = []
+        for obj in sorted(objects, key=lambda obj: obj['LastModified']):
+            expired.append({'Key': obj['Key']})
+            total_bytes -= obj['Size']
+            if total_bytes <= self.max_bytes:
+                break
+
+        # delete_objects accepts at most 1000 keys per call
+        for start in range(0, len(expired), 1000):
+            self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': expired[start:start + 1000], 'Quiet': True}
+            )
+
+
+def get_report_pdf_store():
+    """
+    Build the configured PDF cache store.
+
+    Returns:
+        LocalPdfCacheStore, S3PdfCacheStore, or None when caching is disabled
+    """
+    backend = current_app.config.get('REPORT_PDF_CACHE_BACKEND', 'local')
+    max_bytes = current_app.config.get('REPORT_PDF_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+
+    if backend == 's3':
+        return S3PdfCacheStore(
+            current_app.config.get('REPORT_PDF_CACHE_S3_BUCKET') or os.environ.get('AWS_S3_BUCKET'),
+            current_app.config.get('REPORT_PDF_CACHE_S3_PREFIX', 'report-pdf-cache'),
+            max_bytes
+        )
+    if backend == 'local':
+        directory = current_app.config.get('REPORT_PDF_CACHE_DIR') or os.path.join(current_app.instance_path, 'report_pdf_cache')
+        return LocalPdfCacheStore(directory, max_bytes)
+    return None
+
+
+def _cache_get(store, key):
+    if store is None:
+        return None
+    try:
+        return store.get(key)
+    except Exception as e:
+        current_app.logger.warning(f"Report PDF cache read failed for {key}: {str(e)}")
+        return None
+
+
+def _cache_put(store, key, pdf_data):
+    """Write a PDF to the store, returning whether it was stored"""
+    if store is None:
+        return False
+    try:
+        store.put(key, pdf_data)
+        return True
+    except Exception as e:
+        current_app.logger.warning(f"Report PDF cache write failed for {key}: {str(e)}")
+        return False
+
+
+def _cache_evict(store, force=False):
+    """
+    Trim the store back to its size limit.
+
+    Listing the whole store is expensive, so single writes only trigger a
+    pass once per REPORT_PDF_CACHE_EVICT_INTERVAL seconds per process; batch
+    runs force one pass after writing all their PDFs. The store may overshoot
+    its limit by whatever is written in between.
+    """
+    if store is None:
+        return
+
+    now = time.monotonic()
+    interval = current_app.config.get('REPORT_PDF_CACHE_EVICT_INTERVAL', 300)
+    with _eviction_lock:
+        last_eviction = _last_eviction.get(store.location)
+        if not force and last_eviction is not None and now - last_eviction < interval:
+            return
+        _last_eviction[store.location] = now
+
+    try:
+        store.evict()
+    except Exception as e:
+        current_app.logger.warning(f"Report PDF cache eviction failed for {store.location}: {str(e)}")
+
+
+def render_report_pdf(payload, generator):
+    """
+    Render a serialised report to PDF bytes.
+
+    Wilton clubs use the Wilton generator (schools letter, filled template or
+    its generic fallback). If that fails the standard generator is used
+    instead and the result is flagged as not cacheable, so a transient
+    failure does not pin the fallback PDF under the Wilton key.
+
+    Returns:
+        tuple: (pdf bytes, whether the bytes may be cached under the key)
+    """
+    if generator == WILTON_GENERATOR:
+        try:
+            from app.utils.wilton_report_generator import EnhancedWiltonReportGenerator
+
+            config_path = get_wilton_config_path()
+            if not os.path.exists(config_path):
+                raise Exception(f"Config file not found at: {config_path}")
+
+            wilton_generator = EnhancedWiltonReportGenerator(config_path)
+            return wilton_generator.render_payload_bytes(payload), True
+
+        except Exception as e:
+            current_app.logger.error(f"Error generating Wilton report for report {payload['id']}: {str(e)}")
+            current_app.logger.error(traceback.format_exc())
+            current_app.logger.info("Falling back to standard report generator")
+
+            pdf_buffer = BytesIO()
+            create_single_report_pdf(report_from_payload(payload), pdf_buffer)
+            return pdf_buffer.getvalue(), False
+
+    pdf_buffer = BytesIO()
+    create_single_report_pdf(report_from_payload(payload), pdf_buffer)
+    return pdf_buffer.getvalue(), True
+
+
+def get_report_pdf(report, payload=None):
+    """
+    Return a report's PDF, rendering it only when no cached copy exists.
+
+    Args:
+        report: Report to render
+        payload: Optional pre-serialised report
+
+    Returns:
+        tuple: (pdf bytes, cache key, whether the bytes came from or were
+        written to the store). The key is only a valid strong ETag when the
+        last flag is set; otherwise the bytes are a fallback or a fresh,
+        non-deterministic render.
+    """
+    payload = payload or serialize_report(report)
+    generator = get_report_generator(payload)
+    key = report_pdf_cache_key(payload, generator)
+    store = get_report_pdf_store()
+
+    pdf_data = _cache_get(store, key)
+    if pdf_data is not None:
+        return pdf_data, key, True
+
+    pdf_data, cacheable = render_report_pdf(payload, generator)
+    cached = cacheable and _cache_put(store, key, pdf_data)
+    if cached:
+        _cache_evict(store)
+
+    return pdf_data, key, cached
+
+
+def render_report_pdf_files(payloads, directory, workers=None, progress_callback=None):
+    """
+    Render serialised reports to <directory>/<report id>.pdf in parallel,
+    each with its club's generator and reusing cached PDFs.
+
+    Args:
+        payloads: Serialised reports (see serialize_report)
+        directory: Directory to write the PDFs to
+        workers: Number of worker processes (default: REPORT_PDF_WORKERS config)
+        progress_callback: Optional callable(completed, total) invoked as each generator's reports finish
+
+    Returns:
+        tuple: ({report id: pdf path}, error messages)
+    """
+    from app.utils.report_generator import render_report_files
+    from app.utils.wilton_report_generator import render_wilton_report_files
+
+    jobs = {GENERIC_GENERATOR: [], WILTON_GENERATOR: []}
+    report_ids = {}
+    for payload in payloads:
+        output_path = os.path.join(directory, f"{payload['id']}.pdf")
+        report_ids[output_path] = payload['id']
+        jobs[get_report_generator(payload)].append((payload, output_path))
+
+    generated_reports, errors = [], []
+    if jobs[GENERIC_GENERATOR]:
+        generated, generic_errors = render_report_files(
+            jobs[GENERIC_GENERATOR], workers=workers, progress_callback=progress_callback
+        )
+        generated_reports.extend(generated)
+        errors.extend(generic_errors)
+    if jobs[WILTON_GENERATOR]:
+        generated, wilton_errors = render_wilton_report_files(
+            jobs[WILTON_GENERATOR], get_wilton_config_path(), workers=workers, progress_callback=progress_callback
+        )
+        generated_reports.extend(generated)
+        errors.extend(wilton_errors)
+
+    return {report_ids[path]: path for path in generated_reports}, errors
+
+
+def run_cached_report_jobs(generator, render, jobs, **kwargs):
+    """
+    Batch counterpart of get_report_pdf: copy cached PDFs into place and
+    render only the misses with run_report_jobs, caching what they produce.
+
+    Args:
+        generator: GENERIC_GENERATOR or WILTON_GENERATOR
+        render: Worker render function passed to run_report_jobs
+        jobs: List of (payload, output_path) tuples
+        **kwargs: Passed through to run_report_jobs
+
+    Returns:
+        tuple: (generated output paths, error messages)
+    """
+    store = get_report_pdf_store()
+
+    generated_reports = []
+    pending_jobs = []
+    keys = {}
+
+    for payload, output_path in jobs:
+        key = report_pdf_cache_key(payload, generator)
+        pdf_data = _cache_get(store, key)
+
+        if pdf_data is not None:
+            with open(output_path, 'wb') as f:
+                f.write(pdf_data)
+            generated_reports.append(output_path)
+        else:
+            keys[output_path] = key
+            pending_jobs.append((payload, output_path))
+
+    if pending_jobs:
+        current_app.logger.info(f"Report PDF cache: {len(generated_reports)} hits, {len(pending_jobs)} to render")
+        rendered_reports, errors = run_report_jobs(render, pending_jobs, **kwargs)
+    else:
+        rendered_reports, errors = [], []
+
+    if store is not None and rendered_reports:
+        for output_path in rendered_reports:
+            with open(output_path, 'rb') as f:
+                _cache_put(store, keys[output_path], f.read())
+        _cache_evict(store, force=True)
+
+    return generated_reports + rendered_reports, errors
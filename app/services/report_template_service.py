@@ -0,0 +1,114 @@
+# app/services/report_template_service.py
+
+import threading
+from collections import OrderedDict
+from app.extensions import db
+from app.models import ReportTemplate, TemplateSection
+
+# Serialised structures kept per process, keyed by (template id, version)
+MAX_CACHED_TEMPLATES = 256
+
+_structures = OrderedDict()
+_structures_lock = threading.Lock()
+
+
+def serialize_template_structure(template):
+    """
+    JSON structure of a template as used by the report editor: sections and
+    their fields, each in display order.
+
+    Args:
+        template: ReportTemplate with sections and fields loaded
+
+    Returns:
+        dict: Template id, name, description, version and sections
+    """
+    return {
+        'id': template.id,
+        'name': template.name,
+        'description': template.description,
+        'version': template.version,
+        'sections': [{
+            'id': section.id,
+            'name': section.name,
+            'order': section.order,
+            'fields': [{
+                'id': field.id,
+                'name': field.name,
+                'description': field.description,
+                'fieldType': field.field_type.value,
+                'isRequired': field.is_required,
+                'order': field.order,
+                'options': field.options
+            } for field in sorted(section.fields, key=lambda f: f.order)]
+        } for section in sorted(template.sections, key=lambda s: s.order)]
+    }
+
+
+def _cache_get(key):
+    with _structures_lock:
+        structure = _structures.get(key)
+        if structure is not None:
+            _structures.move_to_end(key)
+        return structure
+
+
+def _cache_put(key, structure):
+    with _structures_lock:
+        _structures[key] = structure
+        _structures.move_to_end(key)
+        while len(_structures) > MAX_CACHED_TEMPLATES:
+            _structures.popitem(last=False)
+
+
+def get_template_structures(templates):
+    """
+    Serialised structures for several templates.
+
+    Only the templates' id and version are read from the given objects, so
+    their sections are never lazy loaded. Templates missing from the cache
+    are loaded together with their sections and fields in one batch. An
+    edit bumps the template's version, so stale entries are never served
+    by any process.
+
+    Args:
+        templates: ReportTemplate objects
+
+    Returns:
+        dict: {template id: structure}
+    """
+    structures = {}
+    missing_ids = []
+    for template in templates:
+        structure = _cache_get((template.id, template.version))
+        if structure is not None:
+            structures[template.id] = structure
+        else:
+            missing_ids.append(template.id)
+
+    if missing_ids:
+        loaded_templates = ReportTemplate.query.options(
+            db.selectinload(ReportTemplate.sections).selectinload(TemplateSection.fields)
+        ).filter(ReportTemplate.id.in_(missing_ids)).all()
+
+        for template in loaded_templates:
+            structure = serialize_template_structure(template)
+            _cache_put((template.id, template.version), structure)
+            structures[template.id] = structure
+
+    return structures
+
+
+def get_template_structure(template):
+    """Serialised structure of a single template (see get_template_structures)"""
+    return get_template_structures([template])[template.id]
+
+
+def bump_template_version(template):
+    """
+    Mark a template's cached structure as stale; call whenever its sections or fields change.
+
+    The increment happens in the UPDATE itself, so concurrent edits each get
+    their own version instead of both writing the same one.
+    """
+    template.version = ReportTemplate.version + 1
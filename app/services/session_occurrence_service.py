@@ -0,0 +1,225 @@
+# app/services/session_occurrence_service.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, case, func, select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models import (
+    SessionOccurrence, TeachingPeriod, TennisGroupTimes, Register, SessionPlan,
+    Cancellation, CancellationType, DayOfWeek
+)
+
+# Python weekday numbers (Monday = 0) for each DayOfWeek
+DAY_OF_WEEK_INDEX = {
+    DayOfWeek.MONDAY: 0,
+    DayOfWeek.TUESDAY: 1,
+    DayOfWeek.WEDNESDAY: 2,
+    DayOfWeek.THURSDAY: 3,
+    DayOfWeek.FRIDAY: 4,
+    DayOfWeek.SATURDAY: 5,
+    DayOfWeek.SUNDAY: 6
+}
+
+
+def iter_session_dates(day_of_week, start_date, end_date):
+    """
+    Yield every date between start_date and end_date (inclusive) that falls on day_of_week.
+
+    Args:
+        day_of_week: DayOfWeek enum for the group time
+        start_date: First date of the range
+        end_date: Last date of the range
+    """
+    weekday = DAY_OF_WEEK_INDEX.get(day_of_week)
+    if weekday is None:
+        return
+
+    session_date = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+    while session_date <= end_date:
+        yield session_date
+        session_date += timedelta(days=7)
+
+
+def _as_date(value):
+    """Teaching period bounds are stored as datetimes; occurrences use plain dates"""
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _scope_filters(tennis_club_id, teaching_period_id=None, group_time_id=None, start_date=None, end_date=None):
+    filters = [SessionOccurrence.tennis_club_id == tennis_club_id]
+    if teaching_period_id:
+        filters.append(SessionOccurrence.teaching_period_id == teaching_period_id)
+    if group_time_id:
+        filters.append(SessionOccurrence.group_time_id == group_time_id)
+    if start_date:
+        filters.append(SessionOccurrence.date >= start_date)
+    if end_date:
+        filters.append(SessionOccurrence.date <= end_date)
+    return filters
+
+
+def sync_occurrences(tennis_club_id, teaching_period_id=None, group_time_id=None):
+    """
+    Regenerate occurrence rows after group times or teaching periods change.
+
+    Missing sessions are inserted and sessions that no longer fall on the group
+    time's day or inside the period are removed, then register, plan and
+    cancellation links are refreshed for the affected rows. Runs inside the
+    caller's transaction; the caller commits.
+
+    Args:
+        tennis_club_id: ID of the tennis club
+        teaching_period_id: Optional teaching period to limit the sync to
+        group_time_id: Optional group time to limit the sync to
+    """
+    periods_query = db.session.query(
+        TeachingPeriod.id, TeachingPeriod.start_date, TeachingPeriod.end_date
+    ).filter(TeachingPeriod.tennis_club_id == tennis_club_id)
+    if teaching_period_id:
+        periods_query = periods_query.filter(TeachingPeriod.id == teaching_period_id)
+
+    group_times_query = db.session.query(
+        TennisGroupTimes.id, TennisGroupTimes.day_of_week
+    ).filter(TennisGroupTimes.tennis_club_id == tennis_club_id)
+    if group_time_id:
+        group_times_query = group_times_query.filter(TennisGroupTimes.id == group_time_id)
+
+    periods = periods_query.all()
+    group_times = group_times_query.all()
+
+    expected = set()
+    for period in periods:
+        period_start = _as_date(period.start_date)
+        period_end = _as_date(period.end_date)
+        for group_time in group_times:
+            for session_date in iter_session_dates(group_time.day_of_week, period_start, period_end):
+                expected.add((period.id, group_time.id, session_date))
+
+    scope = _scope_filters(tennis_club_id, teaching_period_id, group_time_id)
+    existing = {
+        (row.teaching_period_id, row.group_time_id, row.date): row.id
+        for row in db.session.query(
+            SessionOccurrence.id,
+            SessionOccurrence.teaching_period_id,
+            SessionOccurrence.group_time_id,
+            SessionOccurrence.date
+        ).filter(*scope).all()
+    }
+
+    stale_ids = [occurrence_id for key, occurrence_id in existing.items() if key not in expected]
+    if stale_ids:
+        db.session.execute(delete(SessionOccurrence).where(SessionOccurrence.id.in_(stale_ids)))
+
+    missing = [
+        {
+            'tennis_club_id': tennis_club_id,
+            'teaching_period_id': period_id,
+            'group_time_id': occurrence_group_time_id,
+            'date': session_date
+        }
+        for period_id, occurrence_group_time_id, session_date in expected
+        if (period_id, occurrence_group_time_id, session_date) not in existing
+    ]
+    if missing:
+        db.session.execute(
+            insert(SessionOccurrence).values(missing).on_conflict_do_nothing(
+                index_elements=['teaching_period_id', 'group_time_id', 'date']
+            )
+        )
+
+    refresh_occurrence_links(tennis_club_id, teaching_period_id, group_time_id)
+    refresh_occurrence_cancellations(tennis_club_id, teaching_period_id, group_time_id)
+
+
+def ensure_period_occurrences(tennis_club_id, teaching_period_id):
+    """
+    Generate occurrences for a period that has none yet (new or pre-existing periods).
+
+    Returns:
+        bool: True if occurrences were generated and committed
+    """
+    has_occurrences = db.session.query(SessionOccurrence.id).filter_by(
+        tennis_club_id=tennis_club_id,
+        teaching_period_id=teaching_period_id
+    ).first()
+
+    if has_occurrences:
+        return False
+
+    sync_occurrences(tennis_club_id, teaching_period_id=teaching_period_id)
+    db.session.commit()
+    return True
+
+
+def refresh_occurrence_links(tennis_club_id, teaching_period_id=None, group_time_id=None,
+                             start_date=None, end_date=None):
+    """
+    Re-point occurrences at their register and active session plan.
+
+    Call after registers or session plans are created, moved or deleted.
+    """
+    register_id = select(func.min(Register.id)).where(
+        Register.group_time_id == SessionOccurrence.group_time_id,
+        Register.date == SessionOccurrence.date,
+        Register.teaching_period_id == SessionOccurrence.teaching_period_id
+    ).scalar_subquery()
+
+    session_plan_id = select(func.min(SessionPlan.id)).where(
+        SessionPlan.group_time_id == SessionOccurrence.group_time_id,
+        SessionPlan.date == SessionOccurrence.date,
+        SessionPlan.teaching_period_id == SessionOccurrence.teaching_period_id,
+        SessionPlan.is_active == True
+    ).scalar_subquery()
+
+    db.session.execute(
+        update(SessionOccurrence)
+        .where(*_scope_filters(tennis_club_id, teaching_period_id, group_time_id, start_date, end_date))
+        .values(register_id=register_id, session_plan_id=session_plan_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_occurrence_cancellations(tennis_club_id, teaching_period_id=None, group_time_id=None):
+    """
+    Recompute cancellation status for a club's occurrences.
+
+    Session cancellations take precedence over day cancellations, which take
+    precedence over week cancellations. Call after any cancellation write.
+    """
+    cancellation_reason = select(Cancellation.reason).where(
+        Cancellation.tennis_club_id == SessionOccurrence.tennis_club_id,
+        Cancellation.is_active == True,
+        or_(
+            and_(
+                Cancellation.cancellation_type == CancellationType.SESSION,
+                Cancellation.group_time_id == SessionOccurrence.group_time_id,
+                Cancellation.specific_date == SessionOccurrence.date
+            ),
+            and_(
+                Cancellation.cancellation_type == CancellationType.DAY,
+                Cancellation.specific_date == SessionOccurrence.date
+            ),
+            and_(
+                Cancellation.cancellation_type == CancellationType.WEEK,
+                Cancellation.week_start_date <= SessionOccurrence.date,
+                Cancellation.week_end_date >= SessionOccurrence.date
+            )
+        )
+    ).order_by(
+        case(
+            (Cancellation.cancellation_type == CancellationType.SESSION, 0),
+            (Cancellation.cancellation_type == CancellationType.DAY, 1),
+            else_=2
+        ),
+        Cancellation.id
+    ).limit(1).scalar_subquery()
+
+    db.session.execute(
+        update(SessionOccurrence)
+        .where(*_scope_filters(tennis_club_id, teaching_period_id, group_time_id))
+        .values(
+            cancellation_reason=cancellation_reason,
+            is_cancelled=cancellation_reason.is_not(None)
+        )
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,205 @@
+# app/services/stats_cache_service.py
+
+from flask import current_app
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+from app.extensions import db
+from app.models import (
+    StatsCacheVersion, StatsCacheEntry, TennisClub, TennisGroup, TennisGroupTimes,
+    ProgrammePlayers, Report, ReportTemplate, GroupTemplate, TeachingPeriod, User
+)
+
+
+def _current_version(tennis_club_id):
+    return func.coalesce(
+        select(StatsCacheVersion.version)
+        .where(StatsCacheVersion.tennis_club_id == tennis_club_id)
+        .scalar_subquery(),
+        0
+    )
+
+
+def get_cached_stats(cache_key, tennis_club_id, compute):
+    """
+    Return cached statistics for a key, computing them on a miss.
+
+    A hit is a single indexed lookup that also checks the entry against the
+    club's current version. Concurrent misses for the same key - in any
+    process - are coalesced with a transaction-scoped advisory lock, so only
+    the first request computes and the rest read its result.
+
+    Args:
+        cache_key: Unique key for the statistics (include club, period and role)
+        tennis_club_id: Club whose version the entry is validated against
+        compute: Callable returning a JSON-serialisable payload
+
+    Returns:
+        The cached or freshly computed payload
+    """
+    def lookup():
+        return db.session.execute(
+            select(StatsCacheEntry.payload).where(
+                StatsCacheEntry.cache_key == cache_key,
+                StatsCacheEntry.version == _current_version(tennis_club_id)
+            )
+        ).scalar()
+
+    payload = lookup()
+    if payload is not None:
+        return payload
+
+    # Serialise computation of this key, then check whether another request filled it
+    db.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(cache_key))))
+    payload = lookup()
+    if payload is not None:
+        db.session.commit()
+        return payload
+
+    # Read the version before computing so a write committed mid-compute leaves the entry stale
+    version = db.session.execute(select(_current_version(tennis_club_id))).scalar()
+    payload = compute()
+
+    statement = insert(StatsCacheEntry).values(
+        cache_key=cache_key,
+        tennis_club_id=tennis_club_id,
+        version=version,
+        payload=payload
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['cache_key'],
+        set_={
+            'version': statement.excluded.version,
+            'payload': statement.excluded.payload,
+            'computed_at': func.current_timestamp()
+        }
+    ))
+    db.session.commit()  # Releases the advisory lock
+
+    return payload
+
+
+PENDING_KEY = 'stats_cache_pending'
+
+
+def _bump_versions(connection, club_ids=(), player_ids=(), organisation_ids=(), group_ids=(), organisation_club_ids=()):
+    """Increment the version of every club affected by a write"""
+    OrganisationClub = aliased(TennisClub)
+
+    conditions = []
+    if club_ids:
+        conditions.append(TennisClub.id.in_(club_ids))
+    if player_ids:
+        conditions.append(TennisClub.id.in_(
+            select(ProgrammePlayers.tennis_club_id).where(ProgrammePlayers.id.in_(player_ids))
+        ))
+    if organisation_ids:
+        conditions.append(TennisClub.organisation_id.in_(organisation_ids))
+    if group_ids:
+        conditions.append(TennisClub.organisation_id.in_(
+            select(TennisGroup.organisation_id).where(TennisGroup.id.in_(group_ids))
+        ))
+    if organisation_club_ids:
+        conditions.append(TennisClub.organisation_id.in_(
+            select(OrganisationClub.organisation_id).where(OrganisationClub.id.in_(organisation_club_ids))
+        ))
+
+    if not conditions:
+        return
+
+    affected_club_ids = connection.execute(
+        select(TennisClub.id).where(or_(*conditions)).order_by(TennisClub.id)
+    ).scalars().all()
+    if not affected_club_ids:
+        return
+
+    # Rows are locked in tennis_club_id order, so concurrent organisation-wide bumps can't deadlock
+    statement = insert(StatsCacheVersion).values([
+        {'tennis_club_id': club_id, 'version': 1} for club_id in affected_club_ids
+    ])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=['tennis_club_id'],
+        set_={
+            'version': StatsCacheVersion.version + 1,
+            'updated_at': func.current_timestamp()
+        }
+    ))
+
+
+def _pending_invalidations(session):
+    return session.info.setdefault(PENDING_KEY, {
+        'club_ids': set(),
+        'player_ids': set(),
+        'organisation_ids': set(),
+        'group_ids': set(),
+        'organisation_club_ids': set()
+    })
+
+
+def invalidate_stats_cache(tennis_club_id=None, organisation_id=None):
+    """
+    Mark a club's (or a whole organisation's) cached statistics as stale
+    once the current transaction commits.
+
+    ORM writes are picked up automatically; call this after bulk Core
+    statements that bypass the session's flush.
+    """
+    pending = _pending_invalidations(db.session)
+    if tennis_club_id:
+        pending['club_ids'].add(tennis_club_id)
+    if organisation_id:
+        pending['organisation_ids'].add(organisation_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_flush(session, flush_context):
+    """Record the clubs whose statistics inputs changed in this flush"""
+    pending = _pending_invalidations(session)
+
+    changed = list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    ]
+
+    for obj in changed:
+        if isinstance(obj, (ProgrammePlayers, TeachingPeriod, TennisGroupTimes)):
+            pending['club_ids'].add(obj.tennis_club_id)
+        elif isinstance(obj, Report):
+            pending['player_ids'].add(obj.programme_player_id)
+        elif isinstance(obj, (TennisGroup, ReportTemplate)):
+            pending['organisation_ids'].add(obj.organisation_id)
+        elif isinstance(obj, GroupTemplate):
+            pending['group_ids'].add(obj.group_id)
+        elif isinstance(obj, User):
+            # Coach summaries list coaches from across the organisation
+            pending['organisation_club_ids'].add(obj.tennis_club_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    """
+    Bump the recorded clubs' versions in a short transaction of their own.
+
+    Doing this after the writer commits keeps the version rows out of the
+    writer's transaction, so concurrent report saves in a club don't queue
+    on its row. A request that reads the cache between the two commits can
+    still get the previous statistics.
+    """
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+
+    ids = {name: {value for value in values if value} for name, values in pending.items()}
+    if not any(ids.values()):
+        return
+
+    try:
+        with session.get_bind(mapper=StatsCacheVersion.__mapper__).begin() as connection:
+            _bump_versions(connection, **ids)
+    except Exception as e:
+        current_app.logger.error(f"Error invalidating statistics cache: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    """Forget invalidations recorded by a transaction that was rolled back"""
+    session.info.pop(PENDING_KEY, None)
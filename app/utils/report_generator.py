@@ -3,6 +3,11 @@
 
 from io import BytesIO
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import SimpleNamespace
+from collections import OrderedDict
+import multiprocessing
+import threading
 import os
 import re
 import json
@@ -28,6 +33,9 @@ except Exception as e:
 
 class CompactTennisReportGenerator:
     """Complete tennis report generator with proper mixed section support"""
+
+    # Bump when the rendered output changes so cached PDFs are re-rendered
+    GENERATOR_VERSION = 1
     
     # Rating scale descriptions
     RATING_DESCRIPTIONS = {
@@ -87,35 +95,30 @@ class CompactTennisReportGenerator:
         if not template or not template.sections:
             return sections_html + self._process_content_to_html_simple_ordered(content)
         
-        # Get template sections ordered by their order field
-        ordered_sections = sorted(template.sections, key=lambda s: s.order)
+        # Template sections and fields in order, compiled once per template version
+        compiled_template = get_compiled_template(template)
+        
+        # Index the content once, then look up every field directly
+        content_index = self._index_content(content)
         
         # Process each template section
-        for template_section in ordered_sections:
-            section_html = self._process_template_section(template_section, content)
+        for section_name, fields in compiled_template.sections:
+            section_html = self._process_template_section(section_name, fields, content_index)
             if section_html.strip():
                 sections_html += section_html
         
         return sections_html or '<div class="section"><h3>Assessment</h3><p>No assessment provided.</p></div>'
     
-    def _process_template_section(self, template_section, content):
-        """Process a single template section with its fields"""
-        section_name = template_section.name
-        
-        # Get template fields ordered by their order
-        ordered_fields = sorted(template_section.fields, key=lambda f: f.order) if template_section.fields else []
-        
-        if not ordered_fields:
+    def _process_template_section(self, section_name, fields, content_index):
+        """Process a single compiled template section with its fields"""
+        if not fields:
             return ""
         
         # Collect field values for this section
         section_data = {}
         
-        for template_field in ordered_fields:
-            field_name = template_field.name
-            
-            # Look for this field in the content
-            field_value = self._find_field_value_in_content(content, field_name)
+        for field_name, lookup_key in fields:
+            field_value = content_index.get(lookup_key)
             
             if field_value is not None:
                 section_data[field_name] = field_value
@@ -149,36 +152,28 @@ class CompactTennisReportGenerator:
         else:
             return self._create_text_section(section_name, text_fields)
     
-    def _find_field_value_in_content(self, content, field_name):
-        """Find a field value anywhere in the nested content structure"""
-        if not content or not isinstance(content, dict):
-            return None
+    def _index_content(self, content):
+        """
+        Map normalised field names to values anywhere in the nested content.
         
-        # Direct match in top level
-        for key, value in content.items():
-            if self._fields_match(key, field_name):
-                return value
+        Top-level keys win over nested ones, and earlier nested dictionaries
+        win over later ones, unless they only hold None for the field.
+        """
+        index = {}
         
-        # Search in nested dictionaries
+        # Direct matches in top level
         for key, value in content.items():
-            if isinstance(value, dict):
-                result = self._find_field_value_in_content(value, field_name)
-                if result is not None:
-                    return result
-        
-        return None
-    
-    def _fields_match(self, content_key, field_name):
-        """Check if a content key matches a field name"""
-        # Exact match (case-insensitive)
-        if content_key.lower().strip() == field_name.lower().strip():
-            return True
+            index.setdefault(normalise_field_name(key), value)
+        top_level_keys = set(index)
         
-        # Remove common prefixes/suffixes and check again
-        content_clean = content_key.lower().strip().rstrip('*').lstrip('•').strip()
-        field_clean = field_name.lower().strip().rstrip('*').lstrip('•').strip()
+        # Matches in nested dictionaries
+        for value in content.values():
+            if isinstance(value, dict):
+                for key, nested_value in self._index_content(value).items():
+                    if key not in top_level_keys and index.get(key) is None:
+                        index[key] = nested_value
         
-        return content_clean == field_clean
+        return index
     
     def _is_rating_field(self, value):
         """Check if a single field value is a rating"""
@@ -1046,6 +1041,69 @@ class CompactTennisReportGenerator:
 </html>
         '''
 
+def normalise_field_name(name):
+    """Field name as matched against content keys: case-insensitive, ignoring bullets and required markers"""
+    return name.lower().strip().rstrip('*').lstrip('•').strip()
+
+
+class CompiledTemplate:
+    """
+    A report template reduced to what rendering needs: sections in order,
+    each with its field names in order and their normalised content keys.
+    """
+
+    def __init__(self, structure):
+        self.sections = [
+            (section_name, [(field_name, normalise_field_name(field_name)) for field_name, _ in fields])
+            for section_name, _, fields in structure
+        ]
+
+
+# Compiled templates kept per process, keyed by (template id, version)
+MAX_COMPILED_TEMPLATES = 256
+
+_compiled_templates = OrderedDict()
+_compiled_templates_lock = threading.Lock()
+
+
+def _template_structure(template):
+    """Sections and fields of a template in order, as CompiledTemplate expects"""
+    return [
+        (
+            section.name,
+            section.order,
+            [(field.name, field.order) for field in sorted(section.fields or [], key=lambda f: f.order)]
+        )
+        for section in sorted(template.sections, key=lambda s: s.order)
+    ]
+
+
+def get_compiled_template(template):
+    """
+    Compiled form of a template, shared by every report rendered with it.
+
+    Cached by template id and version (bumped on every edit), so a cache hit
+    costs a dict lookup; templates without an id or version are compiled
+    each time.
+    """
+    key = (getattr(template, 'id', None), getattr(template, 'version', None))
+    if None in key:
+        return CompiledTemplate(_template_structure(template))
+
+    with _compiled_templates_lock:
+        compiled = _compiled_templates.get(key)
+        if compiled is not None:
+            _compiled_templates.move_to_end(key)
+            return compiled
+
+    compiled = CompiledTemplate(_template_structure(template))
+    with _compiled_templates_lock:
+        _compiled_templates[key] = compiled
+        while len(_compiled_templates) > MAX_COMPILED_TEMPLATES:
+            _compiled_templates.popitem(last=False)
+    return compiled
+
+
 def create_single_report_pdf(report, output_buffer):
     """Create an enhanced tennis report PDF using HTML/CSS"""
     if not HTML_AVAILABLE:
@@ -1059,10 +1117,206 @@ def create_single_report_pdf(report, output_buffer):
         print(f"Error in create_single_report_pdf: {str(e)}")
         raise
 
-def batch_generate_reports(period_id):
-    """Generate reports for all completed reports in a teaching period"""
+def serialize_report(report):
+    """
+    Flatten a report and the relationships the PDF generators read into plain data.
+
+    The payload can be pickled to a worker process, which renders it without
+    a database session.
+
+    Args:
+        report: Report with its student, coach, group, period and template loaded
+
+    Returns:
+        dict: Picklable report payload
+    """
+    group_time = report.programme_player.group_time if report.programme_player else None
+    teaching_period = report.teaching_period
+
+    return {
+        'id': report.id,
+        'content': report.content,
+        'student_name': report.student.name,
+        'coach_name': report.coach.name,
+        'group_name': report.tennis_group.name,
+        'club_name': report.programme_player.tennis_club.name,
+        'term_name': teaching_period.name,
+        'recommended_group_name': report.recommended_group.name if report.recommended_group else None,
+        'next_period_start_date': teaching_period.next_period_start_date.strftime('%Y-%m-%d') if teaching_period.next_period_start_date else None,
+        'bookings_open_date': teaching_period.bookings_open_date.strftime('%Y-%m-%d') if teaching_period.bookings_open_date else None,
+        'template_id': report.template_id,
+        'template_version': report.template.version if report.template else None,
+        'group_time': {
+            'day': group_time.day_of_week.value.lower(),
+            'start_time': group_time.start_time.strftime('%I%M%p').lower(),
+            'end_time': group_time.end_time.strftime('%I%M%p').lower()
+        } if group_time else None,
+        'sections': [
+            {
+                'name': section.name,
+                'order': section.order,
+                'fields': [{'name': field.name, 'order': field.order} for field in section.fields]
+            }
+            for section in report.template.sections
+        ] if report.template else None
+    }
+
+
+def report_from_payload(payload):
+    """Rebuild the attributes CompactTennisReportGenerator reads from a serialised report"""
+    sections = payload['sections']
+
+    return SimpleNamespace(
+        id=payload['id'],
+        content=payload['content'],
+        student=SimpleNamespace(name=payload['student_name']),
+        coach=SimpleNamespace(name=payload['coach_name']),
+        tennis_group=SimpleNamespace(name=payload['group_name']),
+        teaching_period=SimpleNamespace(name=payload['term_name']),
+        programme_player=SimpleNamespace(tennis_club=SimpleNamespace(name=payload['club_name'])),
+        recommended_group=SimpleNamespace(name=payload['recommended_group_name']) if payload['recommended_group_name'] else None,
+        template=SimpleNamespace(id=payload['template_id'], version=payload.get('template_version'), sections=[
+            SimpleNamespace(
+                name=section['name'],
+                order=section['order'],
+                fields=[SimpleNamespace(**field) for field in section['fields']]
+            )
+            for section in sections
+        ]) if sections is not None else None
+    )
+
+
+def get_report_output_path(period_dir, payload):
+    """Build the standard group folder and file name for a serialised report"""
+    group_name = payload['group_name'].replace(' ', '_').lower()
+
+    if payload['group_time']:
+        time = payload['group_time']
+        group_dir = f"{group_name}_{time['day']}_{time['start_time']}_{time['end_time']}_reports"
+    else:
+        group_dir = f"{group_name}_reports"
+
+    student_name = payload['student_name'].replace(' ', '_').lower()
+    term_name = payload['term_name'].replace(' ', '_').lower()
+    filename = f"{student_name}_{group_name}_{term_name}_report.pdf"
+
+    return os.path.join(period_dir, group_dir, filename)
+
+
+def _render_report_payload(payload, output_path):
+    """Worker entry point: render one serialised report to output_path"""
+    try:
+        success = create_single_report_pdf(report_from_payload(payload), output_path)
+
+        if success and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            return output_path, None
+        return None, f"Failed to generate report for {payload['student_name']}"
+
+    except Exception as e:
+        return None, f"Error generating report for {payload['student_name']}: {str(e)}"
+
+
+def run_report_jobs(render, jobs, workers=None, progress_callback=None, initializer=None, initargs=()):
+    """
+    Render a list of report jobs, spread across worker processes.
+
+    PDF rendering is CPU-bound, so a process pool sidesteps the GIL. Workers
+    are spawned rather than forked so they never inherit the parent's
+    database connections or threads; each job is a picklable payload and
+    the worker only writes its PDF to disk.
+
+    Args:
+        render: Module-level function called as render(payload, output_path),
+            returning (output_path or None, error message or None)
+        jobs: List of (payload, output_path) tuples
+        workers: Number of worker processes (default: REPORT_PDF_WORKERS config);
+            1 renders in the current process
+        progress_callback: Optional callable(completed, total) invoked as jobs finish
+        initializer: Optional per-worker setup function
+        initargs: Arguments for the initializer
+
+    Returns:
+        tuple: (generated output paths, error messages), both in job order
+    """
     from flask import current_app
-    from app.models import Report, TeachingPeriod
+
+    total = len(jobs)
+    if workers is None:
+        workers = current_app.config.get('REPORT_PDF_WORKERS') or os.cpu_count() or 1
+    workers = max(1, min(int(workers), total))
+
+    results = [None] * total
+
+    def record(index, result, completed):
+        results[index] = result
+        if progress_callback:
+            progress_callback(completed, total)
+        elif completed == total or completed % 25 == 0:
+            current_app.logger.info(f"Generated {completed}/{total} reports")
+
+    if workers == 1:
+        if initializer:
+            initializer(*initargs)
+        for index, (payload, output_path) in enumerate(jobs):
+            record(index, render(payload, output_path), index + 1)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=initializer,
+            initargs=initargs
+        ) as executor:
+            futures = {
+                executor.submit(render, payload, output_path): index
+                for index, (payload, output_path) in enumerate(jobs)
+            }
+
+            for completed, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process itself failed (e.g. it was killed)
+                    result = (None, f"Error generating report for {jobs[index][0]['student_name']}: {str(e)}")
+                record(index, result, completed)
+
+    generated_reports = [output_path for output_path, _ in results if output_path]
+    errors = [error for _, error in results if error]
+
+    for error in errors:
+        current_app.logger.error(error)
+
+    return generated_reports, errors
+
+
+def render_report_files(jobs, workers=None, progress_callback=None):
+    """
+    Render (payload, output_path) jobs with the standard generator, reusing cached PDFs.
+
+    Returns:
+        tuple: (generated output paths, error messages)
+    """
+    from app.services.report_pdf_cache_service import run_cached_report_jobs, GENERIC_GENERATOR
+
+    return run_cached_report_jobs(
+        GENERIC_GENERATOR, _render_report_payload, jobs, workers=workers, progress_callback=progress_callback
+    )
+
+
+def batch_generate_reports(period_id, workers=None, progress_callback=None):
+    """
+    Generate reports for all completed reports in a teaching period.
+
+    Reports are loaded and serialised up front; cached PDFs are copied into
+    place and the rest are rendered in parallel.
+
+    Args:
+        period_id: Teaching period to generate reports for
+        workers: Number of worker processes (default: REPORT_PDF_WORKERS config)
+        progress_callback: Optional callable(completed, total) invoked as reports finish
+    """
+    from flask import current_app
+    from app.models import Report, ReportTemplate, TemplateSection, ProgrammePlayers
     from app import db
     
     try:
@@ -1072,9 +1326,14 @@ def batch_generate_reports(period_id):
         ).join(Report.programme_player)\
          .join(Report.teaching_period)\
          .options(
+             db.joinedload(Report.student),
+             db.joinedload(Report.coach),
+             db.joinedload(Report.tennis_group),
              db.joinedload(Report.recommended_group),
              db.joinedload(Report.teaching_period),
-             db.joinedload(Report.template).joinedload('sections').joinedload('fields')
+             db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.group_time),
+             db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.tennis_club),
+             db.selectinload(Report.template).selectinload(ReportTemplate.sections).selectinload(TemplateSection.fields)
          ).all()
         
         if not reports:
@@ -1091,41 +1350,25 @@ def batch_generate_reports(period_id):
         period_dir = os.path.join(reports_dir, f'reports-{period_name}')
         os.makedirs(period_dir, exist_ok=True)
         
-        generated_reports = []
+        jobs = []
         errors = []
         
         for report in reports:
             try:
-                group_name = report.tennis_group.name.replace(' ', '_').lower()
-
-                if report.programme_player and report.programme_player.group_time:
-                    time = report.programme_player.group_time
-                    start_time = time.start_time.strftime('%I%M%p').lower()
-                    end_time = time.end_time.strftime('%I%M%p').lower()
-                    day = time.day_of_week.value.lower()
-                    group_dir = f"{group_name}_{day}_{start_time}_{end_time}_reports"
-                else:
-                    group_dir = f"{group_name}_reports"
-                
-                full_group_dir = os.path.join(period_dir, group_dir)
-                os.makedirs(full_group_dir, exist_ok=True)
-                
-                student_name = report.student.name.replace(' ', '_').lower()
-                term_name = report.teaching_period.name.replace(' ', '_').lower()
-                filename = f"{student_name}_{group_name}_{term_name}_report.pdf"
-                output_path = os.path.join(full_group_dir, filename)
-                
-                success = create_single_report_pdf(report, output_path)
-                
-                if success and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                    generated_reports.append(output_path)
-                else:
-                    errors.append(f"Failed to generate report for {report.student.name}")
+                payload = serialize_report(report)
+                output_path = get_report_output_path(period_dir, payload)
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                jobs.append((payload, output_path))
                     
             except Exception as e:
                 error_msg = f"Error generating report for {report.student.name}: {str(e)}"
                 errors.append(error_msg)
                 current_app.logger.error(error_msg)
+
+        generated_reports, render_errors = render_report_files(
+            jobs, workers=workers, progress_callback=progress_callback
+        ) if jobs else ([], [])
+        errors.extend(render_errors)
         
         return {
             'success': len(generated_reports),
@@ -1,6 +1,7 @@
 from flask import current_app
 from app import create_app, db
-from app.models import Report, TeachingPeriod
+from app.models import Report, TeachingPeriod, ReportTemplate, TemplateSection, ProgrammePlayers
+from app.utils.report_generator import serialize_report, report_from_payload, get_report_output_path
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
@@ -9,14 +10,201 @@ import os
 import traceback
 import json
 import random
-import shutil
+import threading
 from random import uniform
 from datetime import datetime
 from reportlab.lib.colors import Color
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'pdf_templates')
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'fonts')
+SCHOOLS_LETTER_FILENAME = 'wilton_schools_letter.pdf'
+
+
+def write_pdf_output(output_path, pdf_data):
+    """Write PDF bytes to a file path or a binary stream"""
+    if isinstance(output_path, str):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(pdf_data)
+    else:
+        output_path.write(pdf_data)
+
+
+def _normalize_group_name(group_name):
+    return group_name.lower().replace(' ', '_')
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class WiltonAssetRegistry:
+    """
+    Process-wide cache of the Wilton generator's config, font and PDF templates.
+
+    Each asset is loaded on first use and reloaded when its file (or, for the
+    template list, the template directory) changes mtime. Group name matches
+    against templates and config keys are resolved once per name.
+    """
+
+    def __init__(self, template_dir=TEMPLATE_DIR, fonts_dir=FONTS_DIR):
+        self.template_dir = template_dir
+        self.fonts_dir = fonts_dir
+        self._lock = threading.RLock()
+        self._configs = {}            # config path -> (mtime, config, {group name: group config})
+        self._font_name = None
+        self._templates = None        # (directory mtime, [(template key, path)], {group name: path})
+        self._pdf_bytes = {}          # path -> (mtime, bytes)
+
+    def _load_config(self, config_path):
+        mtime = _mtime(config_path)
+        cached = self._configs.get(config_path)
+        if cached and cached[0] == mtime:
+            return cached
+
+        with self._lock:
+            cached = self._configs.get(config_path)
+            if cached and cached[0] == mtime:
+                return cached
+
+            with open(config_path, 'r') as f:
+                cached = (mtime, json.load(f), {})
+            self._configs[config_path] = cached
+            return cached
+
+    def get_config(self, config_path):
+        """Return the parsed group config"""
+        return self._load_config(config_path)[1]
+
+    def get_group_config(self, config_path, group_name):
+        """Return the best matching config entry for a group, or None"""
+        _, config, matches = self._load_config(config_path)
+
+        if group_name not in matches:
+            matches[group_name] = self._match_group_config(config, group_name)
+        return matches[group_name]
+
+    @staticmethod
+    def _match_group_config(config, group_name):
+        # First try exact match
+        if group_name in config:
+            return config[group_name]
+        
+        # Normalize the group name for comparison
+        normalized_group = _normalize_group_name(group_name)
+        
+        # Sort config keys by length (descending) to prefer more specific matches
+        for config_key in sorted(config.keys(), key=len, reverse=True):
+            normalized_key = _normalize_group_name(config_key)
+            
+            # Check if the normalized key is in the normalized group name
+            if normalized_key in normalized_group:
+                return config[config_key]
+            
+            # Also check the reverse - if the group name is in the config key
+            # This can help with cases where the config is more specific than the group name
+            if normalized_group in normalized_key:
+                return config[config_key]
+        
+        # If no match found, return None
+        return None
+
+    def get_font_name(self):
+        """Register the handwriting font once and return the font name to draw with"""
+        if self._font_name:
+            return self._font_name
+
+        with self._lock:
+            if not self._font_name:
+                try:
+                    pdfmetrics.registerFont(TTFont('Handwriting', os.path.join(self.fonts_dir, 'caveat.ttf')))
+                    self._font_name = 'Handwriting'
+                except:
+                    print("Warning: Handwriting font not found, falling back to Helvetica")
+                    self._font_name = 'Helvetica-Bold'
+            return self._font_name
+
+    def _load_templates(self):
+        mtime = _mtime(self.template_dir)
+        cached = self._templates
+        if cached and cached[0] == mtime:
+            return cached
+
+        with self._lock:
+            if mtime is None:
+                templates = []
+            else:
+                template_files = [
+                    f for f in os.listdir(self.template_dir)
+                    if f.startswith('wilton_') and f.endswith('_report.pdf')
+                ]
+                # Sort templates by length (descending) to prefer more specific matches
+                template_files.sort(key=len, reverse=True)
+
+                # The part between 'wilton_' and '_report.pdf' is matched against group names
+                templates = [
+                    (f[len('wilton_'):-len('_report.pdf')], os.path.join(self.template_dir, f))
+                    for f in template_files
+                ]
+
+            self._templates = (mtime, templates, {})
+            return self._templates
+
+    def get_template_path(self, group_name):
+        """Return the template whose key appears in the group name, or None"""
+        _, templates, matches = self._load_templates()
+
+        if group_name not in matches:
+            normalized_group = _normalize_group_name(group_name)
+            matches[group_name] = next(
+                (path for template_key, path in templates if template_key in normalized_group),
+                None
+            )
+        return matches[group_name]
+
+    def get_pdf_bytes(self, path):
+        """Return the raw bytes of a template PDF"""
+        mtime = _mtime(path)
+        cached = self._pdf_bytes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            pdf_data = f.read()
+        self._pdf_bytes[path] = (mtime, pdf_data)
+        return pdf_data
+
+    def preload(self, config_path):
+        """Load the config, font and every template up front (e.g. in a batch worker)"""
+        self.get_config(config_path)
+        self.get_font_name()
+        for _, path in self._load_templates()[1]:
+            self.get_pdf_bytes(path)
+
+        schools_letter_path = os.path.join(self.template_dir, SCHOOLS_LETTER_FILENAME)
+        if os.path.exists(schools_letter_path):
+            self.get_pdf_bytes(schools_letter_path)
+
+
+wilton_assets = WiltonAssetRegistry()
+
+
+def resolve_template_path(group_name):
+    """Return the PDF a group's report is drawn from (schools letter or group template), or None"""
+    if 'school' in group_name.lower():
+        return os.path.join(wilton_assets.template_dir, SCHOOLS_LETTER_FILENAME)
+    return wilton_assets.get_template_path(group_name)
+
+
 class EnhancedWiltonReportGenerator:
+    # Bump when the rendered output changes so cached PDFs are re-rendered
+    GENERATOR_VERSION = 1
+
     def __init__(self, config_path):
         """Initialize the report generator with configuration."""
 
@@ -27,20 +215,10 @@ class EnhancedWiltonReportGenerator:
                 f"Directory contents: {os.listdir(os.path.dirname(config_path))}"
             )
             
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
-       
-        # Get base directory for fonts
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        fonts_dir = os.path.join(base_dir, 'static', 'fonts')
-        
-        # Register handwriting font
-        try:
-            pdfmetrics.registerFont(TTFont('Handwriting', os.path.join(fonts_dir, 'caveat.ttf')))
-            self.font_name = 'Handwriting'
-        except:
-            print("Warning: Handwriting font not found, falling back to Helvetica")
-            self.font_name = 'Helvetica-Bold'
+        # Config and fonts come from the process-wide registry, loaded once
+        self.config_path = config_path
+        self.config = wilton_assets.get_config(config_path)
+        self.font_name = wilton_assets.get_font_name()
 
     def is_school_group(self, group_name):
         """Check if this is a school group that should use the schools letter."""
@@ -48,85 +226,31 @@ class EnhancedWiltonReportGenerator:
 
     def get_schools_letter_path(self):
         """Get the path to the schools letter PDF."""
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        template_dir = os.path.join(base_dir, 'app', 'static', 'pdf_templates')
-        return os.path.join(template_dir, 'wilton_schools_letter.pdf')
+        return os.path.join(wilton_assets.template_dir, SCHOOLS_LETTER_FILENAME)
 
     def generate_schools_letter(self, output_path):
-        """Generate a schools letter by copying the template."""
+        """Generate a schools letter by copying the template to a path or binary stream."""
         schools_letter_path = self.get_schools_letter_path()
         
         if not os.path.exists(schools_letter_path):
             raise FileNotFoundError(f"Schools letter template not found at: {schools_letter_path}")
         
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Simply copy the schools letter to the output location
-        shutil.copy2(schools_letter_path, output_path)
+        # Simply copy the schools letter to the output
+        write_pdf_output(output_path, wilton_assets.get_pdf_bytes(schools_letter_path))
             
     def get_template_path(self, group_name):
         """
         Get the correct template path based on group name.
         Finds any template that contains a substring of the group name.
         """
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        template_dir = os.path.join(base_dir, 'app', 'static', 'pdf_templates')
-        
-        # Check if the directory exists
-        if not os.path.exists(template_dir):
-            return None
-        
-        # Normalize the group name for comparison (lowercase, no spaces)
-        normalized_group = group_name.lower().replace(' ', '_')
-        
-        # Get all template files in the directory
-        template_files = [f for f in os.listdir(template_dir) if f.startswith('wilton_') and f.endswith('_report.pdf')]
-        
-        # Sort templates by length (descending) to prefer more specific matches
-        template_files.sort(key=len, reverse=True)
-        
-        for template_file in template_files:
-            # Extract the middle part between 'wilton_' and '_report.pdf'
-            template_key = template_file[len('wilton_'):-len('_report.pdf')]
-            
-            # Check if this template key appears in the normalized group name
-            if template_key in normalized_group:
-                return os.path.join(template_dir, template_file)
-        
-        # If no match found, return None
-        return None
+        return wilton_assets.get_template_path(group_name)
 
     def get_group_config(self, group_name):
         """
         Get the configuration for a specific group.
         Tries to find the best matching config for the group name.
         """
-        # First try exact match
-        if group_name in self.config:
-            return self.config[group_name]
-        
-        # Normalize the group name for comparison
-        normalized_group = group_name.lower().replace(' ', '_')
-        
-        # Create a list of config keys sorted by length (descending) to prefer more specific matches
-        config_keys = sorted(self.config.keys(), key=len, reverse=True)
-        
-        # Look for partial matches
-        for config_key in config_keys:
-            normalized_key = config_key.lower().replace(' ', '_')
-            
-            # Check if the normalized key is in the normalized group name
-            if normalized_key in normalized_group:
-                return self.config[config_key]
-            
-            # Also check the reverse - if the group name is in the config key
-            # This can help with cases where the config is more specific than the group name
-            if normalized_group in normalized_key:
-                return self.config[config_key]
-        
-        # If no match found, return None
-        return None
+        return wilton_assets.get_group_config(self.config_path, group_name)
         
     def draw_diagonal_text(self, c, text, x, y, angle=23):
         """Draw text at a specified angle with handwriting style."""
@@ -387,7 +511,7 @@ class EnhancedWiltonReportGenerator:
         return PdfReader(packet)
 
     def _generate_generic_report(self, data, output_path):
-        """Generate a generic report when no template/config exists."""
+        """Generate a generic report (to a path or binary stream) when no template/config exists."""
         from app.utils.report_generator import create_single_report_pdf
         
         try:
@@ -406,13 +530,10 @@ class EnhancedWiltonReportGenerator:
             if not content:
                 raise ValueError("Generated PDF content is empty")
             
-            # Save to file
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, 'wb') as f:
-                f.write(content)
+            write_pdf_output(output_path, content)
                 
             # Verify file was written
-            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            if isinstance(output_path, str) and (not os.path.exists(output_path) or os.path.getsize(output_path) == 0):
                 raise ValueError(f"Failed to write PDF to {output_path}")
             
         except Exception as e:
@@ -420,7 +541,7 @@ class EnhancedWiltonReportGenerator:
             raise  # Re-raise the exception to be caught by the caller
 
     def generate_report(self, template_path, output_path, data):
-        """Generate a filled report PDF."""
+        """Generate a filled report PDF to a path or binary stream, merging overlays in memory."""
         
         # Check if this is a school group - if so, just use the schools letter
         if self.is_school_group(data['group']):
@@ -434,8 +555,8 @@ class EnhancedWiltonReportGenerator:
         if not os.path.exists(template_path) or not group_config:
             return self._generate_generic_report(data, output_path)
         
-        # Original Wilton report generation code remains the same
-        template = PdfReader(open(template_path, "rb"))
+        # Parse a fresh copy of the cached template bytes - merge_page modifies the pages it is given
+        template = PdfReader(BytesIO(wilton_assets.get_pdf_bytes(template_path)))
         output = PdfWriter()
         
         for page_num in range(len(template.pages)):
@@ -444,26 +565,111 @@ class EnhancedWiltonReportGenerator:
             template_page.merge_page(overlay.pages[0])
             output.add_page(template_page)
         
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "wb") as output_file:
-            output.write(output_file)
+        if isinstance(output_path, str):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "wb") as output_file:
+                output.write(output_file)
+        else:
+            output.write(output_path)
+
+    @staticmethod
+    def build_report_data(payload):
+        """Build the overlay data for a serialised report (see serialize_report)."""
+        return {
+            'player_name': payload['student_name'],
+            'coach_name': payload['coach_name'],
+            'term': payload['term_name'],
+            'group': payload['group_name'],
+            'content': payload['content'],
+            'recommended_group': payload['recommended_group_name'],
+            'teaching_period': {
+                'next_period_start_date': payload['next_period_start_date'],
+                'bookings_open_date': payload['bookings_open_date']
+            },
+            'report': report_from_payload(payload)
+        }
+
+    def write_payload(self, payload, output_path):
+        """
+        Render one serialised report to a file path or a binary stream.
+
+        Raises on failure.
+        """
+        data = self.build_report_data(payload)
+
+        # Handle school groups differently - just generate the schools letter
+        if self.is_school_group(payload['group_name']):
+            self.generate_schools_letter(output_path)
+            return
+
+        # Generate the report (either Wilton template or generic)
+        template_path = self.get_template_path(payload['group_name'])
+        if template_path is None:
+            self._generate_generic_report(data, output_path)
+        else:
+            self.generate_report(template_path, output_path, data)
+
+    def render_payload_bytes(self, payload):
+        """Render one serialised report entirely in memory and return the PDF bytes."""
+        pdf_buffer = BytesIO()
+        self.write_payload(payload, pdf_buffer)
+
+        pdf_data = pdf_buffer.getvalue()
+        if not pdf_data:
+            raise ValueError("Generated Wilton report is empty")
+        return pdf_data
+
+    def render_payload(self, payload, output_path):
+        """
+        Render one serialised report to a file, returning (output_path or None, error or None).
+
+        Used by batch generation both in-process and in worker processes.
+        """
+        try:
+            self.write_payload(payload, output_path)
+
+            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+                raise ValueError(f"Generated file is empty or missing: {output_path}")
+            return output_path, None
+
+        except Exception as e:
+            return None, f"Error generating report for {payload['student_name']}: {str(e)}"
 
     @classmethod
-    def batch_generate_reports(cls, period_id, config_path=None):
-        """Generate reports for all completed reports in a teaching period."""
+    def batch_generate_reports(cls, period_id, config_path=None, workers=None, progress_callback=None):
+        """
+        Generate reports for all completed reports in a teaching period.
+
+        Reports are loaded and serialised up front; cached PDFs are copied
+        into place and the rest are rendered across worker processes that
+        each build their own generator.
+
+        Args:
+            period_id: Teaching period to generate reports for
+            config_path: Optional path to the Wilton group config
+            workers: Number of worker processes (default: REPORT_PDF_WORKERS config)
+            progress_callback: Optional callable(completed, total) invoked as reports finish
+        """
         if config_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             config_path = os.path.join(base_dir, 'utils', 'wilton_group_config.json')
         
-        generator = cls(config_path)
+        # Fail fast on a missing config before any worker starts
+        cls(config_path)
         
         # Get all completed reports for the period with related data
         reports = Report.query.filter_by(teaching_period_id=period_id)\
             .join(Report.programme_player)\
             .join(Report.teaching_period)\
             .options(
+                db.joinedload(Report.student),
+                db.joinedload(Report.coach),
+                db.joinedload(Report.tennis_group),
                 db.joinedload(Report.recommended_group),
-                db.joinedload(Report.teaching_period)
+                db.joinedload(Report.teaching_period),
+                db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.group_time),
+                db.joinedload(Report.programme_player).joinedload(ProgrammePlayers.tennis_club),
+                db.selectinload(Report.template).selectinload(ReportTemplate.sections).selectinload(TemplateSection.fields)
             )\
             .all()
         
@@ -483,71 +689,24 @@ class EnhancedWiltonReportGenerator:
         reports_dir = os.path.join(base_dir, 'instance', 'reports')
         period_dir = os.path.join(reports_dir, f'reports-{period_name}')
         
-        generated_reports = []
+        jobs = []
         errors = []
         
         for report in reports:
             try:
-                # Create group-specific directory with time slot and day
-                group_name = report.tennis_group.name.replace(' ', '_').lower()
-
-                if report.programme_player and report.programme_player.group_time:
-                    time = report.programme_player.group_time
-                    start_time = time.start_time.strftime('%I%M%p').lower()
-                    end_time = time.end_time.strftime('%I%M%p').lower()
-                    day = time.day_of_week.value.lower()
-                    group_dir = f"{group_name}_{day}_{start_time}_{end_time}_reports"
-                else:
-                    group_dir = f"{group_name}_reports"
-                
-                full_group_dir = os.path.join(period_dir, group_dir)
-                os.makedirs(full_group_dir, exist_ok=True)
-                
-                # Prepare output path with standardized naming
-                student_name = report.student.name.replace(' ', '_').lower()
-                term_name = report.teaching_period.name.replace(' ', '_').lower()
-                filename = f"{student_name}_{group_name}_{term_name}_report.pdf"
-                output_path = os.path.join(full_group_dir, filename)
-                
-                # Prepare report data including teaching period dates
-                data = {
-                    'player_name': report.student.name,
-                    'coach_name': report.coach.name,
-                    'term': report.teaching_period.name,
-                    'group': report.tennis_group.name,
-                    'content': report.content,
-                    'recommended_group': report.recommended_group.name if report.recommended_group else None,
-                    'teaching_period': {
-                        'next_period_start_date': report.teaching_period.next_period_start_date.strftime('%Y-%m-%d') if report.teaching_period.next_period_start_date else None,
-                        'bookings_open_date': report.teaching_period.bookings_open_date.strftime('%Y-%m-%d') if report.teaching_period.bookings_open_date else None
-                    },
-                    'report': report 
-                }
-                
-                # Handle school groups differently - just generate the schools letter
-                if generator.is_school_group(report.tennis_group.name):
-                    generator.generate_schools_letter(output_path)
-                else:
-                    # Get template path for this group
-                    template_path = generator.get_template_path(report.tennis_group.name)
-                    
-                    # Generate the report (either Wilton template or generic)
-                    if template_path is None:
-                        try:
-                            generator._generate_generic_report(data, output_path)
-                            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
-                                raise ValueError(f"Generated file is empty or missing: {output_path}")
-                        except Exception as e:
-                            errors.append(f"Error generating generic report for {report.student.name}: {str(e)}")
-                            print(f"Error generating generic report: {str(e)}")
-                            continue
-                    else:
-                        generator.generate_report(template_path, output_path, data)
-                        
-                generated_reports.append(output_path)
+                # Group-specific directory with time slot and day, standardized file name
+                payload = serialize_report(report)
+                output_path = get_report_output_path(period_dir, payload)
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                jobs.append((payload, output_path))
                 
             except Exception as e:
                 errors.append(f"Error generating report for {report.student.name}: {str(e)}")
+
+        generated_reports, render_errors = render_wilton_report_files(
+            jobs, config_path, workers=workers, progress_callback=progress_callback
+        ) if jobs else ([], [])
+        errors.extend(render_errors)
                 
         return {
             'success': len(generated_reports),
@@ -616,6 +775,38 @@ class EnhancedWiltonReportGenerator:
             'report_data': data
         }
 
+# Generator owned by each batch worker process, built once by _init_wilton_worker
+_worker_generator = None
+
+def _init_wilton_worker(config_path):
+    """Load the config and register fonts once per worker process."""
+    global _worker_generator
+    _worker_generator = EnhancedWiltonReportGenerator(config_path)
+    wilton_assets.preload(config_path)
+
+def _render_wilton_payload(payload, output_path):
+    """Worker entry point: render one serialised report with this process's generator."""
+    return _worker_generator.render_payload(payload, output_path)
+
+def render_wilton_report_files(jobs, config_path, workers=None, progress_callback=None):
+    """
+    Render (payload, output_path) jobs with the Wilton generator, reusing cached PDFs.
+
+    Returns:
+        tuple: (generated output paths, error messages)
+    """
+    from app.services.report_pdf_cache_service import run_cached_report_jobs, WILTON_GENERATOR
+
+    return run_cached_report_jobs(
+        WILTON_GENERATOR,
+        _render_wilton_payload,
+        jobs,
+        workers=workers,
+        progress_callback=progress_callback,
+        initializer=_init_wilton_worker,
+        initargs=(config_path,)
+    )
+
 def main():
     """Main function to test report generation"""
     app = create_app()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+import argparse
+from app import create_app
+from app.services.attendance_rollup_service import backfill_attendance_rollups
+from app.services.absence_streak_service import backfill_absence_streaks
+
+def run_backfill():
+    """Rebuild precomputed tables from their source rows."""
+    parser = argparse.ArgumentParser(description='Rebuild precomputed tables')
+    parser.add_argument('target', choices=['attendance-rollups', 'absence-streaks'], help='Table to rebuild')
+    parser.add_argument('--club-id', type=int, help='Only rebuild rows for this tennis club')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if args.target == 'attendance-rollups':
+            print("Rebuilding attendance rollups...")
+            backfill_attendance_rollups(args.club_id)
+        elif args.target == 'absence-streaks':
+            print("Rebuilding absence streaks...")
+            backfill_absence_streaks(args.club_id)
+
+        print("Backfill completed successfully!")
+
+if __name__ == "__main__":
+    run_backfill()
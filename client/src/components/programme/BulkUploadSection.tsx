@@ -77,6 +77,8 @@ interface UploadStatus {
   progress_percentage: number;
   warnings: string[];
   errors: string[];
+  total_warnings?: number;
+  total_errors?: number;
   has_more?: boolean;
   elapsed_time?: number;
   skipped_duplicates?: number;
@@ -93,6 +95,9 @@ interface TimeSlotError {
 
 const COLORS = ['#4ade80', '#facc15', '#f87171', '#93c5fd', '#c084fc'];
 
+// How often to check on a running upload job
+const POLL_INTERVAL_MS = 2000;
+
 const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
   periodId,
   periodName = "Current Period",
@@ -119,10 +124,10 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
   const [timeSlotErrors, setTimeSlotErrors] = useState<TimeSlotError[]>([]);
   const [persistedErrors, setPersistedErrors] = useState<string[]>([]);
 
-  // When we get a processing token, start processing batches
+  // When we get a processing token, poll the upload job until it finishes
   useEffect(() => {
     if (processingToken && !processingBatch && !processingComplete) {
-      processBatch();
+      pollUploadJob();
     }
   }, [processingToken, processingBatch, processingComplete]);
 
@@ -303,16 +308,14 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
     resetState();
   };
 
-  // Process a batch of rows
-  const processBatch = async () => {
+  // Poll the background upload job for progress
+  const pollUploadJob = async () => {
     if (!processingToken || processingBatch) return;
     
     setProcessingBatch(true);
     
     try {
-      const response = await fetch(`/clubs/api/players/bulk-upload/${processingToken}/process`, {
-        method: 'POST',
-      });
+      const response = await fetch(`/clubs/api/players/bulk-upload/jobs/${processingToken}`);
       
       if (!response.ok) {
         let errorData;
@@ -333,25 +336,24 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
       
       const result = await response.json();
       
-      // Update status with latest info
-      setStatus(prev => {
-        if (!prev) return result;
-        
-        const mergedErrors = [...prev.errors, ...(result.errors || [])];
-        
-        setPersistedErrors(currentErrors => [...currentErrors, ...(result.errors || [])]);
-        
-        const { timeSlotErrors: newTimeSlotErrors } = extractTimeSlotErrors(result.errors || []);
-        if (newTimeSlotErrors.length > 0) {
-          setTimeSlotErrors(current => [...current, ...newTimeSlotErrors]);
-        }
-        
-        return {
-          ...result,
-          warnings: [...prev.warnings, ...(result.warnings || [])],
-          errors: mergedErrors
-        };
-      });
+      // Running jobs report the latest warnings and errors; the full lists come with the final status
+      const jobErrors: string[] = result.errors || [];
+      const { timeSlotErrors: jobTimeSlotErrors } = extractTimeSlotErrors(jobErrors);
+      setPersistedErrors(jobErrors);
+      setTimeSlotErrors(jobTimeSlotErrors);
+      setStatus(result);
+      
+      if (result.status === 'failed') {
+        setUploading(false);
+        setProcessingComplete(true);
+        setError({
+          error: 'Processing failed',
+          details: result.last_error || 'An error occurred during processing',
+          warnings: result.warnings || [],
+          errors: jobErrors
+        });
+        return;
+      }
       
       // Check if processing is complete
       if (result.status === 'completed' || !result.has_more) {
@@ -365,9 +367,9 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
           players_created: result.players_created,
           players_updated: result.players_updated || 0,
           warnings: result.warnings || [],
-          errors: persistedErrors,
+          errors: jobErrors,
           skipped_duplicates: result.skipped_duplicates || 0,
-          skipped_missing_time_slot: result.skipped_missing_time_slot || timeSlotErrors.length,
+          skipped_missing_time_slot: result.skipped_missing_time_slot || jobTimeSlotErrors.length,
           skipped_validation_errors: result.skipped_validation_errors || 0,
           total_processed: result.total_processed || originalRowCount
         };
@@ -375,7 +377,7 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
         setSuccess(finalSuccess);
         setShowAnalytics(true);
         
-        if (timeSlotErrors.length > 0) {
+        if (jobTimeSlotErrors.length > 0) {
           setShowTimeSlotErrors(true);
         }
         
@@ -383,21 +385,13 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
           setShowUpdateInfo(true);
         }
       } else {
-        setProcessingBatch(false);
+        setTimeout(() => setProcessingBatch(false), POLL_INTERVAL_MS);
       }
     } catch (err) {
-      console.error('Batch processing error:', err);
-      setProcessingBatch(false);
+      console.error('Upload progress error:', err);
       
-      if (status && status.processed_rows > 0) {
-        setTimeout(() => setProcessingBatch(false), 2000);
-      } else {
-        setUploading(false);
-        setError({
-          error: err instanceof Error ? err.message : 'Failed to process data',
-          details: 'There was a problem communicating with the server.'
-        });
-      }
+      // The job keeps running on the server, so keep polling through transient failures
+      setTimeout(() => setProcessingBatch(false), POLL_INTERVAL_MS);
     }
   };
 
@@ -720,8 +714,8 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
               {status.errors.slice(0, 3).map((error, idx) => (
                 <li key={idx}>{error}</li>
               ))}
-              {status.errors.length > 3 && (
-                <li className="italic">...and {status.errors.length - 3} more errors</li>
+              {(status.total_errors ?? status.errors.length) > 3 && (
+                <li className="italic">...and {(status.total_errors ?? status.errors.length) - 3} more errors</li>
               )}
             </ul>
           </div>
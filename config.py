@@ -75,6 +75,22 @@ class Config:
     # Club invitation configuration
     INVITATION_EXPIRY_HOURS = 48
 
+    # Worker processes for batch report PDF generation
+    REPORT_PDF_WORKERS = int(os.environ.get('REPORT_PDF_WORKERS', os.cpu_count() or 1))
+
+    # Rendered report PDF cache: 'local', 's3' or 'none'
+    REPORT_PDF_CACHE_BACKEND = os.environ.get('REPORT_PDF_CACHE_BACKEND', 'local')
+    REPORT_PDF_CACHE_DIR = os.environ.get('REPORT_PDF_CACHE_DIR')  # Defaults to <instance>/report_pdf_cache
+    REPORT_PDF_CACHE_S3_BUCKET = os.environ.get('REPORT_PDF_CACHE_S3_BUCKET')  # Defaults to AWS_S3_BUCKET
+    REPORT_PDF_CACHE_S3_PREFIX = os.environ.get('REPORT_PDF_CACHE_S3_PREFIX', 'report-pdf-cache')
+    REPORT_PDF_CACHE_MAX_BYTES = int(os.environ.get('REPORT_PDF_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+    REPORT_PDF_CACHE_EVICT_INTERVAL = int(os.environ.get('REPORT_PDF_CACHE_EVICT_INTERVAL', 300))  # Seconds between eviction passes after single renders
+
+    # Bulk report emails: concurrent SES sends, and an optional cap on emails/second
+    # (defaults to the SES account's MaxSendRate)
+    BULK_EMAIL_SEND_THREADS = int(os.environ.get('BULK_EMAIL_SEND_THREADS', 8))
+    BULK_EMAIL_MAX_SEND_RATE = float(os.environ['BULK_EMAIL_MAX_SEND_RATE']) if os.environ.get('BULK_EMAIL_MAX_SEND_RATE') else None
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
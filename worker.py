@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+import argparse
+import time
+from app import create_app, db
+from app.services.email_service import EmailService
+from app.services.notification_service import process_outbox
+from app.services.bulk_email_service import process_bulk_email_jobs
+from app.services.player_upload_service import process_player_upload_jobs
+
+# Queues a worker can drain; long-running job queues get their own process
+# so a bulk email run never holds up absence notifications or player uploads
+QUEUES = ('notifications', 'bulk-emails', 'player-uploads')
+
+def run_worker():
+    """Drain the notification outbox and run bulk email and player upload jobs, polling for new work."""
+    parser = argparse.ArgumentParser(description='Deliver queued notification and bulk report emails, and import bulk player uploads')
+    parser.add_argument('--queue', choices=QUEUES + ('all',), default='all',
+                        help='Queue to work on (default: all, in a single loop)')
+    parser.add_argument('--once', action='store_true', help='Process due notifications then exit')
+    parser.add_argument('--batch-size', type=int, default=50, help='Notifications to deliver per batch')
+    parser.add_argument('--poll-interval', type=int, default=10, help='Seconds to wait when the outbox is empty')
+    args = parser.parse_args()
+
+    queues = QUEUES if args.queue == 'all' else (args.queue,)
+
+    app = create_app()
+
+    with app.app_context():
+        print(f"Starting worker for {', '.join(queues)}...")
+
+        # One SES client for the life of the worker
+        email_service = EmailService() if 'notifications' in queues or 'bulk-emails' in queues else None
+
+        while True:
+            processed = jobs_run = uploads_run = 0
+
+            if 'notifications' in queues:
+                try:
+                    processed = process_outbox(batch_size=args.batch_size, email_service=email_service)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Notification worker batch failed: {str(e)}")
+
+            if 'bulk-emails' in queues:
+                try:
+                    jobs_run = process_bulk_email_jobs(email_service=email_service)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Bulk email job failed: {str(e)}")
+
+            if 'player-uploads' in queues:
+                try:
+                    uploads_run = process_player_upload_jobs()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Player upload job failed: {str(e)}")
+
+            if processed:
+                print(f"Processed {processed} notifications")
+            if jobs_run:
+                print(f"Ran {jobs_run} bulk email job")
+            if uploads_run:
+                print(f"Ran {uploads_run} player upload job")
+            if processed or jobs_run or uploads_run:
+                continue
+
+            if args.once:
+                break
+
+            time.sleep(args.poll_interval)
+
+if __name__ == "__main__":
+    run_worker()